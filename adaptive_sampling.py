@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: adaptive_sampling.py
+
+"""
+Amostragem adaptativa do comprimento axial para reduzir as consultas à calculadora Barrett.
+
+Em vez de calcular todos os pontos da grade uniforme de `setup_dataframe`, a varredura
+parte de uma grade grossa e subdivide apenas os intervalos em que as curvas (cada
+fórmula, inclusive a Barrett, e a dispersão entre elas) ainda não estão bem resolvidas.
+O erro da interpolação linear em um intervalo de largura h é estimado por
+h²/8 · |f''|, com f'' das diferenças divididas de segunda ordem nos pontos vizinhos.
+A cada rodada, os intervalos com maior erro estimado recebem um ponto no meio, e todos
+os novos pontos são calculados juntos (uma única sessão do scraper por rodada). A
+varredura termina quando o maior erro estimado fica abaixo da tolerância ou quando o
+orçamento de pontos acaba; o maior erro estimado restante é o limite de erro obtido.
+
+Curvas com degraus não são resolvidas pela interpolação linear: em um salto J a
+estimativa fica em torno de J/8, seja qual for h (a SRK II muda a constante por faixa
+de AL, e a Barrett retorna potências em passos de 0.5 D, ou seja, ≈ 0.06 D). Por isso os
+intervalos mais estreitos que `MIN_INTERVAL` não são mais subdivididos; o erro deles
+continua entrando no limite informado.
+"""
+
+import argparse
+import json
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from formula_analytics import detect_formula_columns
+from iol_formulas import IOL, A_CONSTANT, FORMULA_OUTPUT_COLUMNS
+from run_all_calculations import (
+    EYE, SHORT_EYE_AL, LONG_EYE_AL, AL_STEPS, SHORT_EYE_K1, LONG_EYE_K1,
+    SHORT_EYE_K2, LONG_EYE_K2, SHORT_EYE_ACD, LONG_EYE_ACD, SHORT_EYE_LT, LONG_EYE_LT,
+    RESULT_DECIMALS, run_unified_calculation,
+)
+
+# --- Configurações ---
+OUTPUT_CSV = 'resultados_adaptativos_iol.csv'
+OUTPUT_REPORT = 'resultados_adaptativos_iol.json'
+TOLERANCE = 0.1      # D, erro de interpolação aceito
+POINT_BUDGET = 40    # Número máximo de olhos calculados (consultas Barrett)
+COARSE_POINTS = 9    # Pontos da grade inicial
+MIN_INTERVAL = 0.05  # mm, intervalos mais estreitos não são subdivididos
+SPREAD_CURVE = 'spread'
+
+
+def sweep_range() -> tuple:
+    """Primeiro e último AL da grade uniforme de `setup_dataframe`."""
+    axial_lengths = np.arange(SHORT_EYE_AL, LONG_EYE_AL, AL_STEPS)
+    return float(axial_lengths[0]), float(axial_lengths[-1])
+
+
+def biometry_dataframe(axial_lengths: Sequence[float]) -> pd.DataFrame:
+    """
+    Monta um DataFrame no formato de `setup_dataframe` para ALs arbitrários, com K1, K2,
+    ACD e espessura do cristalino interpolados linearmente como na grade uniforme.
+    """
+    al = np.asarray(axial_lengths, dtype=float)
+    first, last = sweep_range()
+
+    def interpolate(short_value, long_value):
+        return np.interp(al, [first, last], [short_value, long_value])
+
+    df = pd.DataFrame({
+        'iol_model': [IOL] * len(al),
+        'a_constant': [A_CONSTANT] * len(al),
+        'eye_side': [EYE] * len(al),
+        'axial_length': al,
+        'meas_k1': interpolate(SHORT_EYE_K1, LONG_EYE_K1),
+        'meas_k2': interpolate(SHORT_EYE_K2, LONG_EYE_K2),
+        'optical_acd': interpolate(SHORT_EYE_ACD, LONG_EYE_ACD),
+        'lens_thickness': interpolate(SHORT_EYE_LT, LONG_EYE_LT),
+    })
+    for name in FORMULA_OUTPUT_COLUMNS:
+        df[name] = np.nan
+    return df
+
+
+def interval_error_estimates(axial_lengths: np.ndarray, curves: np.ndarray) -> np.ndarray:
+    """
+    Erro estimado da interpolação linear em cada intervalo: h²/8 · max|f''|, com f''
+    das diferenças divididas nos dois extremos do intervalo e o máximo entre as curvas.
+
+    Args:
+        axial_lengths (np.ndarray): ALs em ordem crescente (n,).
+        curves (np.ndarray): Valores de cada curva (n, n_curvas); NaN é ignorado.
+
+    Returns:
+        np.ndarray: Erro estimado (D) de cada um dos n - 1 intervalos.
+    """
+    x = np.asarray(axial_lengths, dtype=float)
+    y = np.asarray(curves, dtype=float).reshape(len(x), -1)
+    h = np.diff(x)
+    if len(x) < 3:
+        return np.full(len(h), np.inf)  # Sem pontos para estimar a curvatura
+
+    slopes = np.diff(y, axis=0) / h[:, np.newaxis]
+    second = 2 * np.diff(slopes, axis=0) / (h[:-1] + h[1:])[:, np.newaxis]   # f'' nos pontos internos
+    second = np.vstack([second[:1], second, second[-1:]])                     # extremos: vizinho
+    with np.errstate(invalid='ignore'):
+        curvature = np.fmax(np.abs(second[:-1]), np.abs(second[1:]))
+        curvature = np.where(np.isnan(curvature).all(axis=1, keepdims=True), 0.0,
+                             np.nan_to_num(curvature, nan=0.0)).max(axis=1)
+    return h**2 / 8 * curvature
+
+
+def _curves(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    values = df[list(columns)].to_numpy(dtype=float)
+    with np.errstate(invalid='ignore'):
+        spread = np.nanmax(values, axis=1) - np.nanmin(values, axis=1) if values.shape[1] > 1 else np.zeros(len(df))
+    return np.column_stack([values, spread])
+
+
+@dataclass
+class AdaptiveSweepResult:
+    """Resultado da varredura adaptativa."""
+    df: pd.DataFrame                 # Olhos calculados, em ordem de AL
+    interval_errors: np.ndarray      # Erro estimado de cada intervalo entre olhos vizinhos (D)
+    error_bound: float               # Maior erro estimado (D)
+    rounds: int                      # Rodadas de refinamento
+    converged: bool                  # True se não restou intervalo a subdividir dentro do orçamento
+    tolerance: float = TOLERANCE
+
+    def report(self) -> dict:
+        """Relatório da varredura, com o erro estimado de cada intervalo."""
+        al = self.df['axial_length'].to_numpy(dtype=float)
+        return {
+            'tolerance': self.tolerance,
+            'points': len(self.df),
+            'rounds': self.rounds,
+            'converged': self.converged,
+            'error_bound': round(self.error_bound, 4),
+            'intervals': [
+                {'al_start': round(float(a), 4), 'al_end': round(float(b), 4), 'error': round(float(e), 4)}
+                for a, b, e in zip(al[:-1], al[1:], self.interval_errors)
+            ],
+        }
+
+    def summary(self) -> str:
+        first, last = sweep_range()
+        uniform = len(np.arange(SHORT_EYE_AL, LONG_EYE_AL, AL_STEPS))
+        if not self.converged:
+            status = "orçamento esgotado"
+        elif self.error_bound <= self.tolerance:
+            status = "tolerância atingida"
+        else:
+            status = "acima da tolerância só em intervalos mínimos"
+        return (f"{len(self.df)} olhos (grade uniforme: {uniform}) em {self.rounds} rodada(s), "
+                f"AL {first:g}-{last:g} mm; limite de erro estimado {self.error_bound:.3f} D ({status}).")
+
+
+def adaptive_sweep(
+    tolerance: float = TOLERANCE,
+    budget: int = POINT_BUDGET,
+    coarse_points: int = COARSE_POINTS,
+    evaluate: Callable[[pd.DataFrame], pd.DataFrame] = run_unified_calculation,
+    columns: Optional[Sequence[str]] = None,
+    min_interval: float = MIN_INTERVAL,
+) -> AdaptiveSweepResult:
+    """
+    Executa a varredura adaptativa.
+
+    Args:
+        tolerance (float): Erro de interpolação aceito (D).
+        budget (int): Número máximo de olhos calculados, incluindo a grade inicial.
+        coarse_points (int): Número de pontos da grade inicial (>= 3).
+        evaluate (Callable): Calcula as fórmulas de um DataFrame de `biometry_dataframe`.
+        columns (Optional[Sequence[str]]): Curvas usadas no critério; por padrão, todas as
+                                           colunas de fórmula com algum valor.
+        min_interval (float): Largura (mm) abaixo da qual um intervalo não é subdividido.
+
+    Returns:
+        AdaptiveSweepResult: Os olhos calculados e o limite de erro obtido.
+    """
+    if coarse_points < 3:
+        raise ValueError("coarse_points must be at least 3.")
+    if budget < coarse_points:
+        raise ValueError("budget must be at least coarse_points.")
+
+    first, last = sweep_range()
+    df = evaluate(biometry_dataframe(np.linspace(first, last, coarse_points)))
+    if columns is None:
+        columns = [col for col in detect_formula_columns(df.columns) if df[col].notna().any()]
+
+    rounds = 0
+    while True:
+        df = df.sort_values('axial_length', ignore_index=True)
+        al = df['axial_length'].to_numpy(dtype=float)
+        errors = interval_error_estimates(al, _curves(df, columns))
+        remaining = budget - len(df)
+        refine = np.flatnonzero((errors > tolerance) & (np.diff(al) >= 2 * min_interval))
+        if not len(refine) or remaining <= 0:
+            break
+        # Os intervalos com maior erro estimado primeiro, dentro do orçamento
+        refine = refine[np.argsort(errors[refine])[::-1]][:remaining]
+        midpoints = (al[refine] + al[refine + 1]) / 2
+        print(f"Rodada {rounds + 1}: {len(midpoints)} novo(s) ponto(s); maior erro estimado {errors.max():.3f} D")
+        new = evaluate(biometry_dataframe(np.sort(midpoints)))
+        df = pd.concat([df, new], ignore_index=True)
+        rounds += 1
+
+    error_bound = float(errors.max()) if len(errors) else 0.0
+    return AdaptiveSweepResult(df, errors, error_bound, rounds, converged=not len(refine), tolerance=tolerance)
+
+
+def interpolate_curves(result: AdaptiveSweepResult, axial_lengths: Sequence[float]) -> pd.DataFrame:
+    """Interpola linearmente as colunas de fórmula do resultado adaptativo nos ALs pedidos."""
+    al = np.asarray(axial_lengths, dtype=float)
+    df = result.df
+    columns = [col for col in detect_formula_columns(df.columns) if df[col].notna().any()]
+    data = {'axial_length': al}
+    for col in columns:
+        known = df[col].notna().to_numpy()
+        data[col] = np.interp(al, df['axial_length'].to_numpy()[known], df[col].to_numpy(dtype=float)[known])
+    return pd.DataFrame(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Varredura adaptativa do comprimento axial.")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="Erro de interpolação aceito (D).")
+    parser.add_argument('--budget', type=int, default=POINT_BUDGET, help="Número máximo de olhos calculados.")
+    parser.add_argument('--coarse-points', type=int, default=COARSE_POINTS, help="Pontos da grade inicial.")
+    parser.add_argument('--min-interval', type=float, default=MIN_INTERVAL,
+                        help="Largura (mm) abaixo da qual um intervalo não é subdividido.")
+    parser.add_argument('--output', default=OUTPUT_CSV)
+    parser.add_argument('--report', default=OUTPUT_REPORT)
+    args = parser.parse_args()
+
+    result = adaptive_sweep(args.tolerance, args.budget, args.coarse_points, min_interval=args.min_interval)
+    result.df.round(RESULT_DECIMALS).to_csv(args.output, index=False, encoding='utf-8')
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(result.report(), f, indent=2)
+    print(result.summary())
+    print(f"Resultados salvos em '{args.output}' e relatório em '{args.report}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: apacrs_stub_server.py
+
+"""
+Servidor local que imita a calculadora Barrett Universal II da APACRS.
+
+Reproduz os IDs de elementos usados por `BarrettCalculatorScraper` (formulário,
+aba 'Universal Formula' e as tabelas GridView de cada olho) e devolve resultados
+sintéticos e determinísticos, permitindo testar e medir o scraper sem acessar o
+site real. Latência, variação (jitter) e falhas podem ser injetadas.
+"""
+
+import html
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from barrett_form import EYE_FIELD_IDS, RESULT_TABLE_IDS
+from iol_formulas import IOLFormulas, CONSTANTS
+
+# --- Configurações ---
+BASE_PATH = '/barrett_universal2105/'
+DEFAULT_IOL_MODELS = {
+    'Alcon SN60WF': 118.99,
+}
+# Número de linhas por tabela; a quarta linha (índice 3) é a mais próxima da emetropia,
+# que é a linha lida pelo pipeline.
+RESULT_ROWS = 7
+POWER_STEP = 0.5
+
+
+@dataclass
+class StubConfig:
+    """Parâmetros de comportamento do servidor local."""
+    latency: float = 0.0          # Atraso fixo por submissão, em segundos.
+    jitter: float = 0.0           # Atraso adicional uniforme em [0, jitter] segundos.
+    failure_rate: float = 0.0     # Probabilidade de uma submissão retornar erro HTTP 500.
+    seed: int = 0                 # Semente para jitter e falhas (sequência reprodutível).
+    iol_models: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_IOL_MODELS))
+
+
+def synthetic_barrett_table(
+    iol_model_a_constant: float, axial_length: float, meas_k1: float, meas_k2: float
+) -> List[Tuple[float, str, float]]:
+    """
+    Gera uma tabela de resultados sintética e determinística para um olho.
+
+    A potência de emetropia vem da SRK/T (com a constante ACD derivada da constante A);
+    as linhas cobrem passos de 0.5 D em ordem decrescente, como no site.
+
+    Returns:
+        List[Tuple[float, str, float]]: Linhas (potência da LIO, óptica, refração prevista).
+    """
+    calculator = IOLFormulas()
+    k_mean = (meas_k1 + meas_k2) / 2
+    acd_const = CONSTANTS["iol"]["a_to_acd_a1"] * iol_model_a_constant + CONSTANTS["iol"]["a_to_acd_a0"]
+    elp = calculator._srk_t_elp(axial_length, k_mean, acd_const=acd_const)['result']
+    emmetropic_power = calculator.srk_t_power(axial_length, k_mean, elp)['result'] if not math.isnan(elp) else math.nan
+    if math.isnan(emmetropic_power):
+        return []
+
+    center = round(emmetropic_power / POWER_STEP) * POWER_STEP
+    rows = []
+    for i in range(RESULT_ROWS):
+        power = center + (3 - i) * POWER_STEP
+        refraction = -(power - emmetropic_power) / 1.5
+        rows.append((power, 'Biconvex', round(refraction, 2)))
+    return rows
+
+
+# --- Páginas HTML ---
+def _eye_inputs(side: str) -> str:
+    labels = {
+        'axial_length': 'Axial Length', 'meas_k1': 'Measured K1', 'meas_k2': 'Measured K2',
+        'optical_acd': 'Optical ACD', 'lens_thickness': 'Lens Thickness', 'wtw': 'WTW',
+    }
+    return ''.join(
+        f'<label>{labels[name]} <input type="text" id="{field_id}" name="{field_id}"></label>'
+        for name, field_id in EYE_FIELD_IDS[side].items()
+    )
+
+
+def render_form_page(iol_models: Dict[str, float], results: Optional[Dict[str, List]] = None) -> str:
+    """Monta a página do formulário e, após uma submissão, a aba de resultados."""
+    options = ''.join(f'<option value="{html.escape(m)}">{html.escape(m)}</option>' for m in iol_models)
+    page = [
+        '<html><head><title>Barrett Universal II Formula (stub)</title></head><body>',
+        f'<form method="post" action="{BASE_PATH}" id="form1">',
+        '<input type="text" id="MainContent_PatientName" name="MainContent_PatientName">',
+        f'<select id="MainContent_IOLModel" name="MainContent_IOLModel">{options}</select>',
+        f'<fieldset id="OD">{_eye_inputs("R")}</fieldset>',
+        f'<fieldset id="OS">{_eye_inputs("L")}</fieldset>',
+        '<input type="button" id="MainContent_btnReset" value="Reset" onclick="this.form.reset();">',
+        '<input type="submit" id="MainContent_Button1" name="MainContent_Button1" value="Calculate">',
+        '</form>',
+    ]
+    if results is not None:
+        page.append(
+            '<a href="#" onclick="document.getElementById(\'universal\').style.display=\'block\'; return false;">'
+            'Universal Formula</a>'
+        )
+        page.append('<div id="universal" style="display:none">')
+        for side, rows in results.items():
+            page.append(f'<table id="{RESULT_TABLE_IDS[side]}"><tr><th>IOL Power</th><th>Optic</th><th>Refraction</th></tr>')
+            for power, optic, refraction in rows:
+                page.append(f'<tr><td>{power:.2f}</td><td>{optic}</td><td>{refraction:.2f}</td></tr>')
+            page.append('</table>')
+        page.append('</div>')
+    page.append('</body></html>')
+    return ''.join(page)
+
+
+# --- Servidor ---
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    server: '_StubHTTPServer'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_html(self, status: int, body: str):
+        encoded = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def do_GET(self):
+        if not self.path.startswith(BASE_PATH):
+            self._send_html(404, '<html><body>Not Found</body></html>')
+            return
+        self._send_html(200, render_form_page(self.server.config.iol_models))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+
+        delay, fail = self.server.draw_behaviour()
+        if delay > 0:
+            time.sleep(delay)
+        self.server.count_submission()
+        if fail:
+            self._send_html(500, '<html><body>Server Error (injected)</body></html>')
+            return
+
+        iol_models = self.server.config.iol_models
+        a_constant = iol_models.get(form.get('MainContent_IOLModel', ''))
+        if a_constant is None:
+            self._send_html(400, '<html><body>Unknown IOL model</body></html>')
+            return
+
+        results = {}
+        for side, field_ids in EYE_FIELD_IDS.items():
+            try:
+                biometry = [float(form[field_ids[name]]) for name in ('axial_length', 'meas_k1', 'meas_k2')]
+            except (KeyError, ValueError):
+                continue
+            results[side] = synthetic_barrett_table(a_constant, *biometry)
+        self._send_html(200, render_form_page(iol_models, results))
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: StubConfig):
+        super().__init__(address, _StubRequestHandler)
+        self.config = config
+        self.submissions = 0
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+
+    def draw_behaviour(self) -> Tuple[float, bool]:
+        """Sorteia o atraso e a falha da próxima submissão."""
+        with self._lock:
+            delay = self.config.latency + self._rng.uniform(0, self.config.jitter)
+            fail = self._rng.random() < self.config.failure_rate
+        return delay, fail
+
+    def count_submission(self):
+        with self._lock:
+            self.submissions += 1
+
+
+class ApacrsStubServer:
+    """
+    Executa o servidor local em uma thread. Funciona como um gerenciador de contexto.
+
+    Exemplo:
+        with ApacrsStubServer(StubConfig(latency=0.2)) as server:
+            with BarrettCalculatorScraper(base_url=server.url) as scraper:
+                ...
+    """
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = '127.0.0.1', port: int = 0):
+        self.config = config or StubConfig()
+        self._address = (host, port)
+        self._httpd: Optional[_StubHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}{BASE_PATH}'
+
+    @property
+    def submissions(self) -> int:
+        """Número de submissões do formulário recebidas até agora."""
+        return self._httpd.submissions
+
+    def start(self):
+        self._httpd = _StubHTTPServer(self._address, self.config)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def main():
+    """Executa o servidor local em primeiro plano na porta 8080."""
+    with ApacrsStubServer(port=8080) as server:
+        print(f"Servidor local da calculadora Barrett em {server.url} (Ctrl+C para encerrar)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: barrett_form.py
+
+"""
+Dados e IDs do formulário da calculadora Barrett Universal II, sem dependência do
+Selenium: usados por `barrett_scraper_lib.py`, pelo servidor local de
+`apacrs_stub_server.py` e pelo backend HTTP de `benchmark_scraper.py`.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+# --- Classes de Dados (Data Classes) ---
+@dataclass
+class PatientData:
+    """Representa os dados de entrada para um paciente."""
+    iol_model: str
+    eye_side: str
+    axial_length: float
+    meas_k1: float
+    meas_k2: float
+    optical_acd: float
+    patient_name: str = "Demo Patient"
+    lens_thickness: Optional[float] = None
+    wtw: Optional[float] = None
+
+@dataclass
+class CalculationResult:
+    """Representa uma única linha da tabela de resultados."""
+    iol_power: float
+    optic: str
+    refraction: float
+
+    def __str__(self):
+        return f"Power: {self.iol_power}, Optic: {self.optic}, Refraction: {self.refraction}"
+
+# --- IDs dos Campos do Formulário ---
+# O formulário tem entradas separadas para cada olho. Os campos do olho esquerdo
+# usam os mesmos IDs do olho direito com o sufixo '0'.
+EYE_FIELD_IDS = {
+    'R': {
+        'axial_length': 'MainContent_Axlength',
+        'meas_k1': 'MainContent_MeasuredK1',
+        'meas_k2': 'MainContent_MeasuredK2',
+        'optical_acd': 'MainContent_OpticalACD',
+        'lens_thickness': 'MainContent_LensThickness',
+        'wtw': 'MainContent_WTW',
+    },
+    'L': {
+        'axial_length': 'MainContent_Axlength0',
+        'meas_k1': 'MainContent_MeasuredK10',
+        'meas_k2': 'MainContent_MeasuredK20',
+        'optical_acd': 'MainContent_OpticalACD0',
+        'lens_thickness': 'MainContent_LensThickness0',
+        'wtw': 'MainContent_WTW0',
+    },
+}
+RESULT_TABLE_IDS = {'R': 'MainContent_GridView1', 'L': 'MainContent_GridView2'}
+
+# Um par de olhos enviado em uma única submissão: (olho no lado direito, olho no lado esquerdo).
+EyePair = Tuple[Optional[int], Optional[int]]
+
+def schedule_eye_pairs(patients: Sequence[PatientData]) -> List[EyePair]:
+    """
+    Agrupa os olhos em pares para que cada submissão do formulário calcule dois olhos.
+
+    O formulário aceita um único modelo de LIO, então só olhos com o mesmo `iol_model`
+    são pareados. Olhos direitos vão preferencialmente para o lado direito e olhos
+    esquerdos para o lado esquerdo; as sobras de um mesmo lado são pareadas entre si,
+    já que a fórmula não depende do lado em que o olho é digitado.
+
+    Args:
+        patients (Sequence[PatientData]): Os olhos a serem calculados.
+
+    Returns:
+        List[EyePair]: Pares de índices em `patients` no formato (lado direito, lado esquerdo).
+                       Um dos índices é None quando sobra um olho sem par.
+    """
+    groups = {}
+    for index, patient in enumerate(patients):
+        right, left = groups.setdefault(patient.iol_model, ([], []))
+        (left if patient.eye_side == 'L' else right).append(index)
+
+    pairs: List[EyePair] = []
+    for right, left in groups.values():
+        n_matched = min(len(right), len(left))
+        pairs.extend(zip(right[:n_matched], left[:n_matched]))
+
+        leftovers = right[n_matched:] + left[n_matched:]
+        for i in range(0, len(leftovers) - 1, 2):
+            pairs.append((leftovers[i], leftovers[i + 1]))
+        if len(leftovers) % 2:
+            last = leftovers[-1]
+            pairs.append((None, last) if patients[last].eye_side == 'L' else (last, None))
+    return pairs
@@ -8,32 +8,11 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select, WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from dataclasses import dataclass
-from typing import List, Optional
-
-# --- Classes de Dados (Data Classes) ---
-@dataclass
-class PatientData:
-    """Representa os dados de entrada para um paciente."""
-    iol_model: str
-    eye_side: str
-    axial_length: float
-    meas_k1: float
-    meas_k2: float
-    optical_acd: float
-    patient_name: str = "Demo Patient"
-    lens_thickness: Optional[float] = None
-    wtw: Optional[float] = None
-
-@dataclass
-class CalculationResult:
-    """Representa uma única linha da tabela de resultados."""
-    iol_power: float
-    optic: str
-    refraction: float
-
-    def __str__(self):
-        return f"Power: {self.iol_power}, Optic: {self.optic}, Refraction: {self.refraction}"
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from barrett_form import (  # Reexportados: fazem parte da interface desta biblioteca
+    CalculationResult, EYE_FIELD_IDS, EyePair, PatientData, RESULT_TABLE_IDS, schedule_eye_pairs,
+)
 
 # --- Classe Principal de Automação ---
 class BarrettCalculatorScraper:
@@ -43,9 +22,19 @@ class BarrettCalculatorScraper:
     """
     BASE_URL = 'https://calc.apacrs.org/barrett_universal2105/'
 
-    def __init__(self, headless: bool = True):
+    def __init__(self, headless: bool = True, base_url: Optional[str] = None, timeout: float = 20):
+        """
+        Args:
+            headless (bool): Se True, executa o navegador sem janela.
+            base_url (Optional[str]): URL da calculadora. Usa `BASE_URL` se não for fornecida;
+                                      útil para apontar para o servidor local de `apacrs_stub_server.py`.
+            timeout (float): Tempo máximo de espera (s) pelos elementos da página.
+        """
         self._driver = None
         self._wait = None
+        self._form_submitted = False
+        self._base_url = base_url or self.BASE_URL
+        self._timeout = timeout
         
         service = Service(executable_path=chromedriver_binary.chromedriver_filename)
         options = Options()
@@ -67,15 +56,19 @@ class BarrettCalculatorScraper:
 
     def __enter__(self):
         self._driver = webdriver.Chrome(service=self._service, options=self._options)
-        self._wait = WebDriverWait(self._driver, 20) 
-        self._driver.get(self.BASE_URL)
-        self._reset_form()
+        self._wait = WebDriverWait(self._driver, self._timeout)
+        self._load_form()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self._driver:
             self._driver.quit()
 
+    def _load_form(self):
+        self._driver.get(self._base_url)
+        self._reset_form()
+        self._form_submitted = False
+
     def _reset_form(self):
         try:
             reset_button = self._wait.until(EC.presence_of_element_located((By.ID, 'MainContent_btnReset')))
@@ -84,29 +77,43 @@ class BarrettCalculatorScraper:
             print(f"Erro ao tentar resetar o formulário: {e}")
             raise
 
-    def _fill_form(self, patient: PatientData):
+    def _fill_header(self, patient: PatientData):
         self._driver.find_element(By.ID, 'MainContent_PatientName').send_keys(patient.patient_name)
         Select(self._driver.find_element(By.ID, 'MainContent_IOLModel')).select_by_value(patient.iol_model)
-        
-        if patient.eye_side == 'R':
-            self._driver.find_element(By.ID, 'MainContent_Axlength').send_keys(str(patient.axial_length))
-            self._driver.find_element(By.ID, 'MainContent_MeasuredK1').send_keys(str(patient.meas_k1))
-            self._driver.find_element(By.ID, 'MainContent_MeasuredK2').send_keys(str(patient.meas_k2))
-            self._driver.find_element(By.ID, 'MainContent_OpticalACD').send_keys(str(patient.optical_acd))
-            if patient.lens_thickness:
-                self._driver.find_element(By.ID, 'MainContent_LensThickness').send_keys(str(patient.lens_thickness))
-            if patient.wtw:
-                self._driver.find_element(By.ID, 'MainContent_WTW').send_keys(str(patient.wtw))
+
+    def _fill_eye(self, patient: PatientData, side: str):
+        """Preenche a biometria de `patient` nos campos do lado `side` ('R' ou 'L')."""
+        field_ids = EYE_FIELD_IDS[side]
+        self._driver.find_element(By.ID, field_ids['axial_length']).send_keys(str(patient.axial_length))
+        self._driver.find_element(By.ID, field_ids['meas_k1']).send_keys(str(patient.meas_k1))
+        self._driver.find_element(By.ID, field_ids['meas_k2']).send_keys(str(patient.meas_k2))
+        self._driver.find_element(By.ID, field_ids['optical_acd']).send_keys(str(patient.optical_acd))
+        if patient.lens_thickness:
+            self._driver.find_element(By.ID, field_ids['lens_thickness']).send_keys(str(patient.lens_thickness))
+        if patient.wtw:
+            self._driver.find_element(By.ID, field_ids['wtw']).send_keys(str(patient.wtw))
+
+    def _fill_form(self, patient: PatientData):
+        self._fill_header(patient)
+        self._fill_eye(patient, patient.eye_side)
+
+    def _fill_pair_form(self, right: Optional[PatientData], left: Optional[PatientData]):
+        self._fill_header(right if right is not None else left)
+        if right is not None:
+            self._fill_eye(right, 'R')
+        if left is not None:
+            self._fill_eye(left, 'L')
 
     def _calculate(self):
         self._driver.find_element(By.ID, 'MainContent_Button1').click()
+        self._form_submitted = True
 
     def _open_results_tab(self):
         results_tab = self._wait.until(EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'Universal Formula')]")))
         results_tab.click()
 
     def _scrape_results(self, eye_side: str) -> List[CalculationResult]:
-        table_id = 'MainContent_GridView1' if eye_side == 'R' else 'MainContent_GridView2'
+        table_id = RESULT_TABLE_IDS['L' if eye_side == 'L' else 'R']
         try:
             table = self._wait.until(EC.presence_of_element_located((By.ID, table_id)))
             rows = table.find_elements(By.TAG_NAME, 'tr')[1:]
@@ -126,9 +133,64 @@ class BarrettCalculatorScraper:
             print(f"Não foi possível extrair os resultados da tabela com ID '{table_id}'. Erro: {e}")
             return []
 
+    def _submit(self, fill: Callable[[], None]):
+        """Preenche o formulário com `fill` e o envia, recarregando-o antes se já foi usado."""
+        if self._form_submitted:
+            self._load_form()
+        # A partir daqui o formulário pode ficar preenchido pela metade (falha em `fill` ou no
+        # envio); marcá-lo como usado faz a próxima chamada recarregá-lo em vez de digitar
+        # por cima dos valores antigos.
+        self._form_submitted = True
+        fill()
+        self._calculate()
+
     def run_calculation(self, patient: PatientData) -> List[CalculationResult]:
         """Executa o fluxo completo e retorna os resultados."""
-        self._fill_form(patient)
-        self._calculate()
+        self._submit(lambda: self._fill_form(patient))
+        self._open_results_tab()
+        return self._scrape_results(patient.eye_side)
+
+    def run_pair_calculation(
+        self, right: Optional[PatientData], left: Optional[PatientData]
+    ) -> Tuple[List[CalculationResult], List[CalculationResult]]:
+        """
+        Calcula dois olhos em uma única submissão do formulário.
+
+        Args:
+            right (Optional[PatientData]): O olho digitado no lado direito do formulário.
+            left (Optional[PatientData]): O olho digitado no lado esquerdo do formulário.
+                                          Ambos precisam usar o mesmo modelo de LIO.
+
+        Returns:
+            Tuple[List[CalculationResult], List[CalculationResult]]: Os resultados do lado
+            direito e do lado esquerdo. Um lado vazio retorna uma lista vazia.
+        """
+        if right is None and left is None:
+            return [], []
+        if right is not None and left is not None and right.iol_model != left.iol_model:
+            raise ValueError("Both eyes of a pair must use the same 'iol_model'.")
+
+        self._submit(lambda: self._fill_pair_form(right, left))
         self._open_results_tab()
-        return self._scrape_results(patient.eye_side)
\ No newline at end of file
+        right_results = self._scrape_results('R') if right is not None else []
+        left_results = self._scrape_results('L') if left is not None else []
+        return right_results, left_results
+
+    def run_batch(self, patients: Sequence[PatientData]) -> List[List[CalculationResult]]:
+        """
+        Calcula vários olhos pareando-os com `schedule_eye_pairs`, o que reduz o número
+        de submissões do formulário aproximadamente pela metade.
+
+        Returns:
+            List[List[CalculationResult]]: Os resultados na mesma ordem de `patients`.
+        """
+        results: List[List[CalculationResult]] = [[] for _ in patients]
+        for right_index, left_index in schedule_eye_pairs(patients):
+            right = patients[right_index] if right_index is not None else None
+            left = patients[left_index] if left_index is not None else None
+            right_results, left_results = self.run_pair_calculation(right, left)
+            if right_index is not None:
+                results[right_index] = right_results
+            if left_index is not None:
+                results[left_index] = left_results
+        return results
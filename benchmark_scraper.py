@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: benchmark_scraper.py
+
+"""
+Mede a vazão (pacientes/segundo) e a latência de cauda das consultas Barrett
+contra o servidor local de `apacrs_stub_server.py`, para qualquer backend de
+scraper e nível de concorrência.
+
+Um backend é qualquer fábrica que retorne um gerenciador de contexto com os
+métodos `run_calculation(patient)` e `run_pair_calculation(right, left)`,
+como `BarrettCalculatorScraper`.
+"""
+
+import argparse
+import queue
+import threading
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+import numpy as np
+
+from apacrs_stub_server import ApacrsStubServer, StubConfig
+from barrett_form import CalculationResult, PatientData, EYE_FIELD_IDS, RESULT_TABLE_IDS, schedule_eye_pairs
+from iol_formulas import (
+    IOL, SHORT_EYE_AL, SHORT_EYE_K1, SHORT_EYE_K2, SHORT_EYE_ACD,
+    LONG_EYE_AL, LONG_EYE_K1, LONG_EYE_K2, LONG_EYE_ACD,
+)
+
+# --- Configurações ---
+DEFAULT_PATIENTS = 40
+DEFAULT_CONCURRENCY = [1, 2, 4]
+
+
+# --- Backend HTTP (sem navegador) ---
+class _ResultTableParser(HTMLParser):
+    """Extrai as linhas das tabelas GridView de uma página de resultados."""
+
+    def __init__(self):
+        super().__init__()
+        self.tables: Dict[str, List[List[str]]] = {}
+        self._table_id = None
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'table':
+            self._table_id = dict(attrs).get('id')
+            self.tables[self._table_id] = []
+        elif tag == 'tr' and self._table_id is not None:
+            self._row = []
+        elif tag == 'td' and self._row is not None:
+            self._cell = ''
+
+    def handle_endtag(self, tag):
+        if tag == 'table':
+            self._table_id = None
+        elif tag == 'tr' and self._row is not None:
+            self.tables[self._table_id].append(self._row)
+            self._row = None
+        elif tag == 'td' and self._cell is not None:
+            self._row.append(self._cell.strip())
+            self._cell = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell += data
+
+
+class HttpFormBackend:
+    """
+    Backend que envia o formulário diretamente por HTTP, sem navegador.
+    Serve para medir o servidor local e o próprio harness; só funciona com o stub.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 20):
+        self._base_url = base_url
+        self._timeout = timeout
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def _submit(self, fields: Dict[str, str]) -> Dict[str, List[List[str]]]:
+        data = urlencode(fields).encode('utf-8')
+        try:
+            with urlopen(self._base_url, data=data, timeout=self._timeout) as response:
+                page = response.read().decode('utf-8')
+        except HTTPError as e:
+            raise RuntimeError(f"HTTP {e.code} ao enviar o formulário") from e
+        parser = _ResultTableParser()
+        parser.feed(page)
+        return parser.tables
+
+    @staticmethod
+    def _eye_fields(patient: PatientData, side: str) -> Dict[str, str]:
+        fields = {}
+        for name, field_id in EYE_FIELD_IDS[side].items():
+            value = getattr(patient, name)
+            if value:
+                fields[field_id] = str(value)
+        return fields
+
+    @staticmethod
+    def _to_results(rows: List[List[str]]) -> List[CalculationResult]:
+        return [
+            CalculationResult(iol_power=float(c[0]), optic=c[1], refraction=float(c[2]))
+            for c in rows if len(c) == 3
+        ]
+
+    def run_pair_calculation(
+        self, right: Optional[PatientData], left: Optional[PatientData]
+    ) -> Tuple[List[CalculationResult], List[CalculationResult]]:
+        header = right if right is not None else left
+        fields = {'MainContent_PatientName': header.patient_name, 'MainContent_IOLModel': header.iol_model}
+        if right is not None:
+            fields.update(self._eye_fields(right, 'R'))
+        if left is not None:
+            fields.update(self._eye_fields(left, 'L'))
+        tables = self._submit(fields)
+        right_results = self._to_results(tables.get(RESULT_TABLE_IDS['R'], [])) if right is not None else []
+        left_results = self._to_results(tables.get(RESULT_TABLE_IDS['L'], [])) if left is not None else []
+        return right_results, left_results
+
+    def run_calculation(self, patient: PatientData) -> List[CalculationResult]:
+        if patient.eye_side == 'L':
+            return self.run_pair_calculation(None, patient)[1]
+        return self.run_pair_calculation(patient, None)[0]
+
+
+def _selenium_backend(url: str):
+    from barrett_scraper_lib import BarrettCalculatorScraper  # O Selenium só é necessário neste backend
+    return BarrettCalculatorScraper(headless=True, base_url=url, timeout=5)
+
+
+BACKENDS: Dict[str, Callable[[str], object]] = {
+    'http': lambda url: HttpFormBackend(url),
+    'selenium': _selenium_backend,
+}
+
+
+# --- Harness ---
+@dataclass
+class BenchmarkResult:
+    """Resultado de uma execução do benchmark."""
+    backend: str
+    concurrency: int
+    paired: bool
+    n_patients: int
+    n_submissions: int                 # Submissões tentadas (com sucesso ou falha)
+    n_failures: int
+    wall_time: float
+    n_backend_errors: int = 0          # Workers cujo backend não pôde ser iniciado
+    latencies: List[float] = field(default_factory=list)  # Uma por submissão, em segundos.
+
+    @property
+    def patients_per_second(self) -> float:
+        return self.n_patients / self.wall_time if self.wall_time > 0 else float('nan')
+
+    def latency_percentile(self, q: float) -> float:
+        return float(np.percentile(self.latencies, q)) if self.latencies else float('nan')
+
+    def summary(self) -> str:
+        return (
+            f"{self.backend:<9} conc={self.concurrency:<3} pares={'sim' if self.paired else 'não':<4} "
+            f"pacientes={self.n_patients:<5} submissões={self.n_submissions:<5} falhas={self.n_failures:<4} "
+            f"erros de backend={self.n_backend_errors:<3} "
+            f"{self.patients_per_second:8.2f} pac/s  "
+            f"p50={self.latency_percentile(50) * 1000:7.1f} ms  "
+            f"p95={self.latency_percentile(95) * 1000:7.1f} ms  "
+            f"p99={self.latency_percentile(99) * 1000:7.1f} ms"
+        )
+
+
+def make_benchmark_patients(n_patients: int) -> List[PatientData]:
+    """Gera olhos alternando os lados, com biometria variando linearmente como em `setup_dataframe`."""
+    axial_lengths = np.linspace(SHORT_EYE_AL, LONG_EYE_AL, n_patients)
+    k1_values = np.linspace(SHORT_EYE_K1, LONG_EYE_K1, n_patients)
+    k2_values = np.linspace(SHORT_EYE_K2, LONG_EYE_K2, n_patients)
+    acd_values = np.linspace(SHORT_EYE_ACD, LONG_EYE_ACD, n_patients)
+    return [
+        PatientData(
+            iol_model=IOL,
+            eye_side='R' if i % 2 == 0 else 'L',
+            axial_length=round(float(axial_lengths[i]), 2),
+            meas_k1=round(float(k1_values[i]), 2),
+            meas_k2=round(float(k2_values[i]), 2),
+            optical_acd=round(float(acd_values[i]), 2),
+        )
+        for i in range(n_patients)
+    ]
+
+
+def run_benchmark(
+    backend_factory: Callable[[], object],
+    patients: Sequence[PatientData],
+    concurrency: int = 1,
+    paired: bool = True,
+    backend_name: str = '',
+) -> BenchmarkResult:
+    """
+    Processa `patients` com `concurrency` workers, cada um com sua própria instância do backend.
+
+    Args:
+        backend_factory (Callable[[], object]): Cria uma instância nova do backend.
+        patients (Sequence[PatientData]): Os olhos a serem consultados.
+        concurrency (int): Número de workers simultâneos.
+        paired (bool): Se True, envia dois olhos por submissão (`schedule_eye_pairs`).
+        backend_name (str): Nome usado no resumo.
+
+    Returns:
+        BenchmarkResult: Vazão, latências por submissão e falhas.
+    """
+    if paired:
+        work = schedule_eye_pairs(patients)
+    else:
+        work = [(None, i) if p.eye_side == 'L' else (i, None) for i, p in enumerate(patients)]
+
+    work_queue: 'queue.Queue[Tuple[Optional[int], Optional[int]]]' = queue.Queue()
+    for item in work:
+        work_queue.put(item)
+
+    latencies: List[float] = []
+    counters = {'patients': 0, 'submissions': 0, 'failures': 0, 'backend_errors': 0}
+    lock = threading.Lock()
+
+    def worker():
+        with ExitStack() as stack:
+            # Um backend que não inicia não consome trabalho: os demais workers processam a fila
+            try:
+                backend = stack.enter_context(backend_factory())
+            except Exception as e:
+                print(f"Erro ao iniciar o backend '{backend_name}': {e}")
+                with lock:
+                    counters['backend_errors'] += 1
+                return
+            while True:
+                try:
+                    right_index, left_index = work_queue.get_nowait()
+                except queue.Empty:
+                    return
+                right = patients[right_index] if right_index is not None else None
+                left = patients[left_index] if left_index is not None else None
+                start = time.perf_counter()
+                try:
+                    backend.run_pair_calculation(right, left)
+                    ok = True
+                except Exception:
+                    ok = False
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    counters['submissions'] += 1
+                    if ok:
+                        counters['patients'] += (right is not None) + (left is not None)
+                    else:
+                        counters['failures'] += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_time = time.perf_counter() - start
+
+    return BenchmarkResult(
+        backend=backend_name,
+        concurrency=concurrency,
+        paired=paired,
+        n_patients=counters['patients'],
+        n_submissions=counters['submissions'],
+        n_failures=counters['failures'],
+        wall_time=wall_time,
+        n_backend_errors=counters['backend_errors'],
+        latencies=latencies,
+    )
+
+
+def main():
+    """Sobe o servidor local e mede os backends escolhidos nos níveis de concorrência pedidos."""
+    parser = argparse.ArgumentParser(description="Benchmark de vazão do scraper Barrett contra o servidor local.")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), nargs='+', default=['http'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--patients', type=int, default=DEFAULT_PATIENTS)
+    parser.add_argument('--latency', type=float, default=0.2, help="Atraso fixo por submissão (s).")
+    parser.add_argument('--jitter', type=float, default=0.1, help="Atraso aleatório adicional máximo (s).")
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--unpaired', action='store_true', help="Envia um olho por submissão.")
+    args = parser.parse_args()
+
+    patients = make_benchmark_patients(args.patients)
+    config = StubConfig(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate, seed=args.seed)
+
+    with ApacrsStubServer(config) as server:
+        print(f"Servidor local em {server.url}")
+        for backend_name in args.backend:
+            for concurrency in args.concurrency:
+                result = run_benchmark(
+                    lambda: BACKENDS[backend_name](server.url),
+                    patients,
+                    concurrency=concurrency,
+                    paired=not args.unpaired,
+                    backend_name=backend_name,
+                )
+                print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
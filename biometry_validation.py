@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: biometry_validation.py
+
+"""
+Validação vetorizada da biometria antes do cálculo das fórmulas.
+
+Verifica todas as colunas de entrada de uma vez contra faixas fisiológicas e contra
+o domínio de cada fórmula (K zero, altura sagital indefinida em Holladay 1 e SRK/T,
+denominadores nulos, AL fora da faixa efetiva de Hoffer Q etc.). O resultado é um
+código de motivo por olho e por fórmula, do qual saem as máscaras de validade; o
+pipeline só chama uma fórmula onde ela é válida, sem tratamento de exceção por linha.
+"""
+
+import enum
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from iol_formulas import CONSTANTS
+from iol_formulas_vectorized import FORMULA_NAMES, VectorizedIOLFormulas
+from ray_tracing_formulas import ThickLensEyeModel
+
+BARRETT_COLUMN = 'barrett_universal_ii'
+RAY_TRACING_COLUMN = 'ray_tracing'
+
+# Faixas fisiológicas aceitas para cada coluna de entrada (mínimo, máximo).
+PHYSIOLOGIC_RANGES = {
+    'axial_length': (14.0, 40.0),
+    'meas_k1': (30.0, 60.0),
+    'meas_k2': (30.0, 60.0),
+    'optical_acd': (1.5, 6.0),
+    'lens_thickness': (2.0, 7.0),
+    'wtw': (9.0, 15.0),
+}
+
+# Colunas de entrada usadas por cada coluna de saída.
+FORMULA_INPUTS = {name: ('axial_length', 'meas_k1', 'meas_k2') for name in FORMULA_NAMES}
+FORMULA_INPUTS[RAY_TRACING_COLUMN] = ('axial_length', 'meas_k1', 'meas_k2', 'optical_acd', 'lens_thickness')
+FORMULA_INPUTS[BARRETT_COLUMN] = ('axial_length', 'meas_k1', 'meas_k2', 'optical_acd')
+OPTIONAL_INPUTS = {BARRETT_COLUMN: ('lens_thickness', 'wtw')}
+
+# Limites do AL efetivo da fórmula de Hoffer Q (o AL é limitado a esta faixa).
+HOFFER_Q_AL_RANGE = (18.5, 31.0)
+
+
+class Reason(enum.IntFlag):
+    """Motivos pelos quais um olho está fora do domínio de uma fórmula (combináveis)."""
+    OK = 0
+    MISSING_INPUT = 1           # Valor de entrada ausente (NaN)
+    OUT_OF_RANGE = 2            # Valor de entrada fora de PHYSIOLOGIC_RANGES
+    ZERO_KERATOMETRY = 4        # K médio igual a zero
+    HOLLADAY_1_SAGITTAL = 8     # Holladay 1: R² - AG²/4 < 0 (aACD indefinida)
+    SRK_T_CORNEAL_HEIGHT = 16   # SRK/T: R² - Cw²/4 < 0 (altura da córnea indefinida)
+    ZERO_DENOMINATOR = 32       # Denominador nulo na fórmula de potência
+    HOFFER_Q_AL_CLAMPED = 64    # Hoffer Q: AL fora de HOFFER_Q_AL_RANGE (é limitado à faixa)
+    INVALID_GEOMETRY = 128      # Traçado de raios: LIO sobreposta à córnea ou além da retina
+
+
+# Motivos apenas informativos: a fórmula continua definida e é calculada.
+ADVISORY_REASONS = Reason.HOFFER_Q_AL_CLAMPED
+
+
+def reason_names(code: int) -> List[str]:
+    """Lista os nomes dos motivos contidos em um código."""
+    return [reason.name for reason in Reason if reason and code & reason]
+
+
+@dataclass
+class ValidationResult:
+    """Códigos de motivo por coluna de saída, um por olho (0 = sem restrições)."""
+    reasons: Dict[str, np.ndarray]
+
+    def valid(self, column: str) -> np.ndarray:
+        """Máscara dos olhos em que a coluna pode ser calculada."""
+        return (self.reasons[column] & ~int(ADVISORY_REASONS)) == 0
+
+    def summary(self) -> pd.DataFrame:
+        """Contagem de olhos por coluna e por motivo."""
+        counts = {
+            column: {reason.name: int(np.count_nonzero(codes & reason)) for reason in Reason if reason}
+            for column, codes in self.reasons.items()
+        }
+        return pd.DataFrame(counts).T
+
+
+def _input_reasons(df: pd.DataFrame, columns) -> np.ndarray:
+    codes = np.zeros(len(df), dtype=np.int64)
+    for column in columns:
+        if column not in df.columns:
+            codes |= int(Reason.MISSING_INPUT)
+            continue
+        values = df[column].to_numpy(dtype=float)
+        low, high = PHYSIOLOGIC_RANGES[column]
+        codes |= np.where(np.isnan(values), int(Reason.MISSING_INPUT), 0)
+        with np.errstate(invalid='ignore'):
+            codes |= np.where((values < low) | (values > high), int(Reason.OUT_OF_RANGE), 0)
+    return codes
+
+
+def _flag(condition: np.ndarray, reason: Reason) -> np.ndarray:
+    return np.where(condition, int(reason), 0)
+
+
+def _zero_denominator(denominators) -> np.ndarray:
+    zero = False
+    for denominator in denominators:
+        zero = zero | (np.asarray(denominator) == 0)
+    return _flag(zero, Reason.ZERO_DENOMINATOR)
+
+
+def validate_biometry(
+    df: pd.DataFrame,
+    a_constant: float,
+    fixed_elp: float,
+    haigis_acd: float,
+    corneal_index: float = CONSTANTS["biometry"]["corneal_index"],
+    ray_tracing_model: ThickLensEyeModel = ThickLensEyeModel(),
+) -> ValidationResult:
+    """
+    Valida todos os olhos de `df` para cada fórmula, com as mesmas constantes do pipeline.
+
+    Args:
+        df (pd.DataFrame): Entradas no formato de `setup_dataframe`.
+        a_constant (float): Constante A usada pelas fórmulas.
+        fixed_elp (float): ELP fixo da fórmula de Colenbrander.
+        haigis_acd (float): ACD usada pela fórmula de Haigis.
+        corneal_index (float): Índice usado para converter K em raio.
+        ray_tracing_model (ThickLensEyeModel): Olho esquemático do traçado de raios.
+
+    Returns:
+        ValidationResult: Códigos de `Reason` por coluna de saída.
+    """
+    calculator = VectorizedIOLFormulas()
+    al = df['axial_length'].to_numpy(dtype=float)
+    k = (df['meas_k1'].to_numpy(dtype=float) + df['meas_k2'].to_numpy(dtype=float)) / 2
+
+    reasons = {}
+    for column, inputs in FORMULA_INPUTS.items():
+        optional = [c for c in OPTIONAL_INPUTS.get(column, ()) if c in df.columns]
+        codes = _input_reasons(df, inputs)
+        if optional:
+            # Entradas opcionais só invalidam quando presentes e fora da faixa.
+            codes |= _input_reasons(df, optional) & int(Reason.OUT_OF_RANGE)
+        reasons[column] = codes
+
+    # Os termos de domínio vêm dos mesmos métodos usados pelas fórmulas vetorizadas.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zero_k = _flag(k == 0, Reason.ZERO_KERATOMETRY)
+        for column in (*FORMULA_NAMES, RAY_TRACING_COLUMN):
+            reasons[column] |= zero_k
+        # A calculadora Barrett não aceita K zero.
+        reasons[BARRETT_COLUMN] |= zero_k
+        r = (corneal_index - 1) * 1000 / k
+
+        # Colenbrander e Hoffer: denominadores de vergência
+        reasons['colenbrander'] |= _zero_denominator(calculator._vergence_denominators(al, k, fixed_elp))
+        hoffer_elp = calculator._hoffer_elp(al, a_constant=a_constant)
+        reasons['hoffer'] |= _zero_denominator(calculator._vergence_denominators(al, k, hoffer_elp))
+
+        # Holladay 1: altura sagital e denominador
+        reasons['holladay_1'] |= _flag(calculator._holladay_1_sagittal_term(al, r) < 0, Reason.HOLLADAY_1_SAGITTAL)
+        holladay_elp = calculator._holladay_1_elp(al, radius_of_curvature=r, a_constant=a_constant)
+        reasons['holladay_1'] |= _zero_denominator((calculator._holladay_1_denominator(al, holladay_elp, r),))
+
+        # Hoffer Q: AL limitado à faixa efetiva e denominadores
+        low, high = HOFFER_Q_AL_RANGE
+        reasons['hoffer_q'] |= _flag((al < low) | (al > high), Reason.HOFFER_Q_AL_CLAMPED)
+        hoffer_q_elp = calculator._hoffer_q_elp(al, k, a_constant=a_constant)
+        reasons['hoffer_q'] |= _zero_denominator(calculator._hoffer_q_denominators(al, k, hoffer_q_elp))
+
+        # SRK/T: altura da córnea e denominadores
+        reasons['srk_t'] |= _flag(calculator._srk_t_corneal_height_term(al, k) < 0, Reason.SRK_T_CORNEAL_HEIGHT)
+        srk_t_elp = calculator._srk_t_elp(al, k, a_constant=a_constant)
+        reasons['srk_t'] |= _zero_denominator(calculator._srk_t_denominators(al, k, srk_t_elp))
+
+        # Haigis: denominadores
+        haigis_elp = calculator._haigis_elp(al, acd=haigis_acd, a_constant=a_constant)
+        reasons['haigis'] |= _zero_denominator(calculator._haigis_denominators(al, r, haigis_elp))
+
+    # Traçado de raios: a LIO precisa caber entre a córnea e a retina
+    geometry = ray_tracing_model.valid_geometry(
+        al, df['optical_acd'].to_numpy(dtype=float), df['lens_thickness'].to_numpy(dtype=float)
+    )
+    present = (reasons[RAY_TRACING_COLUMN] & int(Reason.MISSING_INPUT)) == 0
+    reasons[RAY_TRACING_COLUMN] |= _flag(present & ~geometry, Reason.INVALID_GEOMETRY)
+
+    return ValidationResult(reasons)
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: distributed_sweep.py
+
+"""
+Execução distribuída da varredura por meio de uma fila de shards em diretório compartilhado.
+
+O coordenador divide o DataFrame de `setup_dataframe` em shards e grava, para cada um,
+a entrada (CSV) e um descritor em `pending/`. Qualquer número de workers, nesta ou em
+outras máquinas que montem o mesmo diretório, reivindica shards com `os.rename` (atômico:
+só um worker consegue mover cada descritor), calcula com `run_unified_calculation` e
+publica o resultado em `done/` (gravação em arquivo temporário + rename). O passo de merge
+junta os resultados no CSV final.
+
+Enquanto calcula, o worker renova periodicamente o mtime do descritor reivindicado
+(heartbeat). Descritores cujo mtime passou de `lease_timeout` são devolvidos a `pending/`
+por qualquer worker, de modo que shards de workers mortos são recalculados. Os tempos são
+comparados com o relógio do próprio sistema de arquivos, não com o da máquina local.
+
+Estrutura do diretório:
+    manifest.json | inputs/<shard>.csv | pending/<shard>.json |
+    claimed/<shard>@<worker>.json | done/<shard>.csv | failed/<shard>.json
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from run_all_calculations import OUTPUT_CSV, RESULT_DECIMALS, run_unified_calculation, setup_dataframe
+
+# --- Configurações ---
+QUEUE_DIR = 'fila_varredura'
+SHARD_ROWS = 1000
+LEASE_TIMEOUT = 300.0   # s sem heartbeat até que o shard seja devolvido à fila
+POLL_INTERVAL = 5.0     # s entre buscas quando só há shards reivindicados por outros
+MANIFEST = 'manifest.json'
+SUBDIRS = ('inputs', 'pending', 'claimed', 'done', 'failed')
+
+
+def _path(queue_dir: str, *parts: str) -> str:
+    return os.path.join(queue_dir, *parts)
+
+
+def _write_atomic(path: str, write: Callable[[str], None]):
+    """Grava em um arquivo temporário único e renomeia; leitores nunca veem arquivos parciais."""
+    tmp_path = f'{path}.{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_json(path: str, payload: Dict):
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+    _write_atomic(path, write)
+
+
+def _shard_id(path: str) -> str:
+    return os.path.basename(path).split('@')[0].split('.')[0]
+
+
+def filesystem_now(queue_dir: str) -> float:
+    """Hora atual segundo o sistema de arquivos compartilhado (imune a relógios locais defasados)."""
+    clock = _path(queue_dir, '.clock')
+    with open(clock, 'a'):
+        os.utime(clock)
+    return os.stat(clock).st_mtime
+
+
+def create_sweep(queue_dir: str, df: pd.DataFrame, shard_rows: int = SHARD_ROWS) -> int:
+    """
+    Prepara a fila: grava a entrada de cada shard e os descritores pendentes.
+
+    Args:
+        queue_dir (str): Diretório compartilhado da fila (não pode conter outra varredura).
+        df (pd.DataFrame): O DataFrame de `setup_dataframe`.
+        shard_rows (int): Número de linhas por shard.
+
+    Returns:
+        int: Número de shards criados.
+    """
+    if shard_rows < 1:
+        raise ValueError("shard_rows must be positive.")
+    if os.path.exists(_path(queue_dir, MANIFEST)):
+        raise ValueError(f"'{queue_dir}' already contains a sweep.")
+    for subdir in SUBDIRS:
+        os.makedirs(_path(queue_dir, subdir), exist_ok=True)
+
+    df = df.reset_index(drop=True)
+    shard_ids = []
+    for number, start in enumerate(range(0, len(df), shard_rows)):
+        shard_id = f'shard_{number:06d}'
+        input_path = _path('inputs', f'{shard_id}.csv')
+        _write_atomic(_path(queue_dir, input_path),
+                      lambda tmp: df.iloc[start:start + shard_rows].to_csv(tmp, index=False, encoding='utf-8'))
+        _write_json(_path(queue_dir, 'pending', f'{shard_id}.json'),
+                    {'shard_id': shard_id, 'input': input_path, 'rows': [start, min(start + shard_rows, len(df))]})
+        shard_ids.append(shard_id)
+
+    # O manifesto é gravado por último: sua presença indica que a fila está completa.
+    _write_json(_path(queue_dir, MANIFEST),
+                {'shards': shard_ids, 'rows': len(df), 'columns': list(df.columns)})
+    return len(shard_ids)
+
+
+def load_manifest(queue_dir: str) -> Dict:
+    with open(_path(queue_dir, MANIFEST), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def reclaim_expired(queue_dir: str, lease_timeout: float = LEASE_TIMEOUT) -> List[str]:
+    """Devolve a `pending/` os shards cujo heartbeat expirou. Retorna os shards devolvidos."""
+    now = filesystem_now(queue_dir)
+    reclaimed = []
+    for path in glob.glob(_path(queue_dir, 'claimed', '*.json')):
+        try:
+            expired = now - os.stat(path).st_mtime > lease_timeout
+            if expired:
+                os.rename(path, _path(queue_dir, 'pending', f'{_shard_id(path)}.json'))
+                reclaimed.append(_shard_id(path))
+        except FileNotFoundError:
+            continue  # Concluído ou devolvido por outro processo nesse meio tempo
+    return reclaimed
+
+
+def claim_shard(queue_dir: str, worker_id: str) -> Optional[str]:
+    """
+    Reivindica o próximo shard pendente movendo o descritor para `claimed/`.
+
+    Returns:
+        Optional[str]: O caminho do descritor reivindicado, ou None se não houver pendentes.
+    """
+    for path in sorted(glob.glob(_path(queue_dir, 'pending', '*.json'))):
+        claimed = _path(queue_dir, 'claimed', f'{_shard_id(path)}@{worker_id}.json')
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            continue  # Outro worker reivindicou primeiro
+        # A reivindicação inicia o lease, mesmo que o descritor seja antigo.
+        os.utime(claimed)
+        return claimed
+    return None
+
+
+class _Heartbeat(threading.Thread):
+    """Renova o lease de um shard até ser interrompida; sinaliza se o lease foi perdido."""
+
+    def __init__(self, path: str, interval: float):
+        super().__init__(daemon=True)
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.lost = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                self.lost.set()
+                return
+
+
+def process_shard(
+    queue_dir: str,
+    claimed: str,
+    compute: Callable[[pd.DataFrame], pd.DataFrame] = run_unified_calculation,
+    lease_timeout: float = LEASE_TIMEOUT,
+) -> bool:
+    """
+    Calcula um shard reivindicado e publica o resultado em `done/`.
+
+    Returns:
+        bool: True se o shard foi concluído; False se falhou (descritor movido para `failed/`).
+    """
+    with open(claimed, encoding='utf-8') as f:
+        descriptor = json.load(f)
+    shard_id = descriptor['shard_id']
+    output = _path(queue_dir, 'done', f'{shard_id}.csv')
+
+    heartbeat = _Heartbeat(claimed, lease_timeout / 3)
+    heartbeat.start()
+    try:
+        # Um shard devolvido por lease expirado pode já ter sido concluído pelo dono original.
+        if not os.path.exists(output):
+            # Leitura exata dos floats gravados pelo coordenador (mesmos resultados de uma execução única).
+            df = compute(pd.read_csv(_path(queue_dir, descriptor['input']), float_precision='round_trip'))
+            _write_atomic(output, lambda tmp: df.round(RESULT_DECIMALS).to_csv(tmp, index=False, encoding='utf-8'))
+    except Exception as e:
+        descriptor['error'] = f'{type(e).__name__}: {e}'
+        descriptor['traceback'] = traceback.format_exc()
+        _write_json(_path(queue_dir, 'failed', f'{shard_id}.json'), descriptor)
+        print(f"Erro no shard {shard_id}: {e}")
+        return False
+    finally:
+        heartbeat.stopped.set()
+        heartbeat.join()
+        try:
+            os.remove(claimed)
+        except FileNotFoundError:
+            pass  # O lease expirou e o descritor foi devolvido; o resultado publicado é o mesmo.
+        if heartbeat.lost.is_set():
+            print(f"Aviso: o lease do shard {shard_id} expirou durante o cálculo.")
+    return True
+
+
+def run_worker(
+    queue_dir: str,
+    worker_id: Optional[str] = None,
+    compute: Callable[[pd.DataFrame], pd.DataFrame] = run_unified_calculation,
+    lease_timeout: float = LEASE_TIMEOUT,
+    poll_interval: float = POLL_INTERVAL,
+) -> int:
+    """
+    Processa shards até a fila esvaziar (nenhum shard pendente nem reivindicado).
+
+    Returns:
+        int: Número de shards concluídos por este worker.
+    """
+    worker_id = (worker_id or f'{socket.gethostname()}-{os.getpid()}').replace('@', '_').replace(os.sep, '_')
+    load_manifest(queue_dir)  # Falha cedo se a fila não estiver pronta
+    completed = 0
+    while True:
+        reclaim_expired(queue_dir, lease_timeout)
+        claimed = claim_shard(queue_dir, worker_id)
+        if claimed is None:
+            if not glob.glob(_path(queue_dir, 'claimed', '*.json')):
+                return completed
+            # Outros workers ainda calculam; espera para o caso de algum lease expirar.
+            time.sleep(poll_interval)
+            continue
+        print(f"[{worker_id}] Calculando {_shard_id(claimed)}...")
+        if process_shard(queue_dir, claimed, compute, lease_timeout):
+            completed += 1
+
+
+def sweep_status(queue_dir: str) -> Dict[str, int]:
+    """Número de shards em cada estado."""
+    manifest = load_manifest(queue_dir)
+    status = {state: len(glob.glob(_path(queue_dir, state, f'*.{ext}')))
+              for state, ext in (('pending', 'json'), ('claimed', 'json'), ('done', 'csv'), ('failed', 'json'))}
+    status['total'] = len(manifest['shards'])
+    return status
+
+
+def merge_results(queue_dir: str, output_csv: str = OUTPUT_CSV) -> pd.DataFrame:
+    """
+    Junta os resultados de todos os shards, na ordem original, e grava `output_csv`.
+    Falha se algum shard ainda não tiver resultado.
+    """
+    manifest = load_manifest(queue_dir)
+    missing = [shard for shard in manifest['shards'] if not os.path.exists(_path(queue_dir, 'done', f'{shard}.csv'))]
+    if missing:
+        raise ValueError(f"{len(missing)} shard(s) have no result yet (first: {missing[0]}).")
+
+    df = pd.concat([pd.read_csv(_path(queue_dir, 'done', f'{shard}.csv')) for shard in manifest['shards']],
+                   ignore_index=True)
+    if len(df) != manifest['rows']:
+        raise ValueError(f"Merged {len(df)} rows, expected {manifest['rows']}.")
+    df.to_csv(output_csv, index=False, encoding='utf-8')
+    return df
+
+
+def run_local(
+    queue_dir: str,
+    n_workers: int,
+    lease_timeout: float = LEASE_TIMEOUT,
+    poll_interval: float = POLL_INTERVAL,
+) -> List[int]:
+    """Executa `n_workers` processos worker nesta máquina e espera todos terminarem."""
+    processes = [
+        multiprocessing.Process(
+            target=run_worker, args=(queue_dir, f'{socket.gethostname()}-local{i}'),
+            kwargs={'lease_timeout': lease_timeout, 'poll_interval': poll_interval},
+        )
+        for i in range(n_workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return [process.exitcode for process in processes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Varredura distribuída por fila de shards em diretório compartilhado.")
+    parser.add_argument('--queue', default=QUEUE_DIR, help="Diretório compartilhado da fila.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    coordinate = subparsers.add_parser('coordinate', help="Cria a fila a partir de setup_dataframe.")
+    coordinate.add_argument('--shard-rows', type=int, default=SHARD_ROWS)
+    coordinate.add_argument('--test-mode', action='store_true', help="Usa o modo de teste de setup_dataframe.")
+
+    work = subparsers.add_parser('work', help="Processa shards até a fila esvaziar.")
+    work.add_argument('--worker-id', default=None)
+    work.add_argument('--lease-timeout', type=float, default=LEASE_TIMEOUT)
+    work.add_argument('--poll-interval', type=float, default=POLL_INTERVAL)
+
+    merge = subparsers.add_parser('merge', help="Junta os resultados no CSV final.")
+    merge.add_argument('--output', default=OUTPUT_CSV)
+
+    subparsers.add_parser('status', help="Mostra quantos shards há em cada estado.")
+
+    local = subparsers.add_parser('local', help="Cria a fila, roda N workers locais e junta os resultados.")
+    local.add_argument('--workers', type=int, default=os.cpu_count())
+    local.add_argument('--shard-rows', type=int, default=SHARD_ROWS)
+    local.add_argument('--test-mode', action='store_true')
+    local.add_argument('--lease-timeout', type=float, default=LEASE_TIMEOUT)
+    local.add_argument('--output', default=OUTPUT_CSV)
+
+    args = parser.parse_args()
+    if args.command in ('coordinate', 'local'):
+        n_shards = create_sweep(args.queue, setup_dataframe(test_mode=args.test_mode), args.shard_rows)
+        print(f"{n_shards} shard(s) criados em '{args.queue}'.")
+    if args.command == 'work':
+        completed = run_worker(args.queue, args.worker_id, lease_timeout=args.lease_timeout,
+                               poll_interval=args.poll_interval)
+        print(f"Worker concluiu {completed} shard(s).")
+    elif args.command == 'local':
+        run_local(args.queue, args.workers, lease_timeout=args.lease_timeout)
+    if args.command == 'status':
+        print(sweep_status(args.queue))
+    elif args.command in ('merge', 'local'):
+        status = sweep_status(args.queue)
+        if status['failed']:
+            print(f"Aviso: {status['failed']} shard(s) falharam; veja '{_path(args.queue, 'failed')}'.")
+        df = merge_results(args.queue, args.output)
+        print(f"{len(df)} linhas salvas em '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: formula_analytics.py
+
+"""
+Estatísticas de divergência entre as fórmulas de LIO sobre grandes conjuntos de resultados.
+
+Todas as métricas são reduções por faixa (bin) de AL e K feitas com `np.bincount`
+e `ufunc.at` diretamente sobre as colunas, sem laços por linha. Os acumuladores são
+somas por faixa, então o resultado pode ser construído em blocos (por exemplo,
+lendo o CSV com `chunksize`) sem manter todas as linhas em memória.
+
+O relatório gerado é um JSON compacto que `generate_interactive_chart.py` pode ler
+no lugar das linhas brutas.
+"""
+
+import json
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from iol_formulas import FORMULA_OUTPUT_COLUMNS
+
+# --- Configurações ---
+INPUT_CSV = 'resultados_consolidados_iol.csv'
+OUTPUT_REPORT = 'relatorio_divergencia_formulas.json'
+CSV_CHUNK_ROWS = 1_000_000
+
+REFERENCE_FORMULA = 'barrett_universal_ii'
+DISAGREEMENT_THRESHOLDS = (0.5, 1.0)
+
+# Faixas de largura fixa: AL em 0.5 mm e K médio em 1 D. Valores fora do intervalo
+# são contados na primeira ou na última faixa.
+AL_BIN_EDGES = np.arange(14.0, 40.0 + 0.5, 0.5)
+K_BIN_EDGES = np.arange(30.0, 60.0 + 1.0, 1.0)
+
+
+# Colunas de resultado além de `FORMULA_OUTPUT_COLUMNS`, incluídas com `register_formula_column`.
+_extra_formula_columns: List[str] = []
+
+
+def register_formula_column(name: str):
+    """Registra uma coluna de resultado que não é gerada pelo pipeline (por exemplo, de outra calculadora)."""
+    if name not in _extra_formula_columns:
+        _extra_formula_columns.append(name)
+
+
+def detect_formula_columns(columns: Sequence[str]) -> List[str]:
+    """
+    Retorna as colunas de resultado presentes em `columns`, na ordem em que aparecem:
+    as de `FORMULA_OUTPUT_COLUMNS` e as registradas com `register_formula_column`.
+    Biometria, identificadores e qualquer outra coluna são ignorados.
+    """
+    known = set(FORMULA_OUTPUT_COLUMNS).union(_extra_formula_columns)
+    return [col for col in columns if col in known]
+
+
+def _bin_index(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    return np.clip(np.searchsorted(edges, values, side='right') - 1, 0, len(edges) - 2)
+
+
+def json_list(values: np.ndarray, decimals: int = 4) -> list:
+    """Converte para lista JSON arredondada, trocando NaN por None (usada também nos relatórios de desfechos)."""
+    rounded = np.round(np.asarray(values, dtype=float), decimals)
+    return [None if np.isnan(v) else v for v in rounded.tolist()]
+
+
+def _safe_ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+class FormulaDivergenceAccumulator:
+    """
+    Acumula, por faixa de AL e de K, as estatísticas de divergência entre fórmulas.
+
+    Métricas:
+        - Diferença entre cada par de fórmulas (incluindo Barrett): contagem, média,
+          desvio padrão e maior diferença absoluta, por faixa de AL e no total.
+        - Dispersão entre fórmulas (máximo - mínimo por olho), por faixa de AL x K.
+        - Número de olhos com dispersão acima de cada limiar de `DISAGREEMENT_THRESHOLDS`.
+        - Fórmula mais distante da mediana das fórmulas em cada faixa (outlier).
+    """
+
+    def __init__(
+        self,
+        formulas: Sequence[str],
+        al_edges: np.ndarray = AL_BIN_EDGES,
+        k_edges: np.ndarray = K_BIN_EDGES,
+        thresholds: Sequence[float] = DISAGREEMENT_THRESHOLDS,
+    ):
+        self.formulas = list(formulas)
+        self.pairs = list(combinations(range(len(self.formulas)), 2))
+        self.al_edges = np.asarray(al_edges, dtype=float)
+        self.k_edges = np.asarray(k_edges, dtype=float)
+        self.thresholds = tuple(thresholds)
+        self.n_rows = 0
+
+        n_f, n_p = len(self.formulas), len(self.pairs)
+        n_al, n_k = len(self.al_edges) - 1, len(self.k_edges) - 1
+        self._n_cells = n_al * n_k
+        self._n_al = n_al
+
+        # Por faixa de AL
+        self.formula_count = np.zeros((n_f, n_al))
+        self.formula_sum = np.zeros((n_f, n_al))
+        self.pair_count = np.zeros((n_p, n_al))
+        self.pair_sum = np.zeros((n_p, n_al))
+        self.pair_sumsq = np.zeros((n_p, n_al))
+        self.pair_max_abs = np.full((n_p, n_al), np.nan)
+        # Por célula AL x K
+        self.cell_count = np.zeros(self._n_cells)
+        self.spread_sum = np.zeros(self._n_cells)
+        self.spread_max = np.full(self._n_cells, np.nan)
+        self.disagree_count = np.zeros((len(self.thresholds), self._n_cells))
+        self.deviation_sum = np.zeros((n_f, self._n_cells))
+        self.deviation_count = np.zeros((n_f, self._n_cells))
+
+    def update(self, axial_length: np.ndarray, keratometry: np.ndarray, values: np.ndarray):
+        """
+        Adiciona um bloco de olhos.
+
+        Args:
+            axial_length (np.ndarray): Comprimento axial de cada olho, formato (n,).
+            keratometry (np.ndarray): Ceratometria média de cada olho, formato (n,).
+            values (np.ndarray): Potência por fórmula, formato (n, len(formulas)); NaN se ausente.
+        """
+        values = np.asarray(values, dtype=float)
+        al_bin = _bin_index(np.asarray(axial_length, dtype=float), self.al_edges)
+        cell = al_bin * (len(self.k_edges) - 1) + _bin_index(np.asarray(keratometry, dtype=float), self.k_edges)
+        valid = ~np.isnan(values)
+        self.n_rows += len(values)
+
+        # Valores ausentes entram com peso zero, evitando compactar os arrays a cada coluna.
+        filled = np.where(valid, values, 0.0)
+        for f in range(len(self.formulas)):
+            self.formula_count[f] += np.bincount(al_bin, weights=valid[:, f], minlength=self._n_al)
+            self.formula_sum[f] += np.bincount(al_bin, weights=filled[:, f], minlength=self._n_al)
+
+        for p, (a, b) in enumerate(self.pairs):
+            diff = values[:, a] - values[:, b]
+            ok = valid[:, a] & valid[:, b]
+            diff_filled = np.where(ok, diff, 0.0)
+            self.pair_count[p] += np.bincount(al_bin, weights=ok, minlength=self._n_al)
+            self.pair_sum[p] += np.bincount(al_bin, weights=diff_filled, minlength=self._n_al)
+            self.pair_sumsq[p] += np.bincount(al_bin, weights=diff_filled * diff_filled, minlength=self._n_al)
+            np.fmax.at(self.pair_max_abs[p], al_bin, np.abs(diff))
+
+        # Dispersão e desvio da mediana só fazem sentido com ao menos duas fórmulas válidas.
+        comparable = valid.sum(axis=1) >= 2
+        rows = values[comparable]
+        cells = cell[comparable]
+        spread = np.nanmax(rows, axis=1) - np.nanmin(rows, axis=1)
+        self.cell_count += np.bincount(cells, minlength=self._n_cells)
+        self.spread_sum += np.bincount(cells, weights=spread, minlength=self._n_cells)
+        np.fmax.at(self.spread_max, cells, spread)
+        for t, threshold in enumerate(self.thresholds):
+            self.disagree_count[t] += np.bincount(cells[spread > threshold], minlength=self._n_cells)
+
+        deviation = np.abs(rows - np.nanmedian(rows, axis=1)[:, np.newaxis])
+        has_deviation = ~np.isnan(deviation)
+        deviation[~has_deviation] = 0.0
+        for f in range(len(self.formulas)):
+            self.deviation_sum[f] += np.bincount(cells, weights=deviation[:, f], minlength=self._n_cells)
+            self.deviation_count[f] += np.bincount(cells, weights=has_deviation[:, f], minlength=self._n_cells)
+
+    def update_frame(self, df: pd.DataFrame):
+        """Adiciona um bloco no formato de `resultados_consolidados_iol.csv`."""
+        keratometry = (df['meas_k1'].to_numpy(dtype=float) + df['meas_k2'].to_numpy(dtype=float)) / 2
+        self.update(df['axial_length'].to_numpy(dtype=float), keratometry, df[self.formulas].to_numpy(dtype=float))
+
+    def _outliers(self, deviation_sum: np.ndarray, deviation_count: np.ndarray) -> list:
+        mean_deviation = _safe_ratio(deviation_sum, deviation_count)
+        has_data = ~np.all(np.isnan(mean_deviation), axis=0)
+        best = np.argmax(np.nan_to_num(mean_deviation, nan=-np.inf), axis=0)
+        return [self.formulas[i] if ok else None for i, ok in zip(best, has_data)]
+
+    def _pairwise_table(self, count, total, total_sq, max_abs) -> list:
+        mean = _safe_ratio(total, count)
+        variance = np.maximum(_safe_ratio(total_sq, count) - mean**2, 0)
+        return [
+            {
+                'a': self.formulas[a], 'b': self.formulas[b],
+                'count': int(count[p]), 'mean': json_list([mean[p]])[0],
+                'std': json_list([np.sqrt(variance[p])])[0], 'max_abs': json_list([max_abs[p]])[0],
+            }
+            for p, (a, b) in enumerate(self.pairs)
+        ]
+
+    def report(self) -> Dict:
+        """Monta o relatório compacto (serializável em JSON)."""
+        n_al, n_k = self._n_al, len(self.k_edges) - 1
+        al_centers = (self.al_edges[:-1] + self.al_edges[1:]) / 2
+        k_centers = (self.k_edges[:-1] + self.k_edges[1:]) / 2
+
+        # Reduções das células AL x K para faixas de AL.
+        cell_count_al = self.cell_count.reshape(n_al, n_k).sum(axis=1)
+        spread_sum_al = self.spread_sum.reshape(n_al, n_k).sum(axis=1)
+        spread_max_al = np.fmax.reduce(self.spread_max.reshape(n_al, n_k), axis=1)
+        disagree_al = self.disagree_count.reshape(-1, n_al, n_k).sum(axis=2)
+        deviation_sum_al = self.deviation_sum.reshape(-1, n_al, n_k).sum(axis=2)
+        deviation_count_al = self.deviation_count.reshape(-1, n_al, n_k).sum(axis=2)
+
+        al_rows = np.flatnonzero(self.formula_count.sum(axis=0) > 0)
+        cells = np.flatnonzero(self.cell_count > 0)
+        threshold_keys = [f'disagree_gt_{t:g}' for t in self.thresholds]
+        cell_outliers = self._outliers(self.deviation_sum, self.deviation_count)
+        al_outliers = self._outliers(deviation_sum_al, deviation_count_al)
+
+        return {
+            'formulas': self.formulas,
+            'reference_formula': REFERENCE_FORMULA if REFERENCE_FORMULA in self.formulas else None,
+            'n_rows': int(self.n_rows),
+            'al_bin_edges': json_list(self.al_edges),
+            'k_bin_edges': json_list(self.k_edges),
+            'thresholds': list(self.thresholds),
+            'overall': {
+                'pairwise': self._pairwise_table(
+                    self.pair_count.sum(axis=1), self.pair_sum.sum(axis=1),
+                    self.pair_sumsq.sum(axis=1), np.fmax.reduce(self.pair_max_abs, axis=1),
+                ),
+                'comparable_rows': int(self.cell_count.sum()),
+                'spread_mean': json_list([_safe_ratio(self.spread_sum.sum(), self.cell_count.sum())])[0],
+                **{key: int(self.disagree_count[t].sum()) for t, key in enumerate(threshold_keys)},
+            },
+            'by_al_bin': {
+                'al_center': json_list(al_centers[al_rows]),
+                'count': json_list(self.formula_count.max(axis=0)[al_rows], 0),
+                'formula_mean': {
+                    name: json_list(_safe_ratio(self.formula_sum[f], self.formula_count[f])[al_rows])
+                    for f, name in enumerate(self.formulas)
+                },
+                'pairwise_mean': {
+                    f'{self.formulas[a]}-{self.formulas[b]}':
+                        json_list(_safe_ratio(self.pair_sum[p], self.pair_count[p])[al_rows])
+                    for p, (a, b) in enumerate(self.pairs)
+                },
+                'spread_mean': json_list(_safe_ratio(spread_sum_al, cell_count_al)[al_rows]),
+                'spread_max': json_list(spread_max_al[al_rows]),
+                **{key: json_list(disagree_al[t][al_rows], 0) for t, key in enumerate(threshold_keys)},
+                'outlier': [al_outliers[i] for i in al_rows],
+            },
+            'by_al_k_bin': {
+                'al_center': json_list(al_centers[cells // n_k]),
+                'k_center': json_list(k_centers[cells % n_k]),
+                'count': json_list(self.cell_count[cells], 0),
+                'spread_mean': json_list(_safe_ratio(self.spread_sum, self.cell_count)[cells]),
+                'spread_max': json_list(self.spread_max[cells]),
+                **{key: json_list(self.disagree_count[t][cells], 0) for t, key in enumerate(threshold_keys)},
+                'outlier': [cell_outliers[i] for i in cells],
+            },
+        }
+
+
+def analyze_results(
+    df: pd.DataFrame, formulas: Optional[Sequence[str]] = None, **kwargs
+) -> Dict:
+    """
+    Calcula o relatório de divergência para um DataFrame de resultados.
+
+    Args:
+        df (pd.DataFrame): Resultados no formato de `resultados_consolidados_iol.csv`.
+        formulas (Optional[Sequence[str]]): Colunas de fórmula; detectadas se não forem fornecidas.
+        **kwargs: Repassados para `FormulaDivergenceAccumulator` (faixas e limiares).
+
+    Returns:
+        Dict: O relatório de `FormulaDivergenceAccumulator.report`.
+    """
+    accumulator = FormulaDivergenceAccumulator(formulas or detect_formula_columns(df.columns), **kwargs)
+    accumulator.update_frame(df)
+    return accumulator.report()
+
+
+def analyze_csv(path: str, chunk_rows: int = CSV_CHUNK_ROWS, **kwargs) -> Dict:
+    """Calcula o relatório lendo o CSV em blocos de `chunk_rows` linhas."""
+    accumulator = None
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        if accumulator is None:
+            accumulator = FormulaDivergenceAccumulator(detect_formula_columns(chunk.columns), **kwargs)
+        accumulator.update_frame(chunk)
+    if accumulator is None:
+        raise ValueError(f"'{path}' has no rows.")
+    return accumulator.report()
+
+
+def save_report(report: Dict, path: str = OUTPUT_REPORT):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False)
+
+
+def load_report(path: str = OUTPUT_REPORT) -> Dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    """Gera o relatório de divergência a partir do CSV consolidado."""
+    try:
+        report = analyze_csv(INPUT_CSV)
+    except FileNotFoundError:
+        print(f"ERRO: O arquivo de entrada '{INPUT_CSV}' não foi encontrado.")
+        return
+
+    save_report(report)
+    overall = report['overall']
+    print(f"Relatório salvo em '{OUTPUT_REPORT}' ({report['n_rows']} linhas analisadas).")
+    for threshold in report['thresholds']:
+        print(f"  Olhos com divergência > {threshold:g} D: {overall[f'disagree_gt_{threshold:g}']}")
+    if report['reference_formula']:
+        print(f"  Diferença média em relação a '{report['reference_formula']}':")
+        for pair in overall['pairwise']:
+            if report['reference_formula'] in (pair['a'], pair['b']) and pair['mean'] is not None:
+                other = pair['a'] if pair['b'] == report['reference_formula'] else pair['b']
+                sign = 1 if pair['a'] == other else -1
+                print(f"    {other}: {sign * pair['mean']:+.2f} D (máx. |Δ| {pair['max_abs']:.2f} D)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: formula_cache.py
+
+"""
+Camada opcional de memoização para os métodos escalares de `IOLFormulas`.
+
+`MemoizedIOLFormulas` pode substituir `IOLFormulas` onde os mesmos cálculos se repetem
+(telas que são redesenhadas, comparação de alvos refrativos etc.). Cada método de
+potência (`*_power`) e de ELP (`_*_elp`) consulta um cache LRU limitado, compartilhado
+entre os métodos e protegido por lock. A chave é formada pelo nome do método, por todos
+os argumentos da assinatura, quantizados e com os valores padrão preenchidos (chamadas
+posicionais, nomeadas ou que omitem um padrão resultam na mesma chave), e pelos valores
+de `CONSTANTS`. O cálculo é feito com os valores quantizados, de modo que
+o resultado depende apenas da chave, e por uma instância comum de `IOLFormulas`: as
+fórmulas que chamam outras (Hoffer chama Colenbrander) ocupam uma única entrada.
+
+Os valores de `CONSTANTS` são lidos na criação do objeto e a cada `invalidate()`; após
+alterar `CONSTANTS` em tempo de execução, chame `invalidate()`.
+"""
+
+import functools
+import inspect
+import math
+import numbers
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from iol_formulas import IOLFormulas, CONSTANTS
+
+# --- Configurações ---
+DEFAULT_MAXSIZE = 4096
+# Casas decimais usadas para quantizar os argumentos numéricos (1e-6 mm / 1e-6 D).
+DEFAULT_DECIMALS = 6
+
+# Métodos memoizados: todas as fórmulas de potência e de ELP.
+MEMOIZED_METHODS = tuple(
+    name for name, _ in inspect.getmembers(IOLFormulas, inspect.isfunction)
+    if name.endswith('_power') or (name.startswith('_') and name.endswith('_elp'))
+)
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Estatísticas do cache desde a criação (ou desde `reset_stats`)."""
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+
+def constants_snapshot() -> Tuple:
+    """Representação imutável dos valores atuais de `CONSTANTS`."""
+    return tuple(sorted((group, tuple(sorted(values.items()))) for group, values in CONSTANTS.items()))
+
+
+_NAN = float('nan')
+
+
+def _quantize(value: Any, decimals: int) -> Any:
+    if value is None:
+        return value
+    if isinstance(value, numbers.Real) and not isinstance(value, bool):
+        value = float(value)
+        # Um único objeto NaN, para que chaves com NaN se repitam (NaN != NaN)
+        return _NAN if math.isnan(value) else round(value, decimals)
+    return value
+
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Cópia do resultado, para que o chamador não altere a entrada guardada no cache."""
+    return {'result': result['result'], 'parameters': dict(result['parameters'])}
+
+
+class MemoizedIOLFormulas(IOLFormulas):
+    """
+    `IOLFormulas` com cache LRU limitado e thread-safe nas fórmulas de potência e de ELP.
+
+    Args:
+        maxsize (int): Número máximo de resultados guardados (todos os métodos somados).
+        decimals (int): Casas decimais da quantização dos argumentos numéricos.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, decimals: int = DEFAULT_DECIMALS):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive.")
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self._cache: 'OrderedDict[Hashable, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._invalidations = 0
+        self._constants = constants_snapshot()
+        # Executa os cálculos sem passar de novo pelo cache (nem pelas estatísticas)
+        self._formulas = IOLFormulas()
+
+    def _cached_call(self, method: Callable, signature: inspect.Signature, args: tuple, kwargs: dict) -> Dict[str, Any]:
+        # Todos os parâmetros na ordem da assinatura, com os padrões preenchidos; argumentos
+        # inválidos geram o mesmo TypeError da chamada direta.
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        parameters = tuple(bound.arguments)[1:]  # Sem o 'self'
+        values = tuple(bound.arguments.values())[1:]
+        values = tuple(_quantize(v, self.decimals) for v in values)
+
+        with self._lock:
+            key = (method.__name__, self._constants, values)
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return _copy_result(result)
+            self._misses += 1
+
+        # O cálculo é feito fora do lock; chamadas concorrentes com a mesma chave podem
+        # calcular em duplicidade, mas guardam o mesmo resultado.
+        result = method(self._formulas, **dict(zip(parameters, values)))
+
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+                self._evictions += 1
+        return _copy_result(result)
+
+    def invalidate(self):
+        """Descarta todos os resultados; chame após alterar `CONSTANTS` em tempo de execução."""
+        with self._lock:
+            self._cache.clear()
+            self._constants = constants_snapshot()
+            self._invalidations += 1
+
+    def cache_stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, self._invalidations,
+                              len(self._cache), self.maxsize)
+
+    def reset_stats(self):
+        with self._lock:
+            self._hits = self._misses = self._evictions = self._invalidations = 0
+
+
+def _memoized(name: str) -> Callable:
+    method = getattr(IOLFormulas, name)
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self: MemoizedIOLFormulas, *args, **kwargs) -> Dict[str, Any]:
+        return self._cached_call(method, signature, args, kwargs)
+    return wrapper
+
+
+for _name in MEMOIZED_METHODS:
+    setattr(MemoizedIOLFormulas, _name, _memoized(_name))
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: generate_chart_batch.py
+
+"""
+Geração em lote dos gráficos comparativos.
+
+Os gráficos são descritos de forma declarativa (`ChartSpec`: filtros, faixa de K e
+fórmula de referência para as vistas de diferença) e renderizados em paralelo em um
+pool de processos, cada um com sua própria cópia dos dados carregada uma única vez.
+Todas as páginas referenciam um único arquivo local do plotly.js, gravado uma vez na
+pasta de saída, em vez de embutir o pacote inteiro (vários MB) em cada HTML. Uma página
+`index.html` reúne os links para todos os gráficos. Um gráfico que falha é informado e
+não interrompe o restante do lote.
+"""
+
+import argparse
+import html
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import plotly
+import plotly.offline
+
+from formula_analytics import REFERENCE_FORMULA, detect_formula_columns
+from generate_interactive_chart import INPUT_CSV, build_comparison_figure
+
+# --- Configurações ---
+OUTPUT_DIR = 'graficos_formulas'
+INDEX_HTML = 'index.html'
+# O nome inclui a versão do plotly para que uma atualização grave um novo arquivo.
+PLOTLY_JS = f'plotly-{plotly.__version__}.min.js'
+# Faixas de K médio (D) dos gráficos por ceratometria: [mínimo, máximo)
+K_BANDS = ((0.0, 42.0), (42.0, 44.0), (44.0, 46.0), (46.0, 100.0))
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    """Descrição de um gráfico do lote."""
+    slug: str                                      # Nome do arquivo, sem extensão
+    title: str
+    filters: Tuple[Tuple[str, Any], ...] = ()      # Pares (coluna, valor) que as linhas devem ter
+    k_band: Optional[Tuple[float, float]] = None   # Faixa de K médio [mínimo, máximo)
+    relative_to: Optional[str] = None              # Se definido, plota a diferença para esta fórmula
+
+    def select(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Linhas do DataFrame que entram no gráfico."""
+        mask = pd.Series(True, index=df.index)
+        for column, value in self.filters:
+            mask &= df[column] == value
+        if self.k_band is not None:
+            k_mean = (df['meas_k1'] + df['meas_k2']) / 2
+            mask &= (k_mean >= self.k_band[0]) & (k_mean < self.k_band[1])
+        return df[mask]
+
+
+def _slug(value: Any) -> str:
+    return ''.join(c if c.isalnum() else '_' for c in str(value)).strip('_').lower()
+
+
+def default_chart_specs(df: pd.DataFrame, formula_columns: Sequence[str]) -> List[ChartSpec]:
+    """
+    Gráficos padrão do lote: visão geral, por lente, por lado do olho, por faixa de K e,
+    se houver resultados da Barrett, as diferenças de cada fórmula em relação a ela.
+    """
+    specs = [ChartSpec('todas', "Comparativo de Fórmulas de Cálculo de LIO")]
+    lenses = df['iol_model'].dropna().unique() if 'iol_model' in df.columns else []
+    for lens in lenses:
+        specs.append(ChartSpec(f'lente_{_slug(lens)}', f"Comparativo de Fórmulas - {lens}",
+                               filters=(('iol_model', lens),)))
+    if 'eye_side' in df.columns:
+        for side in sorted(df['eye_side'].dropna().unique()):
+            specs.append(ChartSpec(f'olho_{_slug(side)}', f"Comparativo de Fórmulas - Olho {side}",
+                                   filters=(('eye_side', side),)))
+    for low, high in K_BANDS:
+        spec = ChartSpec(f'k_{low:g}_{high:g}'.replace('.', '_'),
+                         f"Comparativo de Fórmulas - K entre {low:g} D e {high:g} D", k_band=(low, high))
+        if len(spec.select(df)):
+            specs.append(spec)
+
+    if REFERENCE_FORMULA in formula_columns and df[REFERENCE_FORMULA].notna().any():
+        specs.append(ChartSpec('diferenca_barrett', "Diferença para a Barrett Universal II",
+                               relative_to=REFERENCE_FORMULA))
+        for lens in lenses:
+            specs.append(ChartSpec(f'diferenca_barrett_{_slug(lens)}', f"Diferença para a Barrett Universal II - {lens}",
+                                   filters=(('iol_model', lens),), relative_to=REFERENCE_FORMULA))
+    return specs
+
+
+# --- Estado de cada processo do pool ---
+_worker_df: Optional[pd.DataFrame] = None
+_worker_formulas: List[str] = []
+_worker_output_dir = OUTPUT_DIR
+
+
+def _init_worker(input_csv: str, output_dir: str):
+    """Carrega os dados uma vez por processo, em vez de enviá-los a cada gráfico."""
+    global _worker_df, _worker_formulas, _worker_output_dir
+    _worker_df = pd.read_csv(input_csv)
+    _worker_formulas = [col for col in detect_formula_columns(_worker_df.columns)
+                        if _worker_df[col].notna().any()]
+    _worker_output_dir = output_dir
+
+
+def render_chart(spec: ChartSpec) -> Optional[Tuple[ChartSpec, str, int]]:
+    """
+    Renderiza um gráfico no processo atual.
+
+    Returns:
+        Optional[Tuple[ChartSpec, str, int]]: A especificação, o nome do arquivo gerado e o
+        número de olhos plotados, ou None se nenhuma linha atender aos filtros.
+    """
+    df = spec.select(_worker_df).sort_values('axial_length')
+    formulas = list(_worker_formulas)
+    yaxis_title = "Potência da LIO (D)"
+    if spec.relative_to is not None:
+        df = df[df[spec.relative_to].notna()]
+        formulas = [name for name in formulas if name != spec.relative_to]
+        df = df.assign(**{name: df[name] - df[spec.relative_to] for name in formulas})
+        yaxis_title = f"Diferença para {spec.relative_to} (D)"
+    if df.empty or not formulas:
+        return None
+
+    fig = build_comparison_figure(df, formulas, title_text=spec.title, yaxis_title=yaxis_title)
+    filename = f'{spec.slug}.html'
+    fig.write_html(os.path.join(_worker_output_dir, filename), include_plotlyjs=PLOTLY_JS)
+    return spec, filename, len(df)
+
+
+def write_plotly_js(output_dir: str) -> str:
+    """Grava o plotly.js na pasta de saída, se ainda não existir, e retorna o caminho."""
+    path = os.path.join(output_dir, PLOTLY_JS)
+    if not os.path.exists(path):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(plotly.offline.get_plotlyjs())
+        os.replace(tmp_path, path)
+    return path
+
+
+def write_index(output_dir: str, rendered: Sequence[Tuple[ChartSpec, str, int]]) -> str:
+    """Grava a página com os links para todos os gráficos gerados."""
+    items = '\n'.join(
+        f'    <li><a href="{html.escape(filename)}">{html.escape(spec.title)}</a> ({count} olhos)</li>'
+        for spec, filename, count in rendered
+    )
+    page = (
+        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+        '<title>Comparativo de Fórmulas de LIO</title>\n</head>\n<body>\n'
+        f'<h1>Comparativo de Fórmulas de LIO</h1>\n<ul>\n{items}\n</ul>\n</body>\n</html>\n'
+    )
+    path = os.path.join(output_dir, INDEX_HTML)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    return path
+
+
+def generate_chart_batch(
+    input_csv: str = INPUT_CSV,
+    output_dir: str = OUTPUT_DIR,
+    specs: Optional[Sequence[ChartSpec]] = None,
+    max_workers: Optional[int] = None,
+) -> List[Tuple[ChartSpec, str, int]]:
+    """
+    Gera todos os gráficos do lote e a página de índice.
+
+    Args:
+        input_csv (str): CSV de resultados (de `run_all_calculations.py` ou `iol_catalog.py`).
+        output_dir (str): Pasta de saída.
+        specs (Optional[Sequence[ChartSpec]]): Gráficos a gerar; por padrão, `default_chart_specs`.
+        max_workers (Optional[int]): Número de processos (padrão: número de CPUs).
+
+    Returns:
+        List[Tuple[ChartSpec, str, int]]: Os gráficos gerados, na ordem das especificações;
+        os que falharam ficam de fora (e do índice).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if specs is None:
+        df = pd.read_csv(input_csv)
+        formulas = [col for col in detect_formula_columns(df.columns) if df[col].notna().any()]
+        specs = default_chart_specs(df, formulas)
+    if len({spec.slug for spec in specs}) != len(specs):
+        raise ValueError("Chart specs must have unique slugs.")
+
+    write_plotly_js(output_dir)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(input_csv, output_dir)) as pool:
+        futures = [(spec, pool.submit(render_chart, spec)) for spec in specs]
+        rendered = []
+        for spec, future in futures:
+            try:
+                result = future.result()
+            except Exception as error:
+                print(f"AVISO: O gráfico '{spec.slug}' não pôde ser gerado: {error!r}")
+                continue
+            if result is not None:
+                rendered.append(result)
+    write_index(output_dir, rendered)
+    return rendered
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera em paralelo os gráficos comparativos das fórmulas de LIO.")
+    parser.add_argument('--input', default=INPUT_CSV, help="CSV de resultados.")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help="Pasta de saída dos gráficos.")
+    parser.add_argument('--workers', type=int, default=None, help="Número de processos (padrão: CPUs).")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"ERRO: O arquivo de entrada '{args.input}' não foi encontrado.")
+        return
+
+    start = time.perf_counter()
+    rendered = generate_chart_batch(args.input, args.output_dir, max_workers=args.workers)
+    elapsed = time.perf_counter() - start
+    total_bytes = sum(os.path.getsize(os.path.join(args.output_dir, name)) for name in os.listdir(args.output_dir))
+    print(f"{len(rendered)} gráfico(s) gerados em '{args.output_dir}' em {elapsed:.1f} s "
+          f"({total_bytes / 1e6:.1f} MB no total). Abra '{os.path.join(args.output_dir, INDEX_HTML)}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,36 @@
 # -*- coding: utf-8 -*-
 # NOME DO ARQUIVO: generate_interactive_chart.py
 
+import os
 import pandas as pd
 import plotly.graph_objects as go
-from typing import List
+from typing import List, Tuple
+
+from formula_analytics import detect_formula_columns, load_report
 
 # --- Configurações ---
 INPUT_CSV = 'resultados_consolidados_iol.csv'
+INPUT_REPORT = 'relatorio_divergencia_formulas.json' # Gerado por formula_analytics.py
 OUTPUT_HTML = 'grafico_comparativo_formulas.html'
 
-def create_interactive_chart(df: pd.DataFrame, formula_columns: List[str]):
+def build_comparison_figure(
+    df: pd.DataFrame,
+    formula_columns: List[str],
+    title_text: str = "Comparativo de Fórmulas de Cálculo de LIO",
+    yaxis_title: str = "Potência da LIO (D)",
+) -> go.Figure:
     """
-    Cria e salva um gráfico interativo comparando as fórmulas de LIO com eixos fixos.
+    Monta o gráfico comparando as fórmulas de LIO com eixos fixos.
 
     Args:
         df (pd.DataFrame): O DataFrame contendo os dados.
         formula_columns (List[str]): A lista de nomes das colunas das fórmulas a serem plotadas.
+        title_text (str): Título do gráfico.
+        yaxis_title (str): Título do eixo Y.
+
+    Returns:
+        go.Figure: A figura pronta para ser salva.
     """
-    print("Criando o gráfico interativo com eixos fixos...")
-    
     # --- Define os limites fixos para os eixos ---
     x_min = df['axial_length'].min()
     x_max = df['axial_length'].max()
@@ -48,13 +60,26 @@ def create_interactive_chart(df: pd.DataFrame, formula_columns: List[str]):
     # --- Atualiza o layout do gráfico ---
     # A caixa de seleção (updatemenus) foi removida.
     fig.update_layout(
-        title_text="Comparativo de Fórmulas de Cálculo de LIO",
+        title_text=title_text,
         xaxis_title="Comprimento Axial (mm)",
-        yaxis_title="Potência da LIO (D)",
+        yaxis_title=yaxis_title,
         legend_title="Fórmulas",
         xaxis_range=[x_min, x_max],  # Define o eixo X fixo
         yaxis_range=[y_axis_min, y_axis_max]  # Define o eixo Y fixo
     )
+    return fig
+
+
+def create_interactive_chart(df: pd.DataFrame, formula_columns: List[str]):
+    """
+    Cria e salva um gráfico interativo comparando as fórmulas de LIO com eixos fixos.
+
+    Args:
+        df (pd.DataFrame): O DataFrame contendo os dados.
+        formula_columns (List[str]): A lista de nomes das colunas das fórmulas a serem plotadas.
+    """
+    print("Criando o gráfico interativo com eixos fixos...")
+    fig = build_comparison_figure(df, formula_columns)
     
     # Salva o gráfico em um arquivo HTML
     try:
@@ -65,22 +90,46 @@ def create_interactive_chart(df: pd.DataFrame, formula_columns: List[str]):
         print(f"Ocorreu um erro ao salvar o arquivo HTML: {e}")
 
 
+def load_report_dataframe(path: str) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Lê o relatório de `formula_analytics.py` e monta um DataFrame com a potência média
+    de cada fórmula por faixa de comprimento axial, no lugar das linhas brutas.
+
+    Returns:
+        Tuple[pd.DataFrame, List[str]]: O DataFrame e a lista de colunas das fórmulas.
+    """
+    report = load_report(path)
+    by_al_bin = report['by_al_bin']
+    df = pd.DataFrame({'axial_length': by_al_bin['al_center'], **by_al_bin['formula_mean']})
+    return df.astype(float), list(report['formulas'])
+
+
+def _report_is_current() -> bool:
+    """O relatório só substitui o CSV se existir e não for mais antigo que ele."""
+    if not os.path.exists(INPUT_REPORT):
+        return False
+    return not os.path.exists(INPUT_CSV) or os.path.getmtime(INPUT_REPORT) >= os.path.getmtime(INPUT_CSV)
+
+
 def main():
     """
     Função principal que carrega os dados e inicia a criação do gráfico.
+    Usa o relatório compacto de divergência quando ele estiver atualizado.
     """
-    try:
-        df = pd.read_csv(INPUT_CSV)
-        print(f"Arquivo '{INPUT_CSV}' carregado com sucesso.")
-    except FileNotFoundError:
-        print(f"ERRO: O arquivo de entrada '{INPUT_CSV}' não foi encontrado.")
-        print("Certifique-se de que ele está na mesma pasta que este script.")
-        return
-
-    # Identifica automaticamente as colunas das fórmulas, excluindo as de biometria
-    biometry_cols = ['iol_model', 'a_constant', 'eye_side', 'axial_length', 
-                     'meas_k1', 'meas_k2', 'optical_acd']
-    formula_cols = [col for col in df.columns if col not in biometry_cols]
+    if _report_is_current():
+        df, formula_cols = load_report_dataframe(INPUT_REPORT)
+        print(f"Relatório '{INPUT_REPORT}' carregado com sucesso (médias por faixa de AL).")
+    else:
+        try:
+            df = pd.read_csv(INPUT_CSV)
+            print(f"Arquivo '{INPUT_CSV}' carregado com sucesso.")
+        except FileNotFoundError:
+            print(f"ERRO: O arquivo de entrada '{INPUT_CSV}' não foi encontrado.")
+            print("Certifique-se de que ele está na mesma pasta que este script.")
+            return
+
+        # Identifica automaticamente as colunas das fórmulas (as de `FORMULA_OUTPUT_COLUMNS`)
+        formula_cols = detect_formula_columns(df.columns)
     
     print(f"Fórmulas encontradas para plotar: {formula_cols}")
     
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: incremental_calculation.py
+
+"""
+Impressões digitais (fingerprints) por coluna para recálculo incremental.
+
+Cada coluna de saída tem uma impressão digital formada pelas colunas de entrada que
+usa, pelos valores das constantes relevantes e por um hash do código-fonte das
+funções que a calculam. Cada linha tem ainda uma chave com os valores de entrada
+daquela coluna. Na execução seguinte, só são recalculadas as colunas cuja impressão
+digital mudou e, nas demais, só as linhas cujas entradas não existiam antes; todo o
+resto é reaproveitado da saída anterior.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def source_hash(functions: Sequence[Callable]) -> str:
+    """Hash do código-fonte das funções (métodos das fórmulas, funções de cálculo etc.)."""
+    digest = hashlib.sha256()
+    for function in functions:
+        digest.update(inspect.getsource(function).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def column_fingerprint(inputs: Sequence[str], parameters: Dict[str, Any], sources: Sequence[Callable]) -> str:
+    """
+    Calcula a impressão digital de uma coluna de saída.
+
+    Args:
+        inputs (Sequence[str]): Colunas de entrada usadas pela coluna.
+        parameters (Dict[str, Any]): Constantes relevantes e seus valores atuais.
+        sources (Sequence[Callable]): Funções cujo código determina o resultado.
+
+    Returns:
+        str: Hash hexadecimal.
+    """
+    payload = json.dumps(
+        {'inputs': list(inputs), 'parameters': parameters, 'source': source_hash(sources)},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def row_keys(df: pd.DataFrame, inputs: Sequence[str], decimals: int) -> np.ndarray:
+    """
+    Chave (uint64) de cada linha a partir das colunas de entrada, arredondadas para
+    `decimals` casas, a mesma precisão com que os resultados são salvos no CSV.
+    """
+    values = df[list(inputs)].round(decimals)
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+def reuse_previous_values(
+    previous_keys: np.ndarray, previous_values: np.ndarray, current_keys: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Busca, para cada linha atual, o valor calculado anteriormente para a mesma chave.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Os valores reaproveitados (NaN onde não houver)
+        e a máscara das linhas encontradas.
+    """
+    lookup = pd.Series(np.asarray(previous_values, dtype=float), index=pd.Index(previous_keys))
+    lookup = lookup[~lookup.index.duplicated(keep='last')]
+    positions = lookup.index.get_indexer(current_keys)
+    found = positions >= 0
+    values = np.full(len(current_keys), np.nan)
+    values[found] = lookup.to_numpy()[positions[found]]
+    return values, found
+
+
+class FingerprintStore:
+    """Guarda, por coluna, a impressão digital e as chaves das linhas da última execução."""
+
+    def __init__(self, columns: Optional[Dict[str, Dict[str, Any]]] = None):
+        self._columns = columns or {}
+
+    @classmethod
+    def load(cls, path: str) -> 'FingerprintStore':
+        """Carrega o arquivo de impressões digitais; retorna um registro vazio se não existir."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f)['columns'])
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'columns': self._columns}, f)
+
+    def get(self, column: str) -> Tuple[Optional[str], np.ndarray]:
+        entry = self._columns.get(column)
+        if entry is None:
+            return None, np.empty(0, dtype=np.uint64)
+        return entry['fingerprint'], np.array(entry['row_keys'], dtype=np.uint64)
+
+    def set(self, column: str, fingerprint: str, keys: np.ndarray):
+        self._columns[column] = {'fingerprint': fingerprint, 'row_keys': [int(k) for k in keys]}
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: iol_catalog.py
+
+"""
+Catálogo de LIOs com as constantes derivadas de cada lente pré-calculadas.
+
+Cada fórmula precisa de uma constante própria (pACD para Hoffer/Hoffer Q, fator do
+cirurgião para Holladay 1, ACD da SRK/T e a0 de Haigis). O catálogo calcula essas
+constantes uma única vez por lente a partir da constante A, respeitando os valores
+otimizados informados na tabela, e avalia todas as lentes contra todos os olhos em
+uma única passada vetorizada (eixo de lentes x eixo de olhos).
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from iol_formulas import IOL, A_CONSTANT, ASSUMED_ACD, FIXED_ELP
+from iol_formulas_vectorized import (
+    FORMULA_NAMES, compute_all_formulas, haigis_a0_from_a_constant, pacd_from_a_constant,
+    srk_t_acd_from_a_constant, surgeon_factor_from_a_constant,
+)
+
+# --- Configurações ---
+CATALOG_CSV = 'catalogo_lio.csv'
+OUTPUT_CSV = 'resultados_catalogo_lio.csv'
+
+# Colunas opcionais da tabela com valores otimizados; células vazias usam a aproximação
+# a partir da constante A.
+OVERRIDE_COLUMNS = ('pacd', 'surgeon_factor', 'srk_t_acd', 'haigis_a0', 'haigis_a1', 'haigis_a2')
+HAIGIS_A1_DEFAULT = 0.4
+HAIGIS_A2_DEFAULT = 0.1
+
+
+@dataclass(frozen=True)
+class LensConstants:
+    """Constantes de uma lente, já convertidas para cada fórmula."""
+    iol_model: str
+    a_constant: float
+    pacd: float
+    surgeon_factor: float
+    srk_t_acd: float
+    haigis_a0: float
+    haigis_a1: float
+    haigis_a2: float
+    optimized: Tuple[str, ...] = ()   # Constantes que vieram da tabela em vez da aproximação
+
+    @classmethod
+    def from_a_constant(cls, iol_model: str, a_constant: float, **overrides: Optional[float]) -> 'LensConstants':
+        """
+        Deriva as constantes de cada fórmula a partir da constante A.
+
+        Args:
+            iol_model (str): Nome da lente.
+            a_constant (float): Constante A.
+            **overrides: Valores otimizados para qualquer coluna de `OVERRIDE_COLUMNS`;
+                         None ou NaN usa a aproximação.
+        """
+        given = {k: float(v) for k, v in overrides.items() if v is not None and not math.isnan(v)}
+        unknown = set(given) - set(OVERRIDE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown lens constants: {sorted(unknown)}.")
+
+        a1 = given.get('haigis_a1', HAIGIS_A1_DEFAULT)
+        a2 = given.get('haigis_a2', HAIGIS_A2_DEFAULT)
+        return cls(
+            iol_model=iol_model,
+            a_constant=float(a_constant),
+            pacd=given.get('pacd', float(pacd_from_a_constant(a_constant))),
+            surgeon_factor=given.get('surgeon_factor', float(surgeon_factor_from_a_constant(a_constant))),
+            srk_t_acd=given.get('srk_t_acd', float(srk_t_acd_from_a_constant(a_constant))),
+            haigis_a0=given.get('haigis_a0', float(haigis_a0_from_a_constant(a_constant, a1, a2))),
+            haigis_a1=a1,
+            haigis_a2=a2,
+            optimized=tuple(name for name in OVERRIDE_COLUMNS if name in given),
+        )
+
+
+class IOLCatalog:
+    """
+    Conjunto de lentes com as constantes derivadas guardadas em arrays (uma posição por lente),
+    prontos para broadcasting contra os arrays de olhos.
+    """
+
+    def __init__(self, lenses: Mapping[str, LensConstants]):
+        if not lenses:
+            raise ValueError("The IOL catalog is empty.")
+        self._lenses: Dict[str, LensConstants] = dict(lenses)
+        self.names = list(self._lenses)
+        # Arrays no formato (n_lentes, 1): o segundo eixo é o eixo dos olhos.
+        self._arrays = {
+            field: np.array([getattr(lens, field) for lens in self._lenses.values()], dtype=float)[:, np.newaxis]
+            for field in ('a_constant', *OVERRIDE_COLUMNS)
+        }
+
+    @classmethod
+    def from_a_constants(cls, a_constants: Mapping[str, float]) -> 'IOLCatalog':
+        return cls({name: LensConstants.from_a_constant(name, a) for name, a in a_constants.items()})
+
+    @classmethod
+    def from_csv(cls, path: str = CATALOG_CSV) -> 'IOLCatalog':
+        """
+        Carrega a tabela de lentes. Colunas obrigatórias: `iol_model` e `a_constant`;
+        as colunas de `OVERRIDE_COLUMNS` são opcionais.
+        """
+        table = pd.read_csv(path)
+        missing = {'iol_model', 'a_constant'} - set(table.columns)
+        if missing:
+            raise ValueError(f"IOL catalog '{path}' is missing columns: {sorted(missing)}.")
+        if table['iol_model'].duplicated().any():
+            raise ValueError(f"IOL catalog '{path}' has duplicated 'iol_model' entries.")
+
+        overrides = [col for col in OVERRIDE_COLUMNS if col in table.columns]
+        lenses = {}
+        for record in table.to_dict('records'):
+            lenses[record['iol_model']] = LensConstants.from_a_constant(
+                record['iol_model'], record['a_constant'], **{col: record[col] for col in overrides}
+            )
+        return cls(lenses)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def lens(self, iol_model: str) -> LensConstants:
+        try:
+            return self._lenses[iol_model]
+        except KeyError:
+            raise ValueError(f"Lens '{iol_model}' is not in the catalog.") from None
+
+    def calculate(self, axial_length, keratometry, haigis_acd=ASSUMED_ACD, fixed_elp: float = FIXED_ELP) -> Dict[str, np.ndarray]:
+        """
+        Calcula todas as fórmulas para todas as lentes e todos os olhos de uma vez.
+
+        Args:
+            axial_length: Comprimento axial de cada olho (n_olhos,).
+            keratometry: Ceratometria média de cada olho (n_olhos,).
+            haigis_acd: ACD usada por Haigis, escalar ou (n_olhos,).
+            fixed_elp (float): ELP fixo da fórmula de Colenbrander.
+
+        Returns:
+            Dict[str, np.ndarray]: Potência por fórmula, no formato (n_lentes, n_olhos).
+        """
+        al = np.atleast_1d(np.asarray(axial_length, dtype=float))[np.newaxis, :]
+        k = np.atleast_1d(np.asarray(keratometry, dtype=float))[np.newaxis, :]
+        acd = np.asarray(haigis_acd, dtype=float)
+        if acd.ndim:
+            acd = acd[np.newaxis, :]
+        arrays = self._arrays
+        results = compute_all_formulas(
+            al, k, arrays['a_constant'], haigis_acd=acd, fixed_elp=fixed_elp,
+            pacd=arrays['pacd'], surgeon_factor=arrays['surgeon_factor'], srk_t_acd=arrays['srk_t_acd'],
+            haigis_a0=arrays['haigis_a0'], haigis_a1=arrays['haigis_a1'], haigis_a2=arrays['haigis_a2'],
+        )
+        shape = (len(self), al.shape[1])
+        return {name: np.broadcast_to(values, shape) for name, values in results.items()}
+
+    def compare_lenses(self, df: pd.DataFrame, haigis_acd=ASSUMED_ACD, fixed_elp: float = FIXED_ELP) -> pd.DataFrame:
+        """
+        Calcula todas as lentes para os olhos de `df` (formato de `setup_dataframe`).
+
+        Returns:
+            pd.DataFrame: Uma linha por (lente, olho), com a biometria e as colunas das fórmulas.
+        """
+        keratometry = (df['meas_k1'].to_numpy(dtype=float) + df['meas_k2'].to_numpy(dtype=float)) / 2
+        results = self.calculate(df['axial_length'].to_numpy(dtype=float), keratometry, haigis_acd, fixed_elp)
+
+        biometry = df[['eye_side', 'axial_length', 'meas_k1', 'meas_k2', 'optical_acd']]
+        out = pd.concat([biometry] * len(self), ignore_index=True)
+        out.insert(0, 'iol_model', np.repeat(self.names, len(df)))
+        out.insert(1, 'a_constant', np.repeat(self._arrays['a_constant'][:, 0], len(df)))
+        for name in FORMULA_NAMES:
+            out[name] = results[name].reshape(-1)
+        return out
+
+
+def main():
+    """Compara todas as lentes do catálogo para os olhos gerados por `setup_dataframe`."""
+    try:
+        catalog = IOLCatalog.from_csv(CATALOG_CSV)
+        print(f"Catálogo '{CATALOG_CSV}' carregado com {len(catalog)} lente(s).")
+    except FileNotFoundError:
+        catalog = IOLCatalog.from_a_constants({IOL: A_CONSTANT})
+        print(f"Catálogo '{CATALOG_CSV}' não encontrado; usando apenas {IOL} (A={A_CONSTANT}).")
+
+    from run_all_calculations import setup_dataframe  # Importa o pipeline (e o Selenium) só aqui
+    df = setup_dataframe(test_mode=False)
+    results = catalog.compare_lenses(df).round(2)
+    results.to_csv(OUTPUT_CSV, index=False, encoding='utf-8')
+    print(f"Resultados de {len(catalog)} lente(s) x {len(df)} olhos salvos em '{OUTPUT_CSV}'.")
+
+
+if __name__ == "__main__":
+    main()
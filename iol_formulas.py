@@ -25,6 +25,33 @@ CONSTANTS = {
     }
 }
 
+# --- Valores Padrão do Pipeline ---
+# Lente e constantes usadas por `run_all_calculations.py`. Ficam aqui, e não no pipeline,
+# para que os módulos que só calculam fórmulas não importem o Selenium.
+IOL = 'Alcon SN60WF'
+A_CONSTANT = 118.99
+ASSUMED_ACD = 3.5 # Valor padrão para a fórmula Haigis
+FIXED_ELP = 4.0 # Valor padrão para a fórmula Colenbrander
+
+# Grade de biometria de `setup_dataframe`: do olho curto ao olho longo
+SHORT_EYE_AL = 20.0
+SHORT_EYE_K1 = 48
+SHORT_EYE_K2 = 46
+SHORT_EYE_ACD = 2.8
+SHORT_EYE_LT = 4.8
+LONG_EYE_AL = 28.2
+LONG_EYE_K1 = 42
+LONG_EYE_K2 = 40
+LONG_EYE_ACD = 4.5
+LONG_EYE_LT = 4.2
+AL_STEPS = 0.2
+
+# Colunas de resultado do CSV consolidado, na ordem em que são gravadas
+FORMULA_OUTPUT_COLUMNS = [
+    'colenbrander', 'srk', 'hoffer', 'srk_2',
+    'holladay_1', 'hoffer_q', 'srk_t', 'haigis', 'ray_tracing', 'barrett_universal_ii'
+]
+
 
 class IOLFormulas:
     """
@@ -422,6 +449,8 @@ class IOLFormulas:
     
     # As fórmulas de Olsen e Holladay 2 não são fornecidas no código-fonte.
     # Elas requerem mais parâmetros e cálculos proprietários complexos.
+    # Um cálculo por traçado de raios com lente espessa (ACD + C·LT) está em
+    # ray_tracing_formulas.py.
     
     def _haigis_elp(
         self,
@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: iol_formulas_vectorized.py
+
+"""
+Versão vetorizada (NumPy) das fórmulas de `iol_formulas.py`.
+
+Cada método espelha o método de mesmo nome em `IOLFormulas`, mas aceita arrays
+(com broadcasting) e retorna um `np.ndarray` em vez do dicionário de resultado.
+Onde a versão escalar retorna NaN, a vetorizada retorna NaN no elemento
+correspondente. As aproximações de constantes são as mesmas, porém sem avisos.
+
+Os termos que limitam o domínio de cada fórmula (raízes quadradas e denominadores)
+ficam em métodos próprios (`_holladay_1_sagittal_term`, `_srk_t_denominators` etc.),
+usados tanto pelas fórmulas quanto por `biometry_validation.py`.
+"""
+
+from typing import Dict
+
+import numpy as np
+
+from iol_formulas import CONSTANTS
+
+ArrayLike = np.ndarray
+
+# Colunas de saída das fórmulas locais, na ordem usada pelo pipeline.
+FORMULA_NAMES = (
+    'colenbrander', 'srk', 'hoffer', 'srk_2',
+    'holladay_1', 'hoffer_q', 'srk_t', 'haigis',
+)
+
+# Índices de refração próprios de cada fórmula (os de `CONSTANTS["biometry"]` são os da
+# ceratometria e do humor aquoso do pipeline), usados também por `parallel_kernels.py`.
+HOLLADAY_1_CORNEAL_INDEX = 4 / 3
+SRK_T_CORNEAL_INDEX = 1.333
+HAIGIS_CORNEAL_INDEX = 1.3315
+FORMULA_AQUEOUS_INDEX = 1.336  # SRK/T, Hoffer Q e Haigis
+SRK_T_RADIUS_NUMERATOR = 337.5  # R = 337.5 / K (mm)
+
+
+def _nan_where(condition: ArrayLike, values: ArrayLike) -> np.ndarray:
+    """Substitui por NaN os elementos onde `condition` é verdadeira."""
+    return np.where(condition, np.nan, values)
+
+
+# --- Conversões de constantes (as mesmas aproximações de `IOLFormulas`) ---
+def pacd_from_a_constant(a_constant: ArrayLike) -> np.ndarray:
+    """pACD de Hoffer/Hoffer Q a partir da constante A (aproximação Holladay/SRK)."""
+    return (0.58357 * np.asarray(a_constant, dtype=float)) - 63.896
+
+
+def surgeon_factor_from_a_constant(a_constant: ArrayLike) -> np.ndarray:
+    """Fator do cirurgião (S) de Holladay 1 a partir da constante A."""
+    return CONSTANTS["iol"]["a_to_s_a0"] + CONSTANTS["iol"]["a_to_s_a1"] * np.asarray(a_constant, dtype=float)
+
+
+def srk_t_acd_from_a_constant(a_constant: ArrayLike) -> np.ndarray:
+    """Constante ACD da SRK/T a partir da constante A."""
+    return CONSTANTS["iol"]["a_to_acd_a0"] + CONSTANTS["iol"]["a_to_acd_a1"] * np.asarray(a_constant, dtype=float)
+
+
+def haigis_a0_from_a_constant(a_constant: ArrayLike, a1: float = 0.4, a2: float = 0.1) -> np.ndarray:
+    """Constante a0 de Haigis a partir da constante A (via pACD)."""
+    pacd = CONSTANTS["iol"]["a_to_acd_a0"] + np.asarray(a_constant, dtype=float) * CONSTANTS["iol"]["a_to_acd_a1"]
+    return pacd - (a1 * 3.37) - (a2 * 23.39)
+
+
+class VectorizedIOLFormulas:
+    """
+    As fórmulas de `IOLFormulas` avaliadas sobre arrays inteiros de uma só vez.
+    Todos os argumentos aceitam escalares ou arrays compatíveis por broadcasting.
+    """
+
+    # ==========================================================================
+    # ## Fórmulas de Primeira Geração
+    # ==========================================================================
+
+    def _vergence_denominators(self, axial_length, keratometry, elp):
+        """Denominadores de Colenbrander e Hoffer: (L - ELP - 0.05, 1336 / K - ELP - 0.05)."""
+        al, k, elp = (np.asarray(x, dtype=float) for x in (axial_length, keratometry, elp))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return al - elp - 0.05, 1336 / k - elp - 0.05
+
+    def colenbrander_power(self, axial_length, keratometry, elp) -> np.ndarray:
+        k = np.asarray(keratometry, dtype=float)
+        eye_term, corneal_term = self._vergence_denominators(axial_length, k, elp)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            power = (1336 / eye_term) - (1336 / corneal_term)
+        return _nan_where((k == 0) | (eye_term == 0) | (corneal_term == 0), power)
+
+    def srk_power(self, axial_length, keratometry, a_constant) -> np.ndarray:
+        return np.asarray(a_constant, dtype=float) - (2.5 * np.asarray(axial_length, dtype=float)) \
+            - (0.9 * np.asarray(keratometry, dtype=float))
+
+    # ==========================================================================
+    # ## Fórmulas de Segunda Geração
+    # ==========================================================================
+
+    def _hoffer_elp(self, axial_length, pacd=None, a_constant=None) -> np.ndarray:
+        if pacd is None:
+            if a_constant is None:
+                raise ValueError("Either 'pacd' or 'a_constant' must be provided for Hoffer ELP.")
+            pacd = pacd_from_a_constant(a_constant)
+        return 0.292 * np.asarray(axial_length, dtype=float) - 2.93 + (np.asarray(pacd, dtype=float) - 3.94)
+
+    def hoffer_power(self, axial_length, keratometry, elp) -> np.ndarray:
+        return self.colenbrander_power(axial_length, keratometry, elp)
+
+    def srk_2_power(self, axial_length, keratometry, a_constant) -> np.ndarray:
+        al = np.asarray(axial_length, dtype=float)
+        a_constant = np.asarray(a_constant, dtype=float)
+        # Ajusta a constante A com base no comprimento axial
+        adjustment = np.select(
+            [al < 20.0, al < 21.0, al < 22.0, al >= 24.5],
+            [3.0, 2.0, 1.0, -0.5],
+            default=0.0,
+        )
+        return (a_constant + adjustment) - (2.5 * al) - (0.9 * np.asarray(keratometry, dtype=float))
+
+    # ==========================================================================
+    # ## Fórmulas de Terceira Geração
+    # ==========================================================================
+
+    def _holladay_1_sagittal_term(self, axial_length, radius_of_curvature) -> np.ndarray:
+        """R² - AG²/4 de Holladay 1; a aACD só é definida onde o termo não é negativo."""
+        r = np.asarray(radius_of_curvature, dtype=float)
+        corneal_dome_width_ag = np.asarray(axial_length, dtype=float) * 12.5 / 23.45
+        with np.errstate(invalid='ignore'):
+            return r**2 - (corneal_dome_width_ag**2 / 4)
+
+    def _holladay_1_elp(
+        self,
+        axial_length,
+        keratometry=None,
+        radius_of_curvature=None,
+        surgeon_factor=None,
+        a_constant=None,
+        pacd=None,
+        corneal_index: float = CONSTANTS["biometry"]["corneal_index"],
+    ) -> np.ndarray:
+        if radius_of_curvature is None:
+            if keratometry is None:
+                raise ValueError("Either 'keratometry' or 'radius_of_curvature' is required.")
+            with np.errstate(divide='ignore'):
+                radius_of_curvature = 1000 * (corneal_index - 1) / np.asarray(keratometry, dtype=float)
+        if surgeon_factor is None:
+            if a_constant is not None:
+                surgeon_factor = surgeon_factor_from_a_constant(a_constant)
+            elif pacd is not None:
+                surgeon_factor = CONSTANTS["iol"]["pacd_to_s_a0"] + CONSTANTS["iol"]["pacd_to_s_a1"] * np.asarray(pacd, dtype=float)
+            else:
+                raise ValueError("One of 'surgeon_factor', 'a_constant', or 'pacd' must be provided.")
+
+        r = np.asarray(radius_of_curvature, dtype=float)
+        temp_calc = self._holladay_1_sagittal_term(axial_length, r)
+        with np.errstate(invalid='ignore'):
+            aacd = 0.56 + r - np.sqrt(temp_calc)
+        return _nan_where(temp_calc < 0, aacd + surgeon_factor)
+
+    def _holladay_1_denominator(
+        self,
+        axial_length,
+        elp,
+        radius_of_curvature,
+        aqueous_index: float = CONSTANTS["biometry"]["aqueous_index"],
+        retinal_thickness: float = 0.2,
+        refractive_target=0.0,
+        vertex_distance: float = 13.0,
+    ) -> np.ndarray:
+        """Denominador da potência de Holladay 1."""
+        r = np.asarray(radius_of_curvature, dtype=float)
+        elp = np.asarray(elp, dtype=float)
+        alm = np.asarray(axial_length, dtype=float) + retinal_thickness
+        nc = HOLLADAY_1_CORNEAL_INDEX
+        term_elp = aqueous_index * r - (nc - 1) * elp
+        return (alm - elp) * (term_elp - 0.001 * refractive_target * (vertex_distance * term_elp + elp * r))
+
+    def holladay_1_power(
+        self,
+        axial_length,
+        elp,
+        keratometry=None,
+        radius_of_curvature=None,
+        corneal_index: float = CONSTANTS["biometry"]["corneal_index"],
+        aqueous_index: float = CONSTANTS["biometry"]["aqueous_index"],
+        retinal_thickness: float = 0.2,
+        refractive_target=0.0,
+        vertex_distance: float = 13.0,
+    ) -> np.ndarray:
+        if radius_of_curvature is None:
+            if keratometry is None:
+                raise ValueError("Either 'keratometry' or 'radius_of_curvature' is required.")
+            with np.errstate(divide='ignore'):
+                radius_of_curvature = 1000 * (corneal_index - 1) / np.asarray(keratometry, dtype=float)
+
+        r = np.asarray(radius_of_curvature, dtype=float)
+        alm = np.asarray(axial_length, dtype=float) + retinal_thickness
+        nc = HOLLADAY_1_CORNEAL_INDEX
+        term_alm = aqueous_index * r - (nc - 1) * alm
+        denominator = self._holladay_1_denominator(
+            axial_length, elp, r, aqueous_index, retinal_thickness, refractive_target, vertex_distance
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            numerator = 1000 * aqueous_index * (term_alm - 0.001 * refractive_target * (vertex_distance * term_alm + alm * r))
+            power = numerator / denominator
+        return _nan_where(denominator == 0, power)
+
+    def _hoffer_q_elp(self, axial_length, keratometry, pacd=None, a_constant=None) -> np.ndarray:
+        if pacd is None:
+            if a_constant is None:
+                raise ValueError("Either 'pacd' or 'a_constant' must be provided for Hoffer Q ELP.")
+            pacd = pacd_from_a_constant(a_constant)
+
+        al = np.asarray(axial_length, dtype=float)
+        k = np.asarray(keratometry, dtype=float)
+        long_eye = al > 23.0
+        m = np.where(long_eye, -1.0, 1.0)
+        g = np.where(long_eye, 23.5, 28.0)
+        # Limita o comprimento axial ao intervalo efetivo da fórmula
+        l_clamped = np.clip(al, 18.5, 31.0)
+        return (np.asarray(pacd, dtype=float)
+                + 0.3 * (l_clamped - 23.5)
+                + np.tan(np.radians(k))**2
+                + (0.1 * m * (23.5 - l_clamped)**2 * np.tan(np.radians(0.1 * (g - l_clamped)**2)))
+                - 0.99166)
+
+    def _hoffer_q_denominators(
+        self, axial_length, keratometry, elp, refractive_target=0.0, vertex_distance: float = 13.0
+    ):
+        """Denominadores de Hoffer Q: (L - ELP - 0.05, 1.336 / (K + R) - (ELP + 0.05) / 1000)."""
+        al, k, elp = (np.asarray(x, dtype=float) for x in (axial_length, keratometry, elp))
+        r = refractive_target / (1 - (0.001 * vertex_distance * refractive_target))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return al - elp - 0.05, (FORMULA_AQUEOUS_INDEX / (k + r)) - ((elp + 0.05) / 1000)
+
+    def hoffer_q_power(
+        self, axial_length, keratometry, elp, refractive_target=0.0, vertex_distance: float = 13.0
+    ) -> np.ndarray:
+        eye_term, denom = self._hoffer_q_denominators(axial_length, keratometry, elp, refractive_target, vertex_distance)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            power = 1336 / eye_term - (FORMULA_AQUEOUS_INDEX / denom)
+        # K + R = 0 torna o termo corneano infinito (a versão escalar falha com divisão por zero)
+        return _nan_where((eye_term == 0) | (denom == 0) | np.isinf(denom), power)
+
+    def _srk_t_corneal_height_term(self, axial_length, keratometry) -> np.ndarray:
+        """R² - Cw²/4 da SRK/T; a altura da córnea só é definida onde o termo não é negativo."""
+        al = np.asarray(axial_length, dtype=float)
+        k = np.asarray(keratometry, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            radius_of_curvature = SRK_T_RADIUS_NUMERATOR / k
+            # Comprimento axial corrigido
+            l_corr = np.where(al > 24.2, -3.446 + (1.715 * al) - (0.0237 * al**2), al)
+            cw = -5.41 + (0.58412 * l_corr) + (0.098 * k)
+            return radius_of_curvature**2 - cw**2 / 4
+
+    def _srk_t_elp(self, axial_length, keratometry, acd_const=None, a_constant=None) -> np.ndarray:
+        if acd_const is None:
+            if a_constant is None:
+                raise ValueError("Either 'acd_const' or 'a_constant' must be provided for SRK/T.")
+            acd_const = srk_t_acd_from_a_constant(a_constant)
+
+        k = np.asarray(keratometry, dtype=float)
+        temp = self._srk_t_corneal_height_term(axial_length, k)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            radius_of_curvature = SRK_T_RADIUS_NUMERATOR / k
+            h = radius_of_curvature - np.sqrt(temp)
+        offset = np.asarray(acd_const, dtype=float) - 3.336
+        return _nan_where(temp < 0, h + offset)
+
+    def _srk_t_denominators(self, axial_length, keratometry, elp):
+        """Denominadores da SRK/T: (L_opt - ELP, na·R - (nc - 1)·ELP)."""
+        al, k, elp = (np.asarray(x, dtype=float) for x in (axial_length, keratometry, elp))
+        na = FORMULA_AQUEOUS_INDEX
+        ncm1 = SRK_T_CORNEAL_INDEX - 1.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            radius_of_curvature = SRK_T_RADIUS_NUMERATOR / k
+            l_opt = al + (0.65696 - (0.02029 * al))
+            return l_opt - elp, na * radius_of_curvature - ncm1 * elp
+
+    def srk_t_power(self, axial_length, keratometry, elp) -> np.ndarray:
+        al, k = (np.asarray(x, dtype=float) for x in (axial_length, keratometry))
+        na = FORMULA_AQUEOUS_INDEX
+        ncm1 = SRK_T_CORNEAL_INDEX - 1.0
+        denom_part1, denom_part2 = self._srk_t_denominators(al, k, elp)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            radius_of_curvature = SRK_T_RADIUS_NUMERATOR / k
+            l_opt = al + (0.65696 - (0.02029 * al))
+            power = 1000 * na * (na * radius_of_curvature - ncm1 * l_opt) / (denom_part1 * denom_part2)
+        return _nan_where((denom_part1 == 0) | (denom_part2 == 0), power)
+
+    # ==========================================================================
+    # ## Fórmulas de Quarta Geração
+    # ==========================================================================
+
+    def _haigis_elp(
+        self, axial_length, acd=3.37, a0=None, a1: float = 0.4, a2: float = 0.1, pacd=None, a_constant=None
+    ) -> np.ndarray:
+        if a0 is None:
+            if pacd is None:
+                if a_constant is None:
+                    raise ValueError("One of 'a0', 'pacd', or 'a_constant' must be provided for Haigis.")
+                pacd = CONSTANTS["iol"]["a_to_acd_a0"] + np.asarray(a_constant, dtype=float) * CONSTANTS["iol"]["a_to_acd_a1"]
+            a0 = np.asarray(pacd, dtype=float) - (a1 * 3.37) - (a2 * 23.39)
+        return np.asarray(a0, dtype=float) + (a1 * np.asarray(acd, dtype=float)) + (a2 * np.asarray(axial_length, dtype=float))
+
+    def _haigis_denominators(
+        self, axial_length, radius_of_curvature, elp, refractive_target=0.0, vertex_distance: float = 12.0
+    ):
+        """Denominadores de Haigis: (1 - REF·dBC, L - ELP, n / z - ELP), com distâncias em metros."""
+        al, r, elp = (np.asarray(x, dtype=float) for x in (axial_length, radius_of_curvature, elp))
+        nc = HAIGIS_CORNEAL_INDEX
+        n = FORMULA_AQUEOUS_INDEX
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dc = (nc - 1.0) / (r / 1000)
+            spectacle_term = 1.0 - refractive_target * (vertex_distance / 1000)
+            z = dc + refractive_target / spectacle_term
+            return spectacle_term, al / 1000 - elp / 1000, n / z - elp / 1000
+
+    def haigis_power(
+        self, axial_length, radius_of_curvature, elp, refractive_target=0.0, vertex_distance: float = 12.0
+    ) -> np.ndarray:
+        n = FORMULA_AQUEOUS_INDEX
+        r = np.asarray(radius_of_curvature, dtype=float)
+        spectacle_term, eye_term, corneal_term = self._haigis_denominators(
+            axial_length, r, elp, refractive_target, vertex_distance
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            power = n / eye_term - n / corneal_term
+        # K <= 0 dá raio infinito ou negativo; com dc = 0 a potência seria finita, mas sem sentido
+        invalid_radius = ~np.isfinite(r) | (r <= 0)
+        return _nan_where(invalid_radius | (spectacle_term == 0) | (eye_term == 0) | (corneal_term == 0), power)
+
+
+def compute_all_formulas(
+    axial_length,
+    keratometry,
+    a_constant,
+    haigis_acd,
+    fixed_elp,
+    corneal_index: float = CONSTANTS["biometry"]["corneal_index"],
+    *,
+    pacd=None,
+    surgeon_factor=None,
+    srk_t_acd=None,
+    haigis_a0=None,
+    haigis_a1=0.4,
+    haigis_a2=0.1,
+) -> Dict[str, np.ndarray]:
+    """
+    Avalia todas as fórmulas locais como o pipeline de `run_all_calculations.py`:
+    Colenbrander com ELP fixo, as demais a partir da constante A e Haigis com `haigis_acd`.
+
+    As constantes derivadas (pACD, fator do cirurgião, ACD da SRK/T e a0 de Haigis)
+    podem ser fornecidas já calculadas, como faz `IOLCatalog`; as ausentes são
+    aproximadas a partir da constante A.
+
+    Args:
+        axial_length: Comprimento axial (mm).
+        keratometry: Ceratometria média (D).
+        a_constant: Constante A da LIO.
+        haigis_acd: ACD pré-operatória usada pela fórmula de Haigis (mm).
+        fixed_elp: ELP fixo da fórmula de Colenbrander (mm).
+        corneal_index (float): Índice usado para converter K em raio para Haigis.
+        pacd, surgeon_factor, srk_t_acd, haigis_a0, haigis_a1, haigis_a2:
+            Constantes derivadas opcionais (Hoffer/Hoffer Q, Holladay 1, SRK/T e Haigis).
+
+    Returns:
+        Dict[str, np.ndarray]: Potência calculada por fórmula, na ordem de `FORMULA_NAMES`.
+    """
+    calculator = VectorizedIOLFormulas()
+    al = np.asarray(axial_length, dtype=float)
+    k = np.asarray(keratometry, dtype=float)
+    with np.errstate(divide='ignore'):
+        r = (corneal_index - 1) * 1000 / k
+
+    hoffer_elp = calculator._hoffer_elp(al, pacd=pacd, a_constant=a_constant)
+    holladay_1_elp = calculator._holladay_1_elp(al, k, surgeon_factor=surgeon_factor, a_constant=a_constant)
+    hoffer_q_elp = calculator._hoffer_q_elp(al, k, pacd=pacd, a_constant=a_constant)
+    srk_t_elp = calculator._srk_t_elp(al, k, acd_const=srk_t_acd, a_constant=a_constant)
+    haigis_elp = calculator._haigis_elp(
+        al, acd=haigis_acd, a0=haigis_a0, a1=haigis_a1, a2=haigis_a2, a_constant=a_constant
+    )
+    return {
+        'colenbrander': calculator.colenbrander_power(al, k, fixed_elp),
+        'srk': calculator.srk_power(al, k, a_constant),
+        'hoffer': calculator.hoffer_power(al, k, hoffer_elp),
+        'srk_2': calculator.srk_2_power(al, k, a_constant),
+        'holladay_1': calculator.holladay_1_power(al, elp=holladay_1_elp, keratometry=k),
+        'hoffer_q': calculator.hoffer_q_power(al, k, hoffer_q_elp),
+        'srk_t': calculator.srk_t_power(al, k, srk_t_elp),
+        'haigis': calculator.haigis_power(al, r, haigis_elp),
+    }
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: iol_lookup_table.py
+
+"""
+Tabelas pré-calculadas das fórmulas de LIO em arquivo binário mapeado em memória.
+
+`build_lookup_table` avalia todas as fórmulas locais em uma grade quantizada de
+(lente, AL, K, ACD) e grava o resultado em um arquivo com um pequeno cabeçalho.
+`IOLLookupTable` abre o arquivo sob demanda e responde consultas por aritmética de
+índices, sem executar nenhuma fórmula; o custo de abertura e de cada consulta não
+depende do tamanho da tabela.
+
+Só a fórmula de Haigis usa a ACD, então o arquivo tem duas tabelas: as demais fórmulas
+em (lente, AL, K, fórmula) e Haigis em (lente, AL, K, ACD, fórmula). Repetir as fórmulas
+independentes da ACD em cada ponto do eixo de ACD multiplicaria o arquivo por ~8.
+
+O cabeçalho guarda todas as constantes de cada lente (constante A e derivadas), as
+mesmas usadas no cálculo da tabela, inclusive os valores otimizados do catálogo.
+
+Formato do arquivo:
+    MAGIC (8 bytes) | tamanho do cabeçalho (uint64, little-endian) | cabeçalho JSON |
+    preenchimento até DATA_ALIGNMENT | tabela sem ACD (float32) |
+    preenchimento até DATA_ALIGNMENT | tabela com ACD (float32)
+"""
+
+import json
+import struct
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from iol_catalog import CATALOG_CSV, OVERRIDE_COLUMNS, IOLCatalog, LensConstants
+from iol_formulas import IOL, A_CONSTANT, FIXED_ELP
+from iol_formulas_vectorized import FORMULA_NAMES, compute_all_formulas
+
+# --- Configurações ---
+OUTPUT_TABLE = 'tabela_formulas_lio.bin'
+MAGIC = b'IOLLUT03'
+DATA_ALIGNMENT = 4096
+DTYPE = np.dtype('<f4')
+# Número de fatias de AL calculadas por vez durante a construção (limita a memória usada).
+AL_CHUNK = 64
+# Fórmulas que dependem da ACD; ficam na tabela com o eixo de ACD.
+ACD_FORMULAS = ('haigis',)
+
+
+@dataclass(frozen=True)
+class GridAxis:
+    """Um eixo da grade: `count` pontos a partir de `start`, espaçados de `step`."""
+    start: float
+    step: float
+    count: int
+
+    @classmethod
+    def from_range(cls, start: float, stop: float, step: float) -> 'GridAxis':
+        """Cria um eixo de `start` até `stop` (inclusive) com passo `step`."""
+        return cls(start, step, int(round((stop - start) / step)) + 1)
+
+    def values(self) -> np.ndarray:
+        return self.start + self.step * np.arange(self.count)
+
+    def position(self, value: float) -> float:
+        """Posição fracionária de `value` na grade."""
+        return (value - self.start) / self.step
+
+
+# Resolução padrão dos biômetros: AL em 0.01 mm, K e ACD em 0.05.
+DEFAULT_AL_AXIS = GridAxis.from_range(18.0, 32.0, 0.01)
+DEFAULT_K_AXIS = GridAxis.from_range(36.0, 52.0, 0.05)
+DEFAULT_ACD_AXIS = GridAxis.from_range(2.0, 5.0, 0.05)
+
+
+def _align(offset: int) -> int:
+    return -(-offset // DATA_ALIGNMENT) * DATA_ALIGNMENT
+
+
+def _lens_header(lens: LensConstants) -> dict:
+    entry = {'name': lens.iol_model, 'a_constant': lens.a_constant}
+    entry.update((field, getattr(lens, field)) for field in OVERRIDE_COLUMNS)
+    entry['optimized'] = list(lens.optimized)
+    return entry
+
+
+def build_lookup_table(
+    path: str,
+    lenses: Union[Dict[str, float], IOLCatalog],
+    al_axis: GridAxis = DEFAULT_AL_AXIS,
+    k_axis: GridAxis = DEFAULT_K_AXIS,
+    acd_axis: GridAxis = DEFAULT_ACD_AXIS,
+    fixed_elp: float = FIXED_ELP,
+) -> int:
+    """
+    Avalia todas as fórmulas locais na grade e grava a tabela em `path`.
+
+    Os valores são gravados diretamente no arquivo mapeado em memória, em blocos de
+    `AL_CHUNK` fatias de AL, de modo que a memória usada não cresce com a tabela.
+
+    Args:
+        path (str): Caminho do arquivo de saída.
+        lenses (Union[Dict[str, float], IOLCatalog]): Nome da lente -> constante A, ou um
+            catálogo, cujas constantes otimizadas são usadas.
+        al_axis (GridAxis): Eixo do comprimento axial (mm).
+        k_axis (GridAxis): Eixo da ceratometria média (D).
+        acd_axis (GridAxis): Eixo da ACD pré-operatória (mm), usada pela fórmula de Haigis.
+        fixed_elp (float): ELP fixo da fórmula de Colenbrander.
+
+    Returns:
+        int: Tamanho do arquivo gerado, em bytes.
+    """
+    catalog = lenses if isinstance(lenses, IOLCatalog) else IOLCatalog.from_a_constants(lenses)
+    lens_names = catalog.names
+    axes = {'axial_length': al_axis, 'keratometry': k_axis, 'acd': acd_axis}
+    plane_formulas = [name for name in FORMULA_NAMES if name not in ACD_FORMULAS]
+    acd_formulas = [name for name in FORMULA_NAMES if name in ACD_FORMULAS]
+    tables = {
+        'plane': {'formulas': plane_formulas,
+                  'shape': [len(lens_names), al_axis.count, k_axis.count, len(plane_formulas)]},
+        'acd': {'formulas': acd_formulas,
+                'shape': [len(lens_names), al_axis.count, k_axis.count, acd_axis.count, len(acd_formulas)]},
+    }
+
+    header = {
+        'formulas': list(FORMULA_NAMES),
+        'lenses': [_lens_header(catalog.lens(name)) for name in lens_names],
+        'axes': {name: [axis.start, axis.step, axis.count] for name, axis in axes.items()},
+        'fixed_elp': fixed_elp,
+        'dtype': DTYPE.str,
+        'tables': tables,
+    }
+    # Os deslocamentos dos dados fazem parte do cabeçalho; valores provisórios maiores
+    # garantem que o cabeçalho final caiba antes do início dos dados.
+    for table in tables.values():
+        table['offset'] = 10**15
+    end = len(MAGIC) + 8 + len(json.dumps(header).encode('utf-8'))
+    for table in tables.values():
+        table['offset'] = _align(end)
+        end = table['offset'] + int(np.prod(table['shape'])) * DTYPE.itemsize
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        f.truncate(end)
+
+    plane, by_acd = (np.memmap(path, dtype=DTYPE, mode='r+', offset=table['offset'], shape=tuple(table['shape']))
+                     for table in tables.values())
+    # AL no eixo 0, K no eixo 1 e ACD no eixo 2: as fórmulas sem ACD saem com o eixo 2 de
+    # tamanho 1 e só Haigis é avaliada em toda a grade de ACD.
+    k = k_axis.values()[np.newaxis, :, np.newaxis]
+    acd = acd_axis.values()[np.newaxis, np.newaxis, :]
+    al_values = al_axis.values()
+    for lens_index, name in enumerate(lens_names):
+        lens = catalog.lens(name)
+        for start in range(0, al_axis.count, AL_CHUNK):
+            al = al_values[start:start + AL_CHUNK, np.newaxis, np.newaxis]
+            results = compute_all_formulas(
+                al, k, lens.a_constant, haigis_acd=acd, fixed_elp=fixed_elp,
+                pacd=lens.pacd, surgeon_factor=lens.surgeon_factor, srk_t_acd=lens.srk_t_acd,
+                haigis_a0=lens.haigis_a0, haigis_a1=lens.haigis_a1, haigis_a2=lens.haigis_a2,
+            )
+            block = plane[lens_index, start:start + AL_CHUNK]
+            for formula_index, formula_name in enumerate(plane_formulas):
+                block[..., formula_index] = results[formula_name][..., 0]
+            block = by_acd[lens_index, start:start + AL_CHUNK]
+            for formula_index, formula_name in enumerate(acd_formulas):
+                block[..., formula_index] = results[formula_name]
+    plane.flush()
+    by_acd.flush()
+    del plane, by_acd
+    return end
+
+
+class IOLLookupTable:
+    """
+    Consulta uma tabela gerada por `build_lookup_table`.
+
+    Apenas o cabeçalho é lido na construção; os dados são mapeados em memória na
+    primeira consulta e só as páginas efetivamente acessadas são lidas do disco.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"'{path}' is not an IOL lookup table.")
+            (header_length,) = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(header_length).decode('utf-8'))
+
+        self.formulas: List[str] = header['formulas']
+        self.lenses: Dict[str, float] = {lens['name']: lens['a_constant'] for lens in header['lenses']}
+        # Constantes com que a tabela foi calculada, incluindo as derivadas
+        self.lens_constants: Dict[str, LensConstants] = {
+            lens['name']: LensConstants(
+                iol_model=lens['name'], a_constant=lens['a_constant'],
+                optimized=tuple(lens['optimized']), **{field: lens[field] for field in OVERRIDE_COLUMNS},
+            )
+            for lens in header['lenses']
+        }
+        self._lens_index = {name: i for i, name in enumerate(self.lenses)}
+        self.axes: Dict[str, GridAxis] = {name: GridAxis(*values) for name, values in header['axes'].items()}
+        self.fixed_elp: float = header['fixed_elp']
+        self._dtype = np.dtype(header['dtype'])
+        self._tables: Dict[str, dict] = header['tables']
+        self._mapped: Optional[Dict[str, np.memmap]] = None
+
+    def _data(self) -> Dict[str, np.memmap]:
+        if self._mapped is None:
+            self._mapped = {
+                name: np.memmap(self.path, dtype=self._dtype, mode='r', offset=table['offset'],
+                                shape=tuple(table['shape']))
+                for name, table in self._tables.items()
+            }
+        return self._mapped
+
+    def _lens(self, lens: str) -> int:
+        try:
+            return self._lens_index[lens]
+        except KeyError:
+            raise ValueError(f"Lens '{lens}' is not in the lookup table.") from None
+
+    def _positions(self, axial_length: float, keratometry: float, acd: float) -> List[float]:
+        positions = []
+        for name, value in zip(('axial_length', 'keratometry', 'acd'), (axial_length, keratometry, acd)):
+            axis = self.axes[name]
+            position = axis.position(value)
+            # Tolerância de meio passo nas bordas, como no arredondamento ao ponto mais próximo.
+            if not -0.5 <= position <= axis.count - 0.5:
+                raise ValueError(
+                    f"{name}={value} is outside the table range "
+                    f"[{axis.start}, {axis.start + axis.step * (axis.count - 1)}]."
+                )
+            positions.append(position)
+        return positions
+
+    def query(
+        self,
+        lens: str,
+        axial_length: float,
+        keratometry: float,
+        acd: float,
+        interpolate: bool = False,
+    ) -> Dict[str, float]:
+        """
+        Retorna a potência de cada fórmula para um olho.
+
+        Args:
+            lens (str): Nome da lente, como gravado na tabela.
+            axial_length (float): Comprimento axial (mm).
+            keratometry (float): Ceratometria média (D).
+            acd (float): ACD pré-operatória (mm); só afeta a fórmula de Haigis.
+            interpolate (bool): Se True, interpola linearmente entre os pontos vizinhos da
+                                grade (4 em AL x K; 8 com a ACD, para Haigis); caso
+                                contrário, usa o ponto mais próximo.
+
+        Returns:
+            Dict[str, float]: Potência da LIO (D) por fórmula.
+        """
+        lens_index = self._lens(lens)
+        positions = self._positions(axial_length, keratometry, acd)
+        data = self._data()
+
+        results = {}
+        for name, table in self._tables.items():
+            # A tabela sem ACD usa só os eixos de AL e K.
+            n_axes = len(table['shape']) - 2
+            cells = data[name][lens_index]
+            if not interpolate:
+                index = tuple(int(round(min(max(p, 0), axis.count - 1)))
+                              for p, axis in zip(positions[:n_axes], self.axes.values()))
+                values = np.asarray(cells[index], dtype=float)
+            else:
+                lower, weights = [], []
+                for p, axis in zip(positions[:n_axes], self.axes.values()):
+                    base = int(np.floor(min(max(p, 0), axis.count - 1)))
+                    base = min(base, max(axis.count - 2, 0))
+                    lower.append(base)
+                    weights.append(min(max(p - base, 0.0), 1.0))
+                # Quadrado (2x2) ou cubo (2x2x2) em torno do ponto, reduzido um eixo por vez.
+                cube = np.asarray(cells[tuple(slice(b, b + 2) for b in lower)], dtype=float)
+                for weight in weights:
+                    cube = cube[0] * (1 - weight) + cube[-1] * weight
+                values = cube
+            results.update(zip(table['formulas'], values.tolist()))
+        return {formula: results[formula] for formula in self.formulas}
+
+    def close(self):
+        """Libera o mapeamento em memória; ele é recriado na próxima consulta."""
+        self._mapped = None
+
+
+def main():
+    """Gera a tabela padrão para as lentes do catálogo (ou só para a lente do pipeline)."""
+    try:
+        catalog = IOLCatalog.from_csv(CATALOG_CSV)
+    except FileNotFoundError:
+        catalog = IOLCatalog.from_a_constants({IOL: A_CONSTANT})
+    print(f"Gerando a tabela de consulta para {catalog.names}...")
+    size = build_lookup_table(OUTPUT_TABLE, catalog)
+    print(f"Tabela salva em '{OUTPUT_TABLE}' ({size / 1e6:.1f} MB).")
+
+    table = IOLLookupTable(OUTPUT_TABLE)
+    print("Exemplo (AL=23.5 mm, K=44.0 D, ACD=3.5 mm):")
+    for name, value in table.query(catalog.names[0], 23.5, 44.0, 3.5, interpolate=True).items():
+        print(f"  {name}: {value:.2f} D")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: outcome_evaluation.py
+
+"""
+Avaliação das fórmulas de LIO a partir de desfechos pós-operatórios.
+
+Para cada olho operado, a entrada traz a biometria, as colunas de resultado das fórmulas
+(potência para emetropia, como em `resultados_consolidados_iol.csv`), a potência da LIO
+implantada e o equivalente esférico pós-operatório. A refração prevista por uma fórmula
+é (P_fórmula - P_implantada) / R, em que R é a variação da potência da LIO por dioptria
+de refração no plano dos óculos, calculada olho a olho pelo traçado de raios com lente
+espessa. O erro de previsão é refração obtida - refração prevista (positivo = mais
+hipermétrope que o previsto).
+
+As métricas (erro médio, erro absoluto médio e mediano e % de olhos dentro de ±0.25,
+±0.5 e ±1.0 D) são calculadas para todas as fórmulas de uma vez, no total e por faixa de
+AL. Os intervalos de confiança vêm de bootstrap: cada reamostragem é representada pelo
+número de vezes que cada olho foi sorteado, de modo que médias e porcentagens são
+produtos de matrizes (reamostragens x olhos) @ (olhos x fórmulas). As reamostragens são
+divididas em blocos distribuídos entre processos; cada bloco tem sua própria semente,
+derivada de `SeedSequence(seed).spawn`, e o resultado não depende do número de processos.
+"""
+
+import argparse
+import json
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from formula_analytics import detect_formula_columns, json_list
+from ray_tracing_formulas import ThickLensEyeModel
+
+# --- Configurações ---
+INPUT_CSV = 'desfechos_pos_operatorios.csv'
+OUTPUT_REPORT = 'avaliacao_formulas_lio.json'
+IMPLANTED_POWER_COLUMN = 'iol_power'
+POSTOP_REFRACTION_COLUMN = 'postop_refraction'
+OUTCOME_COLUMNS = [IMPLANTED_POWER_COLUMN, POSTOP_REFRACTION_COLUMN]
+WITHIN_THRESHOLDS = (0.25, 0.5, 1.0)   # D
+# Faixas de AL usuais na literatura: curto, médio, médio-longo e longo.
+AL_STRATA_EDGES = (22.0, 24.5, 26.0)   # mm
+DEFAULT_POWER_RATIO = 1.5              # D de LIO por D de refração, sem espessura do cristalino
+N_RESAMPLES = 10_000
+CONFIDENCE = 0.95
+SEED = 20240601
+BLOCK_RESAMPLES = 500                  # Reamostragens por tarefa do pool
+BATCH_RESAMPLES = 32                   # Reamostragens por multiplicação de matrizes
+
+METRICS = ('me', 'mae', 'medae') + tuple(f'within_{t:g}' for t in WITHIN_THRESHOLDS)
+RAY_TRACING_MODEL = ThickLensEyeModel()
+
+
+def outcome_formula_columns(columns: Sequence[str]) -> List[str]:
+    """Colunas de fórmula do arquivo de desfechos (sem as colunas de desfecho)."""
+    return [col for col in detect_formula_columns(columns) if col not in OUTCOME_COLUMNS]
+
+
+def refraction_ratio(df: pd.DataFrame, model: ThickLensEyeModel = RAY_TRACING_MODEL) -> np.ndarray:
+    """
+    Variação da potência da LIO (D) por dioptria de refração, olho a olho, pela diferença
+    central da potência do traçado de raios entre os alvos -0.5 D e +0.5 D. Olhos sem
+    espessura do cristalino (ou fora do domínio do modelo) usam `DEFAULT_POWER_RATIO`.
+    """
+    if 'lens_thickness' not in df.columns:
+        return np.full(len(df), DEFAULT_POWER_RATIO)
+    biometry = (
+        df['axial_length'].to_numpy(dtype=float),
+        ((df['meas_k1'] + df['meas_k2']) / 2).to_numpy(dtype=float),
+        df['optical_acd'].to_numpy(dtype=float),
+        df['lens_thickness'].to_numpy(dtype=float),
+    )
+    ratio = model.emmetropic_power(*biometry, refractive_target=-0.5) - model.emmetropic_power(*biometry, refractive_target=0.5)
+    return np.where(np.isfinite(ratio) & (ratio > 0), ratio, DEFAULT_POWER_RATIO)
+
+
+def prediction_errors(df: pd.DataFrame, formulas: Sequence[str], ratio: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Erros de previsão (D) de cada fórmula, formato (olhos, fórmulas); NaN onde a fórmula
+    ou o desfecho não estão disponíveis.
+    """
+    if ratio is None:
+        ratio = refraction_ratio(df)
+    implanted = df[IMPLANTED_POWER_COLUMN].to_numpy(dtype=float)[:, np.newaxis]
+    actual = df[POSTOP_REFRACTION_COLUMN].to_numpy(dtype=float)[:, np.newaxis]
+    predicted = (df[list(formulas)].to_numpy(dtype=float) - implanted) / np.asarray(ratio, dtype=float)[:, np.newaxis]
+    return actual - predicted
+
+
+def strata_labels(edges: Sequence[float] = AL_STRATA_EDGES) -> List[str]:
+    bounds = [f'{e:g}' for e in edges]
+    return ([f'< {bounds[0]}'] + [f'{a}-{b}' for a, b in zip(bounds[:-1], bounds[1:])]
+            + [f'>= {bounds[-1]}'])
+
+
+def outcome_metrics(errors: np.ndarray) -> np.ndarray:
+    """
+    Métricas de cada fórmula sobre todos os olhos.
+
+    Args:
+        errors (np.ndarray): Erros de previsão, formato (olhos, fórmulas), NaN onde ausente.
+
+    Returns:
+        np.ndarray: Formato (métricas, fórmulas), na ordem de `METRICS`.
+    """
+    absolute = np.abs(errors)
+    valid = ~np.isnan(errors)
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # Fórmulas sem nenhum olho válido
+        count = valid.sum(axis=0)
+        result = [np.nanmean(errors, axis=0), np.nanmean(absolute, axis=0), np.nanmedian(absolute, axis=0)]
+        result += [100 * (absolute <= t).sum(axis=0) / count for t in WITHIN_THRESHOLDS]
+    return np.where(count > 0, np.stack(result), np.nan)
+
+
+def bootstrap_columns(errors: np.ndarray) -> np.ndarray:
+    """
+    Colunas somadas em cada reamostragem, formato (olhos, (3 + limiares) · fórmulas):
+    olho válido, erro, erro absoluto e erro absoluto dentro de cada limiar (0 onde ausente).
+    """
+    valid = ~np.isnan(errors)
+    filled = np.where(valid, errors, 0.0)
+    absolute = np.abs(filled)
+    return np.hstack([valid, filled, absolute] + [(absolute <= t) & valid for t in WITHIN_THRESHOLDS]).astype(float)
+
+
+def bootstrap_metrics(weights: np.ndarray, columns: np.ndarray, sorted_absolute: np.ndarray,
+                      rng: np.random.Generator) -> np.ndarray:
+    """
+    Métricas de cada fórmula em cada reamostragem.
+
+    Médias e porcentagens vêm de um único produto pesos @ `bootstrap_columns`. A mediana
+    não depende de quais olhos foram sorteados, só de quantos: com m sorteios válidos entre
+    os n_v erros absolutos ordenados, o k-ésimo menor valor é o de posição ⌊n_v·U₍ₖ₎⌋, com
+    U₍ₖ₎ ~ Beta(k, m + 1 - k), e o seguinte (para m par) sai de
+    U₍ₖ₊₁₎ = U₍ₖ₎ + (1 - U₍ₖ₎)·Beta(1, m - k). Assim a mediana de cada reamostragem é
+    sorteada da sua distribuição exata sem ordenar a amostra.
+
+    Args:
+        weights (np.ndarray): Número de sorteios de cada olho, formato (reamostragens, olhos).
+        columns (np.ndarray): Saída de `bootstrap_columns`.
+        sorted_absolute (np.ndarray): Erros absolutos de cada fórmula em ordem crescente,
+                                      com NaN no fim, formato (olhos, fórmulas).
+        rng (np.random.Generator): Gerador usado na mediana.
+
+    Returns:
+        np.ndarray: Formato (reamostragens, métricas, fórmulas), na ordem de `METRICS`.
+    """
+    n_formulas = sorted_absolute.shape[1]
+    sums = (np.asarray(weights, dtype=float) @ columns).reshape(len(weights), -1, n_formulas)
+    count = sums[:, 0]
+    n_valid = (~np.isnan(sorted_absolute)).sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = [sums[:, 1] / count, sums[:, 2] / count,
+                  _order_statistic_median(count, sorted_absolute, n_valid, rng)]
+        result += [100 * sums[:, 3 + i] / count for i in range(len(WITHIN_THRESHOLDS))]
+    return np.stack(result, axis=1)
+
+
+def _order_statistic_median(count: np.ndarray, sorted_absolute: np.ndarray, n_valid: np.ndarray,
+                            rng: np.random.Generator) -> np.ndarray:
+    m = count.astype(np.int64)
+    k = np.maximum((m + 1) // 2, 1)
+    lower = rng.beta(k, np.maximum(m + 1 - k, 1))
+    upper = np.where(m % 2 == 0, lower + (1 - lower) * rng.beta(1, np.maximum(m - k, 1)), lower)
+    columns = np.arange(sorted_absolute.shape[1])
+    last = np.maximum(n_valid - 1, 0)
+    lower_rank = np.minimum((n_valid * lower).astype(np.int64), last)
+    upper_rank = np.minimum((n_valid * upper).astype(np.int64), last)
+    median = (sorted_absolute[lower_rank, columns] + sorted_absolute[upper_rank, columns]) / 2
+    return np.where(m > 0, median, np.nan)
+
+
+# Dados de cada processo do pool: colunas de bootstrap e erros absolutos ordenados de cada estrato.
+_worker_strata: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+
+def _init_worker(strata: Dict[str, np.ndarray]):
+    """Recebe os erros uma vez por processo, em vez de enviá-los a cada bloco."""
+    global _worker_strata
+    _worker_strata = {name: (bootstrap_columns(errors), np.sort(np.abs(errors), axis=0))
+                      for name, errors in strata.items()}
+
+
+def _bootstrap_block(task: Tuple[np.random.SeedSequence, int]) -> Dict[str, np.ndarray]:
+    """Métricas de `n_resamples` reamostragens de cada estrato, formato (reamostragens, métricas, fórmulas)."""
+    seed, n_resamples = task
+    rng = np.random.default_rng(seed)
+    results = {}
+    for name, (columns, sorted_absolute) in _worker_strata.items():
+        n = len(columns)
+        blocks = []
+        weights = np.empty((BATCH_RESAMPLES, n))
+        for start in range(0, n_resamples, BATCH_RESAMPLES):
+            batch = min(BATCH_RESAMPLES, n_resamples - start)
+            # Sorteios do lote gerados de uma vez e contados por reamostragem: o bincount de
+            # uma linha cabe no cache, e as contagens já saem no formato do produto de matrizes.
+            draws = rng.integers(0, n, size=(batch, n))
+            for b in range(batch):
+                weights[b] = np.bincount(draws[b], minlength=n)
+            blocks.append(bootstrap_metrics(weights[:batch], columns, sorted_absolute, rng))
+        results[name] = np.concatenate(blocks)
+    return results
+
+
+@dataclass
+class OutcomeEvaluation:
+    """Métricas e intervalos de confiança por estrato, formato (métricas, fórmulas)."""
+    formulas: List[str]
+    strata: List[str]
+    n_eyes: Dict[str, np.ndarray]        # Olhos com a fórmula disponível, por estrato
+    estimate: Dict[str, np.ndarray]
+    ci_low: Dict[str, np.ndarray]
+    ci_high: Dict[str, np.ndarray]
+    n_resamples: int
+    confidence: float
+    seed: int
+
+    def table(self, stratum: str = 'all') -> pd.DataFrame:
+        """Tabela de um estrato: uma linha por fórmula, com métrica e intervalo de confiança."""
+        data = {'n_eyes': self.n_eyes[stratum]}
+        for m, metric in enumerate(METRICS):
+            data[metric] = self.estimate[stratum][m]
+            data[f'{metric}_low'] = self.ci_low[stratum][m]
+            data[f'{metric}_high'] = self.ci_high[stratum][m]
+        return pd.DataFrame(data, index=pd.Index(self.formulas, name='formula'))
+
+    def report(self) -> Dict:
+        return {
+            'formulas': self.formulas,
+            'metrics': list(METRICS),
+            'n_resamples': self.n_resamples,
+            'confidence': self.confidence,
+            'seed': self.seed,
+            'strata': {
+                stratum: {
+                    'n_eyes': self.n_eyes[stratum].tolist(),
+                    **{metric: {
+                        'estimate': json_list(self.estimate[stratum][m]),
+                        'low': json_list(self.ci_low[stratum][m]),
+                        'high': json_list(self.ci_high[stratum][m]),
+                    } for m, metric in enumerate(METRICS)},
+                } for stratum in self.strata
+            },
+        }
+
+
+def evaluate_outcomes(
+    df: pd.DataFrame,
+    formulas: Optional[Sequence[str]] = None,
+    n_resamples: int = N_RESAMPLES,
+    confidence: float = CONFIDENCE,
+    seed: int = SEED,
+    max_workers: Optional[int] = None,
+    al_edges: Sequence[float] = AL_STRATA_EDGES,
+) -> OutcomeEvaluation:
+    """
+    Calcula as métricas de todas as fórmulas, no total e por faixa de AL, com intervalos
+    de confiança por bootstrap (percentis). Cada estrato é reamostrado separadamente.
+
+    O custo do bootstrap é linear em olhos x reamostragens e se divide entre os processos:
+    10 mil olhos, 8 fórmulas e 50 mil reamostragens (total e 4 faixas de AL) levam cerca
+    de 21 s em um núcleo; o sorteio dos pesos e o produto de matrizes dominam o tempo.
+
+    Args:
+        df (pd.DataFrame): Biometria, colunas de fórmula e colunas de `OUTCOME_COLUMNS`.
+        formulas (Optional[Sequence[str]]): Colunas de fórmula; detectadas se não forem fornecidas.
+        n_resamples (int): Número de reamostragens (0 dispensa os intervalos de confiança).
+        confidence (float): Nível de confiança dos intervalos.
+        seed (int): Semente; o mesmo valor reproduz os intervalos com qualquer `max_workers`.
+        max_workers (Optional[int]): Número de processos (padrão: CPUs).
+        al_edges (Sequence[float]): Limites internos das faixas de AL (mm).
+
+    Returns:
+        OutcomeEvaluation: Métricas e intervalos de confiança.
+    """
+    missing = [col for col in OUTCOME_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing outcome columns: {missing}")
+    formulas = list(formulas or outcome_formula_columns(df.columns))
+    if not formulas:
+        raise ValueError("No formula columns to evaluate.")
+
+    errors = prediction_errors(df, formulas)
+    labels = strata_labels(al_edges)
+    stratum_index = np.searchsorted(np.asarray(al_edges, dtype=float), df['axial_length'].to_numpy(dtype=float), side='right')
+    strata = {'all': errors}
+    for s, label in enumerate(labels):
+        rows = errors[stratum_index == s]
+        if len(rows):
+            strata[label] = rows
+
+    n_eyes, estimate = {}, {}
+    for name, values in strata.items():
+        n_eyes[name] = (~np.isnan(values)).sum(axis=0)
+        estimate[name] = outcome_metrics(values)
+
+    ci_low = {name: np.full_like(value, np.nan) for name, value in estimate.items()}
+    ci_high = {name: np.full_like(value, np.nan) for name, value in estimate.items()}
+    if n_resamples > 0:
+        sizes = [min(BLOCK_RESAMPLES, n_resamples - start) for start in range(0, n_resamples, BLOCK_RESAMPLES)]
+        tasks = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+        workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(strata,)) as pool:
+            blocks = list(pool.map(_bootstrap_block, tasks))
+        alpha = (1 - confidence) / 2
+        for name in strata:
+            samples = np.concatenate([block[name] for block in blocks])
+            with np.errstate(invalid='ignore'):
+                ci_low[name], ci_high[name] = np.nanquantile(samples, [alpha, 1 - alpha], axis=0)
+
+    return OutcomeEvaluation(formulas, list(strata), n_eyes, estimate, ci_low, ci_high,
+                             n_resamples, confidence, seed)
+
+
+def save_report(evaluation: OutcomeEvaluation, path: str = OUTPUT_REPORT):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(evaluation.report(), f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avalia as fórmulas de LIO a partir de desfechos pós-operatórios.")
+    parser.add_argument('--input', default=INPUT_CSV, help="CSV com biometria, fórmulas e desfechos.")
+    parser.add_argument('--output', default=OUTPUT_REPORT)
+    parser.add_argument('--resamples', type=int, default=N_RESAMPLES, help="Reamostragens de bootstrap.")
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--workers', type=int, default=None, help="Número de processos (padrão: CPUs).")
+    args = parser.parse_args()
+
+    try:
+        df = pd.read_csv(args.input)
+    except FileNotFoundError:
+        print(f"ERRO: O arquivo de entrada '{args.input}' não foi encontrado.")
+        return
+
+    evaluation = evaluate_outcomes(df, n_resamples=args.resamples, seed=args.seed, max_workers=args.workers)
+    save_report(evaluation, args.output)
+    print(f"Relatório salvo em '{args.output}' ({len(df)} olhos, {args.resamples} reamostragens).")
+    table = evaluation.table()
+    for formula, row in table.iterrows():
+        print(f"  {formula}: EM {row['me']:+.2f} D, EAM {row['mae']:.2f} D "
+              f"[{row['mae_low']:.2f}; {row['mae_high']:.2f}], ±0.5 D {row['within_0.5']:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: parallel_kernels.py
+
+"""
+Execução multithread, em blocos, das fórmulas de `compute_all_formulas`.
+
+A passada vetorizada de `iol_formulas_vectorized.py` usa um único núcleo e cria um array
+temporário do tamanho da entrada a cada operação, o que a deixa limitada pela banda de
+memória. Aqui as entradas são divididas em blocos que cabem no cache, e cada bloco é
+calculado por uma thread de um pool; as ufuncs do NumPy liberam o GIL, então os blocos
+rodam em paralelo. Cada thread tem seus próprios buffers de trabalho (`threading.local`),
+alocados uma única vez, e todas as operações usam `out=`: os resultados são gravados
+diretamente nos arrays de saída, que podem ser fornecidos pelo chamador.
+
+Os núcleos repetem as operações de `VectorizedIOLFormulas` na mesma ordem, com os mesmos
+índices de refração e as mesmas conversões de constantes de `iol_formulas_vectorized.py`,
+de modo que os resultados são idênticos, bit a bit, aos de `compute_all_formulas`.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+
+from iol_formulas import CONSTANTS
+from iol_formulas_vectorized import (
+    FORMULA_AQUEOUS_INDEX,
+    FORMULA_NAMES,
+    HAIGIS_CORNEAL_INDEX,
+    HOLLADAY_1_CORNEAL_INDEX,
+    SRK_T_CORNEAL_INDEX,
+    SRK_T_RADIUS_NUMERATOR,
+    haigis_a0_from_a_constant,
+    pacd_from_a_constant,
+    srk_t_acd_from_a_constant,
+    surgeon_factor_from_a_constant,
+)
+
+# --- Configurações ---
+# Elementos por bloco. Cada ufunc lê e escreve 2 ou 3 arrays de 512 KB, que cabem no
+# cache L2, e as ~150 chamadas de ufunc por bloco (que seguram o GIL) custam ~3% do
+# cálculo do bloco, o que permite ocupar algumas dezenas de threads.
+BLOCK_SIZE = 65_536
+SCRATCH_BUFFERS = 6
+SCRATCH_MASKS = 2
+
+DEFAULT_CORNEAL_INDEX = CONSTANTS["biometry"]["corneal_index"]
+AQUEOUS_INDEX = CONSTANTS["biometry"]["aqueous_index"]
+
+
+class _Scratch:
+    """Buffers de trabalho de uma thread, reutilizados em todos os blocos."""
+
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self._float = np.empty((SCRATCH_BUFFERS + 1, block_size))   # +1: ELP
+        self._bool = np.empty((SCRATCH_MASKS + 1, block_size), dtype=bool)  # +1: AL longo (Hoffer Q)
+        self.resize(block_size)
+
+    def resize(self, n: int):
+        """Ajusta as visões dos buffers ao tamanho do bloco atual."""
+        self.t = [buffer[:n] for buffer in self._float[:SCRATCH_BUFFERS]]
+        self.elp = self._float[SCRATCH_BUFFERS, :n]
+        self.m = [mask[:n] for mask in self._bool[:SCRATCH_MASKS]]
+        self.long_eye = self._bool[SCRATCH_MASKS, :n]
+
+
+def _invalid_where(out: np.ndarray, invalid: np.ndarray):
+    np.copyto(out, np.nan, where=invalid)
+
+
+def _any_zero(s: _Scratch, *arrays) -> np.ndarray:
+    """Máscara (no buffer m[0]) dos elementos em que algum dos arrays é zero."""
+    invalid, other = s.m
+    np.equal(arrays[0], 0, out=invalid)
+    for array in arrays[1:]:
+        invalid |= np.equal(array, 0, out=other)
+    return invalid
+
+
+# --- Núcleos (um bloco; todas as operações na ordem de `VectorizedIOLFormulas`) ---
+def _colenbrander(al, k, elp, out, s: _Scratch):
+    corneal = np.divide(1336, k, out=s.t[0])
+    np.subtract(corneal, elp, out=corneal)
+    np.subtract(corneal, 0.05, out=corneal)
+    eye = np.subtract(al, elp, out=s.t[1])
+    np.subtract(eye, 0.05, out=eye)
+    np.divide(1336, eye, out=out)
+    np.subtract(out, np.divide(1336, corneal, out=s.t[2]), out=out)
+    _invalid_where(out, _any_zero(s, k, eye, corneal))
+
+
+def _srk(al, k, a_constant, out, s: _Scratch, adjustment=None):
+    a = a_constant if adjustment is None else np.add(a_constant, adjustment, out=adjustment)
+    np.subtract(a, np.multiply(2.5, al, out=s.t[1]), out=out)
+    np.subtract(out, np.multiply(0.9, k, out=s.t[1]), out=out)
+
+
+def _srk_2(al, k, a_constant, out, s: _Scratch):
+    adjustment = s.t[0]
+    adjustment.fill(0.0)
+    # Do último para o primeiro ramo de `np.select`, para que os primeiros prevaleçam
+    for condition, limit, value in ((np.greater_equal, 24.5, -0.5), (np.less, 22.0, 1.0),
+                                    (np.less, 21.0, 2.0), (np.less, 20.0, 3.0)):
+        np.copyto(adjustment, value, where=condition(al, limit, out=s.m[0]))
+    _srk(al, k, a_constant, out, s, adjustment)
+
+
+def _hoffer_elp(al, pacd, s: _Scratch) -> np.ndarray:
+    elp = np.multiply(0.292, al, out=s.elp)
+    np.subtract(elp, 2.93, out=elp)
+    return np.add(elp, np.subtract(pacd, 3.94, out=s.t[0]), out=elp)
+
+
+def _holladay_1_elp(al, r, surgeon_factor, s: _Scratch) -> np.ndarray:
+    dome = np.multiply(al, 12.5, out=s.t[0])
+    np.divide(dome, 23.45, out=dome)
+    np.square(dome, out=dome)
+    np.divide(dome, 4, out=dome)
+    temp = np.square(r, out=s.t[1])
+    np.subtract(temp, dome, out=temp)
+    elp = np.add(0.56, r, out=s.elp)
+    np.subtract(elp, np.sqrt(temp, out=s.t[0]), out=elp)
+    np.add(elp, surgeon_factor, out=elp)
+    _invalid_where(elp, np.less(temp, 0, out=s.m[0]))
+    return elp
+
+
+def _holladay_1_power(al, r, elp, out, s: _Scratch):
+    # Alvo refrativo 0: os termos de vergência do alvo se anulam.
+    alm = np.add(al, 0.2, out=s.t[0])
+    nc_minus_1 = HOLLADAY_1_CORNEAL_INDEX - 1
+    aqueous_r = np.multiply(AQUEOUS_INDEX, r, out=s.t[1])
+    term_alm = np.subtract(aqueous_r, np.multiply(nc_minus_1, alm, out=s.t[2]), out=s.t[2])
+    term_elp = np.subtract(aqueous_r, np.multiply(nc_minus_1, elp, out=s.t[3]), out=s.t[3])
+    np.multiply(1000 * AQUEOUS_INDEX, term_alm, out=out)
+    denominator = np.subtract(alm, elp, out=s.t[0])
+    np.multiply(denominator, term_elp, out=denominator)
+    np.divide(out, denominator, out=out)
+    _invalid_where(out, np.equal(denominator, 0, out=s.m[0]))
+
+
+def _hoffer_q_elp(al, k, pacd, s: _Scratch) -> np.ndarray:
+    long_eye = np.greater(al, 23.0, out=s.long_eye)
+    clamped = np.clip(al, 18.5, 31.0, out=s.t[0])
+    elp = np.multiply(0.3, np.subtract(clamped, 23.5, out=s.t[1]), out=s.t[1])
+    np.add(pacd, elp, out=s.elp)
+    elp = s.elp
+    tan_k = np.tan(np.radians(k, out=s.t[1]), out=s.t[1])
+    np.add(elp, np.square(tan_k, out=tan_k), out=elp)
+    # 0.1·m, com m = -1 (olho longo) ou 1
+    term = s.t[1]
+    term.fill(0.1)
+    np.copyto(term, -0.1, where=long_eye)
+    np.multiply(term, np.square(np.subtract(23.5, clamped, out=s.t[2]), out=s.t[2]), out=term)
+    g = s.t[2]
+    g.fill(28.0)
+    np.copyto(g, 23.5, where=long_eye)
+    angle = np.square(np.subtract(g, clamped, out=g), out=g)
+    np.multiply(0.1, angle, out=angle)
+    np.multiply(term, np.tan(np.radians(angle, out=angle), out=angle), out=term)
+    np.add(elp, term, out=elp)
+    return np.subtract(elp, 0.99166, out=elp)
+
+
+def _hoffer_q_power(al, k, elp, out, s: _Scratch):
+    denom = np.add(k, 0.0, out=s.t[0])   # k + r, com r = 0 para alvo 0
+    np.divide(FORMULA_AQUEOUS_INDEX, denom, out=denom)
+    np.subtract(denom, np.divide(np.add(elp, 0.05, out=s.t[1]), 1000, out=s.t[1]), out=denom)
+    eye = np.subtract(al, elp, out=s.t[1])
+    np.subtract(eye, 0.05, out=eye)
+    np.divide(1336, eye, out=out)
+    np.subtract(out, np.divide(FORMULA_AQUEOUS_INDEX, denom, out=s.t[2]), out=out)
+    invalid = _any_zero(s, eye, denom)
+    invalid |= np.isinf(denom, out=s.m[1])   # K + R = 0
+    _invalid_where(out, invalid)
+
+
+def _srk_t_elp(al, k, acd_const, s: _Scratch) -> np.ndarray:
+    radius = np.divide(SRK_T_RADIUS_NUMERATOR, k, out=s.t[0])
+    # Comprimento axial corrigido
+    l_corr = np.multiply(1.715, al, out=s.t[1])
+    np.add(-3.446, l_corr, out=l_corr)
+    np.subtract(l_corr, np.multiply(0.0237, np.square(al, out=s.t[2]), out=s.t[2]), out=l_corr)
+    np.copyto(l_corr, al, where=np.logical_not(np.greater(al, 24.2, out=s.m[0]), out=s.m[0]))
+    cw = np.multiply(0.58412, l_corr, out=l_corr)
+    np.add(-5.41, cw, out=cw)
+    np.add(cw, np.multiply(0.098, k, out=s.t[2]), out=cw)
+    np.square(cw, out=cw)
+    np.divide(cw, 4, out=cw)
+    temp = np.square(radius, out=s.t[2])
+    np.subtract(temp, cw, out=temp)
+    elp = np.subtract(radius, np.sqrt(temp, out=s.t[1]), out=s.elp)
+    np.add(elp, np.subtract(acd_const, 3.336, out=s.t[3]), out=elp)
+    _invalid_where(elp, np.less(temp, 0, out=s.m[0]))
+    return elp
+
+
+def _srk_t_power(al, k, elp, out, s: _Scratch):
+    na = FORMULA_AQUEOUS_INDEX
+    ncm1 = SRK_T_CORNEAL_INDEX - 1.0
+    radius = np.divide(SRK_T_RADIUS_NUMERATOR, k, out=s.t[0])
+    l_opt = np.multiply(0.02029, al, out=s.t[1])
+    np.subtract(0.65696, l_opt, out=l_opt)
+    np.add(al, l_opt, out=l_opt)
+    part1 = np.subtract(l_opt, elp, out=s.t[2])
+    part2 = np.multiply(na, radius, out=s.t[3])
+    np.subtract(part2, np.multiply(ncm1, elp, out=s.t[4]), out=part2)
+    numerator = np.multiply(na, radius, out=radius)
+    np.subtract(numerator, np.multiply(ncm1, l_opt, out=s.t[4]), out=numerator)
+    np.multiply(1000 * na, numerator, out=numerator)
+    np.divide(numerator, np.multiply(part1, part2, out=s.t[4]), out=out)
+    _invalid_where(out, _any_zero(s, part1, part2))
+
+
+def _haigis_elp(al, acd, a0, a1, a2, s: _Scratch) -> np.ndarray:
+    elp = np.add(a0, np.multiply(a1, acd, out=s.t[0]), out=s.elp)
+    return np.add(elp, np.multiply(a2, al, out=s.t[0]), out=elp)
+
+
+def _haigis_power(al, r, elp, out, s: _Scratch):
+    nc = HAIGIS_CORNEAL_INDEX
+    n = FORMULA_AQUEOUS_INDEX
+    z = np.divide(r, 1000, out=s.t[0])
+    np.divide(nc - 1.0, z, out=z)
+    np.add(z, 0.0, out=z)   # dc + alvo / (1 - alvo·vértice), com alvo 0
+    elp_m = np.divide(elp, 1000, out=s.t[1])
+    eye = np.divide(al, 1000, out=s.t[2])
+    np.subtract(eye, elp_m, out=eye)
+    corneal = np.divide(n, z, out=z)
+    np.subtract(corneal, elp_m, out=corneal)
+    np.divide(n, eye, out=out)
+    np.subtract(out, np.divide(n, corneal, out=s.t[1]), out=out)
+    invalid = _any_zero(s, eye, corneal)
+    # Raio infinito ou negativo (K <= 0)
+    invalid |= np.logical_not(np.isfinite(r, out=s.m[1]), out=s.m[1])
+    invalid |= np.less_equal(r, 0, out=s.m[1])
+    _invalid_where(out, invalid)
+
+
+class ParallelFormulaExecutor:
+    """
+    Calcula as fórmulas de `compute_all_formulas` em blocos, em um pool de threads.
+
+    As entradas são escalares ou arrays 1-D com um valor por olho; se todas forem
+    escalares, os resultados são escalares (arrays de formato `()`), como em
+    `compute_all_formulas`. O pool e os buffers de cada thread são mantidos entre as
+    chamadas; use como gerenciador de contexto ou chame `close()` ao terminar.
+
+    Args:
+        max_workers (Optional[int]): Número de threads (padrão: CPUs).
+        block_size (int): Elementos por bloco.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, block_size: int = BLOCK_SIZE):
+        if block_size < 1:
+            raise ValueError("block_size must be positive.")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.block_size = block_size
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='iol-kernel')
+        self._local = threading.local()
+
+    def __enter__(self) -> 'ParallelFormulaExecutor':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._pool.shutdown()
+
+    def _scratch(self, n: int) -> _Scratch:
+        scratch = getattr(self._local, 'scratch', None)
+        if scratch is None or scratch.block_size < self.block_size:
+            scratch = self._local.scratch = _Scratch(self.block_size)
+        scratch.resize(n)
+        return scratch
+
+    def compute_all(
+        self,
+        axial_length,
+        keratometry,
+        a_constant,
+        haigis_acd,
+        fixed_elp,
+        corneal_index: float = DEFAULT_CORNEAL_INDEX,
+        *,
+        pacd=None,
+        surgeon_factor=None,
+        srk_t_acd=None,
+        haigis_a0=None,
+        haigis_a1=0.4,
+        haigis_a2=0.1,
+        out: Optional[Dict[str, np.ndarray]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Mesmas entradas e resultados de `compute_all_formulas`.
+
+        As constantes derivadas ausentes são calculadas uma única vez, antes dos blocos,
+        pelas mesmas conversões de `iol_formulas_vectorized.py`.
+
+        Args:
+            out (Optional[Dict[str, np.ndarray]]): Arrays de saída (float64, um por fórmula
+                de `FORMULA_NAMES`, com o formato das entradas), preenchidos no lugar;
+                alocados se ausentes.
+
+        Returns:
+            Dict[str, np.ndarray]: Potência calculada por fórmula (os arrays de `out`, se fornecido).
+        """
+        inputs = {
+            'al': axial_length, 'k': keratometry, 'a_constant': a_constant, 'haigis_acd': haigis_acd,
+            'fixed_elp': fixed_elp, 'pacd': pacd, 'surgeon_factor': surgeon_factor, 'srk_t_acd': srk_t_acd,
+            'haigis_a0': haigis_a0, 'haigis_a1': haigis_a1, 'haigis_a2': haigis_a2,
+        }
+        inputs = {name: None if value is None else np.asarray(value, dtype=float) for name, value in inputs.items()}
+        a = inputs['a_constant']
+        for name, convert in (('pacd', pacd_from_a_constant), ('surgeon_factor', surgeon_factor_from_a_constant),
+                              ('srk_t_acd', srk_t_acd_from_a_constant)):
+            if inputs[name] is None:
+                inputs[name] = convert(a)
+        if inputs['haigis_a0'] is None:
+            inputs['haigis_a0'] = haigis_a0_from_a_constant(a, inputs['haigis_a1'], inputs['haigis_a2'])
+        shape = np.broadcast_shapes(*(value.shape for value in inputs.values()))
+        if len(shape) > 1:
+            raise ValueError("Inputs must be scalars or 1-D arrays with one value per eye.")
+        n = shape[0] if shape else 1
+        # Escalares ficam como float; arrays de um elemento são repetidos por broadcasting
+        inputs = {name: float(value) if value.ndim == 0 else np.broadcast_to(value, (n,))
+                  for name, value in inputs.items()}
+
+        if out is None:
+            out = {name: np.empty(shape) for name in FORMULA_NAMES}
+        else:
+            for name in FORMULA_NAMES:
+                array = out.get(name)
+                if array is None or array.shape != shape or array.dtype != np.float64 or not array.flags.writeable:
+                    raise ValueError(f"out['{name}'] must be a writeable float64 array of shape {shape}.")
+        # Visões 1-D (de um elemento para entradas escalares) em que os blocos gravam
+        flat = {name: out[name].reshape(n) for name in FORMULA_NAMES}
+
+        def run_block(start: int):
+            stop = min(start + self.block_size, n)
+            block = {name: value if isinstance(value, float) else value[start:stop]
+                     for name, value in inputs.items()}
+            self._compute_block(block, {name: flat[name][start:stop] for name in FORMULA_NAMES},
+                                corneal_index, self._scratch(stop - start))
+
+        # list() propaga a primeira exceção de uma thread
+        list(self._pool.map(run_block, range(0, n, self.block_size)))
+        return out
+
+    @staticmethod
+    def _compute_block(b: Dict, out: Dict[str, np.ndarray], corneal_index: float, s: _Scratch):
+        al, k, a = b['al'], b['k'], b['a_constant']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Raio da córnea: Holladay 1 usa sempre o índice padrão, Haigis usa `corneal_index`
+            r = np.divide((corneal_index - 1) * 1000, k, out=s.t[5])
+            if corneal_index != DEFAULT_CORNEAL_INDEX:
+                holladay_r = np.divide(1000 * (DEFAULT_CORNEAL_INDEX - 1), k, out=s.t[4])
+            else:
+                holladay_r = r
+            _colenbrander(al, k, b['fixed_elp'], out['colenbrander'], s)
+            _srk(al, k, a, out['srk'], s)
+            _srk_2(al, k, a, out['srk_2'], s)
+
+            _holladay_1_power(al, holladay_r, _holladay_1_elp(al, holladay_r, b['surgeon_factor'], s),
+                              out['holladay_1'], s)
+            _colenbrander(al, k, _hoffer_elp(al, b['pacd'], s), out['hoffer'], s)
+            _hoffer_q_power(al, k, _hoffer_q_elp(al, k, b['pacd'], s), out['hoffer_q'], s)
+            _srk_t_power(al, k, _srk_t_elp(al, k, b['srk_t_acd'], s), out['srk_t'], s)
+
+            haigis_elp = _haigis_elp(al, b['haigis_acd'], b['haigis_a0'], b['haigis_a1'], b['haigis_a2'], s)
+            _haigis_power(al, r, haigis_elp, out['haigis'], s)
+
+
+def compute_all_formulas_parallel(
+    axial_length,
+    keratometry,
+    a_constant,
+    haigis_acd,
+    fixed_elp,
+    corneal_index: float = DEFAULT_CORNEAL_INDEX,
+    *,
+    out: Optional[Dict[str, np.ndarray]] = None,
+    max_workers: Optional[int] = None,
+    block_size: int = BLOCK_SIZE,
+    **constants,
+) -> Dict[str, np.ndarray]:
+    """Versão multithread de `compute_all_formulas`; veja `ParallelFormulaExecutor`."""
+    with ParallelFormulaExecutor(max_workers, block_size) as executor:
+        return executor.compute_all(axial_length, keratometry, a_constant, haigis_acd, fixed_elp,
+                                    corneal_index, out=out, **constants)
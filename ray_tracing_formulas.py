@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: ray_tracing_formulas.py
+
+"""
+Cálculo de LIO por traçado de raios paraxial com lente espessa.
+
+Ao contrário das fórmulas de vergência de `iol_formulas.py` (lente fina), o olho é
+modelado por matrizes de transferência 2x2 no espaço (altura, ângulo reduzido n·u):
+córnea com duas superfícies e espessura, humor aquoso, LIO biconvexa espessa e
+vítreo. A posição da LIO vem da ACD e da espessura do cristalino (ACD + C·LT), como
+nas fórmulas de traçado de raios de quarta geração. As matrizes de todos os olhos são
+multiplicadas em lote com NumPy, e a potência para a refração desejada sai em forma
+fechada da matriz do sistema.
+
+Distâncias em mm na interface e em metros nas matrizes, para que as potências fiquem
+em dioptrias.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from iol_formulas import CONSTANTS
+
+ArrayLike = np.ndarray
+
+
+def refraction_matrix(power) -> np.ndarray:
+    """Matrizes de refração de uma superfície de potência `power` (D), formato (..., 2, 2)."""
+    power = np.asarray(power, dtype=float)
+    matrix = np.zeros(power.shape + (2, 2))
+    matrix[..., 0, 0] = 1.0
+    matrix[..., 1, 0] = -power
+    matrix[..., 1, 1] = 1.0
+    return matrix
+
+
+def translation_matrix(distance_mm, index: float) -> np.ndarray:
+    """Matrizes de translação por `distance_mm` (mm) em um meio de índice `index`, formato (..., 2, 2)."""
+    distance = np.asarray(distance_mm, dtype=float) / 1000
+    matrix = np.zeros(distance.shape + (2, 2))
+    matrix[..., 0, 0] = 1.0
+    matrix[..., 0, 1] = distance / index
+    matrix[..., 1, 1] = 1.0
+    return matrix
+
+
+@dataclass(frozen=True)
+class ThickLensEyeModel:
+    """
+    Olho esquemático usado no traçado de raios. Os valores padrão são os do olho de
+    Gullstrand para a córnea e de uma LIO acrílica hidrofóbica monobloco.
+    """
+    keratometric_index: float = CONSTANTS["biometry"]["corneal_index"]  # Converte K em raio anterior
+    cornea_index: float = 1.376
+    cornea_thickness: float = 0.55          # mm
+    posterior_radius_ratio: float = 0.883   # Raio posterior / raio anterior da córnea (6.8 / 7.7)
+    aqueous_index: float = CONSTANTS["biometry"]["aqueous_index"]
+    vitreous_index: float = 1.336
+    iol_index: float = 1.55
+    iol_thickness: float = 0.9              # mm, espessura central da LIO
+    c_constant: float = 0.387               # Fração da espessura do cristalino até o centro da LIO
+
+    def iol_position(self, optical_acd, lens_thickness) -> np.ndarray:
+        """Distância (mm) do epitélio da córnea ao plano central da LIO: ACD + C·LT."""
+        return np.asarray(optical_acd, dtype=float) + self.c_constant * np.asarray(lens_thickness, dtype=float)
+
+    def distances(self, axial_length, optical_acd, lens_thickness):
+        """
+        Espessuras (mm) do humor aquoso (da face posterior da córnea à face anterior da
+        LIO) e do vítreo (da face posterior da LIO à retina).
+        """
+        center = self.iol_position(optical_acd, lens_thickness)
+        aqueous = center - self.iol_thickness / 2 - self.cornea_thickness
+        vitreous = np.asarray(axial_length, dtype=float) - center - self.iol_thickness / 2
+        return aqueous, vitreous
+
+    def valid_geometry(self, axial_length, optical_acd, lens_thickness) -> np.ndarray:
+        """
+        Máscara dos olhos em que a LIO cabe entre a córnea e a retina (humor aquoso e
+        vítreo com espessura positiva), pré-condição do traçado de raios.
+        """
+        aqueous, vitreous = self.distances(axial_length, optical_acd, lens_thickness)
+        return (aqueous > 0) & (vitreous > 0)
+
+    def cornea_matrix(self, keratometry) -> np.ndarray:
+        """Matriz da córnea espessa (face anterior, estroma e face posterior)."""
+        with np.errstate(divide='ignore'):
+            anterior_radius = (self.keratometric_index - 1) / np.asarray(keratometry, dtype=float)  # metros
+        posterior_radius = anterior_radius * self.posterior_radius_ratio
+        anterior = refraction_matrix((self.cornea_index - 1.0) / anterior_radius)
+        posterior = refraction_matrix((self.aqueous_index - self.cornea_index) / posterior_radius)
+        stroma = translation_matrix(np.full(anterior_radius.shape, self.cornea_thickness), self.cornea_index)
+        return posterior @ stroma @ anterior
+
+    def iol_matrix(self, iol_power) -> np.ndarray:
+        """
+        Matriz da LIO biconvexa simétrica de potência equivalente `iol_power` (D).
+        Com potência s em cada face e τ = t / n, a potência equivalente é P = 2s - τs².
+        """
+        power = np.asarray(iol_power, dtype=float)
+        tau = self.iol_thickness / 1000 / self.iol_index
+        with np.errstate(invalid='ignore'):
+            surface = power / (1 + np.sqrt(1 - tau * power))
+        surface_matrix = refraction_matrix(surface)
+        body = translation_matrix(np.full(power.shape, self.iol_thickness), self.iol_index)
+        return surface_matrix @ body @ surface_matrix
+
+    def _pre_iol_matrix(self, keratometry, aqueous) -> np.ndarray:
+        return translation_matrix(aqueous, self.aqueous_index) @ self.cornea_matrix(keratometry)
+
+    def system_matrix(self, axial_length, keratometry, optical_acd, lens_thickness, iol_power) -> np.ndarray:
+        """Matriz do olho completo, da face anterior da córnea até a retina, formato (n, 2, 2)."""
+        al, k, acd, lt, power = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(x, dtype=float))
+              for x in (axial_length, keratometry, optical_acd, lens_thickness, iol_power))
+        )
+        aqueous, vitreous = self.distances(al, acd, lt)
+        return (translation_matrix(vitreous, self.vitreous_index) @ self.iol_matrix(power)
+                @ self._pre_iol_matrix(k, aqueous))
+
+    def emmetropic_power(
+        self,
+        axial_length,
+        keratometry,
+        optical_acd,
+        lens_thickness,
+        refractive_target=0.0,
+        vertex_distance: float = 12.0,
+    ) -> np.ndarray:
+        """
+        Potência da LIO (D) que leva cada olho à refração desejada.
+
+        O raio que chega à córnea com a vergência da refração desejada é propagado até a
+        face anterior da LIO, resultando em (y, w). A condição de altura zero na retina,
+        com δ = d_vítreo / n_vítreo, é quadrática na potência s de cada face da LIO:
+
+            δτy·s² - (τy + 2δy + δτw)·s + (y + (τ + δ)w) = 0
+
+        e a raiz fisicamente válida (a que tende à solução de lente fina quando τ → 0) dá
+        a potência equivalente P = 2s - τs². Olhos sem solução (geometria impossível ou
+        discriminante negativo) recebem NaN.
+
+        Args:
+            axial_length: Comprimento axial (mm).
+            keratometry: Ceratometria média (D).
+            optical_acd: ACD medida do epitélio da córnea (mm).
+            lens_thickness: Espessura do cristalino (mm).
+            refractive_target: Refração desejada no plano dos óculos (D).
+            vertex_distance (float): Distância vértice (mm).
+
+        Returns:
+            np.ndarray: Potência da LIO (D), no formato das entradas após broadcasting.
+        """
+        al, k, acd, lt, target = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(x, dtype=float))
+              for x in (axial_length, keratometry, optical_acd, lens_thickness, refractive_target))
+        )
+        shape = al.shape
+        al, k, acd, lt, target = (x.reshape(-1) for x in (al, k, acd, lt, target))
+
+        aqueous, vitreous = self.distances(al, acd, lt)
+        corneal_vergence = target / (1 - vertex_distance / 1000 * target)
+        incoming = np.stack([np.ones_like(al), -corneal_vergence], axis=-1)[..., np.newaxis]
+        y, w = np.moveaxis((self._pre_iol_matrix(k, aqueous) @ incoming)[..., 0], -1, 0)
+
+        tau = self.iol_thickness / 1000 / self.iol_index
+        delta = vitreous / 1000 / self.vitreous_index
+        a = delta * tau * y
+        b = -(tau * y + 2 * delta * y + delta * tau * w)
+        c = y + (tau + delta) * w
+        with np.errstate(divide='ignore', invalid='ignore'):
+            discriminant = b**2 - 4 * a * c
+            # Forma estável da raiz que tende a c / -b quando a → 0
+            surface = 2 * c / (-b + np.sqrt(discriminant))
+            power = 2 * surface - tau * surface**2
+        invalid = (discriminant < 0) | (aqueous <= 0) | (vitreous <= 0) | ~np.isfinite(power)
+        return np.where(invalid, np.nan, power).reshape(shape)
+
+    def predicted_refraction(
+        self, axial_length, keratometry, optical_acd, lens_thickness, iol_power, vertex_distance: float = 12.0
+    ) -> np.ndarray:
+        """
+        Refração esperada (D, plano dos óculos) com uma LIO de potência `iol_power`.
+        Para a matriz do sistema M, a vergência na córnea que foca na retina é M00 / M01.
+        """
+        matrix = self.system_matrix(axial_length, keratometry, optical_acd, lens_thickness, iol_power)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corneal_vergence = matrix[..., 0, 0] / matrix[..., 0, 1]
+            return corneal_vergence / (1 + vertex_distance / 1000 * corneal_vergence)
@@ -1,33 +1,32 @@
 # -*- coding: utf-8 -*-
 # NOME DO ARQUIVO: run_all_calculations.py
 
+import os
 import pandas as pd
 import numpy as np
+from dataclasses import asdict, dataclass
 from tqdm import tqdm
+from typing import Callable, Dict, Optional, Sequence, Tuple
 
 # --- Importações das nossas bibliotecas ---
-from barrett_scraper_lib import PatientData, BarrettCalculatorScraper
-from iol_formulas import IOLFormulas, CONSTANTS
+from barrett_scraper_lib import PatientData, BarrettCalculatorScraper, schedule_eye_pairs
+from iol_formulas import (
+    IOLFormulas, CONSTANTS, IOL, A_CONSTANT, ASSUMED_ACD, FIXED_ELP, FORMULA_OUTPUT_COLUMNS,
+    SHORT_EYE_AL, SHORT_EYE_K1, SHORT_EYE_K2, SHORT_EYE_ACD, SHORT_EYE_LT,
+    LONG_EYE_AL, LONG_EYE_K1, LONG_EYE_K2, LONG_EYE_ACD, LONG_EYE_LT, AL_STEPS,
+)
+from incremental_calculation import FingerprintStore, column_fingerprint, reuse_previous_values, row_keys
+from biometry_validation import ValidationResult, reason_names, validate_biometry
+from ray_tracing_formulas import ThickLensEyeModel, refraction_matrix, translation_matrix
 
 # --- Constantes e Configurações Globais ---
 OUTPUT_CSV = 'resultados_consolidados_iol.csv'
-A_CONSTANT = 118.99
-ASSUMED_ACD = 3.5 # Valor padrão para a fórmula Haigis
-FIXED_ELP = 4.0 # Valor padrão para a fórmula Colenbrander
-IOL = 'Alcon SN60WF'
+# Impressões digitais da última execução, usadas no recálculo incremental
+FINGERPRINTS_JSON = 'resultados_consolidados_iol.fingerprints.json'
+RESULT_DECIMALS = 2
 EYE = 'R'
 N_TESTS = 2
 
-SHORT_EYE_AL = 20.0
-SHORT_EYE_K1 = 48
-SHORT_EYE_K2 = 46
-SHORT_EYE_ACD = 2.8
-LONG_EYE_AL = 28.2
-LONG_EYE_K1 = 42
-LONG_EYE_K2 = 40
-LONG_EYE_ACD = 4.5
-AL_STEPS = 0.2
-
 def setup_dataframe(test_mode: bool = True):
     """
     Cria e configura o DataFrame com os dados de entrada.
@@ -49,6 +48,8 @@ def setup_dataframe(test_mode: bool = True):
     k2_values = np.linspace(SHORT_EYE_K2, LONG_EYE_K2, num=num_steps)
     # ACD vai de ... (para AL min) a ... (para AL max)
     acd_values = np.linspace(SHORT_EYE_ACD, LONG_EYE_ACD, num=num_steps)
+    # Espessura do cristalino vai de ... (para AL min) a ... (para AL max)
+    lt_values = np.linspace(SHORT_EYE_LT, LONG_EYE_LT, num=num_steps)
 
     if test_mode:
         # Pega apenas os primeiros N_TESTS itens de cada lista para teste
@@ -57,6 +58,7 @@ def setup_dataframe(test_mode: bool = True):
         k1_values = k1_values[:N_TESTS]
         k2_values = k2_values[:N_TESTS]
         acd_values = acd_values[:N_TESTS]
+        lt_values = lt_values[:N_TESTS]
         # CORREÇÃO: Mensagem de print melhorada
         print(f">>> MODO DE TESTE ATIVADO: Processando apenas {N_TESTS} linhas. <<<")
 
@@ -68,6 +70,7 @@ def setup_dataframe(test_mode: bool = True):
         'meas_k1': k1_values, # Usa os valores que variam linearmente
         'meas_k2': k2_values, # Usa os valores que variam linearmente
         'optical_acd': acd_values, # Usa os valores que variam linearmente
+        'lens_thickness': lt_values, # Usa os valores que variam linearmente
         # 'barrett_universal_ii': [np.nan] * len(axial_lengths) # Coluna renomeada
     }
     
@@ -75,97 +78,318 @@ def setup_dataframe(test_mode: bool = True):
     # --- FIM DA ALTERAÇÃO ---
 
     # Adiciona colunas vazias para as outras fórmulas
-    formula_names = [
-        'colenbrander', 'srk', 'hoffer', 'srk_2', 
-        'holladay_1', 'hoffer_q', 'srk_t', 'haigis', 'barrett_universal_ii'
-    ]
-    for name in formula_names:
+    for name in FORMULA_OUTPUT_COLUMNS:
         df[name] = np.nan
 
     print("DataFrame criado com sucesso.")
     return df
 
+# --- Colunas das Fórmulas ---
+# Cada função calcula a coluna de uma fórmula para um olho a partir do comprimento
+# axial, da ceratometria média e do raio da córnea.
+def _colenbrander(calculator: IOLFormulas, al: float, k_mean: float, r: float) -> float:
+    return calculator.colenbrander_power(al, k_mean, FIXED_ELP)['result']
+
+def _srk(calculator: IOLFormulas, al: float, k_mean: float, r: float) -> float:
+    return calculator.srk_power(al, k_mean, a_constant=A_CONSTANT)['result']
+
+def _srk_2(calculator: IOLFormulas, al: float, k_mean: float, r: float) -> float:
+    return calculator.srk_2_power(al, k_mean, a_constant=A_CONSTANT)['result']
+
+def _srk_t(calculator: IOLFormulas, al: float, k_mean: float, r: float) -> float:
+    srk_t_elp = calculator._srk_t_elp(al, k_mean, a_constant=A_CONSTANT)['result']
+    if np.isnan(srk_t_elp):
+        return np.nan
+    return calculator.srk_t_power(al, k_mean, srk_t_elp)['result']
+
+def _hoffer(calculator: IOLFormulas, al: float, k_mean: float, r: float) -> float:
+    hoffer_elp = calculator._hoffer_elp(al, a_constant=A_CONSTANT)['result']
+    if np.isnan(hoffer_elp):
+        return np.nan
+    return calculator.hoffer_power(al, k_mean, hoffer_elp)['result']
+
+def _holladay_1(calculator: IOLFormulas, al: float, k_mean: float, r: float) -> float:
+    holladay_1_elp = calculator._holladay_1_elp(al, k_mean, a_constant=A_CONSTANT)['result']
+    if np.isnan(holladay_1_elp):
+        return np.nan
+    return calculator.holladay_1_power(al, elp=holladay_1_elp, keratometry=k_mean)['result']
+
+def _hoffer_q(calculator: IOLFormulas, al: float, k_mean: float, r: float) -> float:
+    hoffer_q_elp = calculator._hoffer_q_elp(al, k_mean, a_constant=A_CONSTANT)['result']
+    if np.isnan(hoffer_q_elp):
+        return np.nan
+    return calculator.hoffer_q_power(al, k_mean, hoffer_q_elp)['result']
+
+def _haigis(calculator: IOLFormulas, al: float, k_mean: float, r: float) -> float:
+    haigis_elp = calculator._haigis_elp(al, acd=ASSUMED_ACD, a_constant=A_CONSTANT)['result']
+    if np.isnan(haigis_elp):
+        return np.nan
+    return calculator.haigis_power(al, r, haigis_elp)['result']
+
+@dataclass(frozen=True)
+class FormulaColumn:
+    """Uma coluna de saída: como calculá-la e do que ela depende (para o recálculo incremental)."""
+    name: str
+    compute: Callable[[IOLFormulas, float, float, float], float]
+    methods: Tuple[Callable, ...]                 # Métodos de IOLFormulas usados
+    constants: Tuple[str, ...]                    # Constantes globais deste módulo
+    formula_constants: Tuple[str, ...] = ()       # Entradas de CONSTANTS ('grupo.chave')
+    inputs: Tuple[str, ...] = ('axial_length', 'meas_k1', 'meas_k2')
+
+FORMULA_COLUMNS = [
+    FormulaColumn('colenbrander', _colenbrander, (IOLFormulas.colenbrander_power,), ('FIXED_ELP',)),
+    FormulaColumn('srk', _srk, (IOLFormulas.srk_power,), ('A_CONSTANT',)),
+    FormulaColumn('srk_2', _srk_2, (IOLFormulas.srk_2_power,), ('A_CONSTANT',)),
+    FormulaColumn('srk_t', _srk_t, (IOLFormulas._srk_t_elp, IOLFormulas.srk_t_power), ('A_CONSTANT',)),
+    FormulaColumn('hoffer', _hoffer, (IOLFormulas._hoffer_elp, IOLFormulas.hoffer_power, IOLFormulas.colenbrander_power),
+                  ('A_CONSTANT',)),
+    FormulaColumn('holladay_1', _holladay_1, (IOLFormulas._holladay_1_elp, IOLFormulas.holladay_1_power), ('A_CONSTANT',),
+                  ('biometry.corneal_index', 'biometry.aqueous_index', 'iol.a_to_s_a0', 'iol.a_to_s_a1')),
+    FormulaColumn('hoffer_q', _hoffer_q, (IOLFormulas._hoffer_q_elp, IOLFormulas.hoffer_q_power), ('A_CONSTANT',)),
+    FormulaColumn('haigis', _haigis, (IOLFormulas._haigis_elp, IOLFormulas.haigis_power), ('A_CONSTANT', 'ASSUMED_ACD'),
+                  ('biometry.corneal_index', 'iol.a_to_acd_a0', 'iol.a_to_acd_a1')),
+]
+
+# Traçado de raios com lente espessa: calculado em lote para todos os olhos de uma vez.
+RAY_TRACING_COLUMN = 'ray_tracing'
+RAY_TRACING_INPUTS = ('axial_length', 'meas_k1', 'meas_k2', 'optical_acd', 'lens_thickness')
+RAY_TRACING_MODEL = ThickLensEyeModel()
+
+BARRETT_COLUMN = 'barrett_universal_ii'
+# A fórmula de Barrett não depende do lado do olho (os pares ocupam qualquer lado do formulário).
+BARRETT_INPUTS = ('iol_model', 'axial_length', 'meas_k1', 'meas_k2', 'optical_acd', 'lens_thickness')
+# Entradas opcionais enviadas à Barrett quando o DataFrame as tiver
+BARRETT_OPTIONAL_INPUTS = ('wtw',)
+
+def _column_parameters(column: FormulaColumn) -> Dict[str, float]:
+    """Valores atuais das constantes de que a coluna depende."""
+    parameters = {name: globals()[name] for name in column.constants}
+    for path in column.formula_constants:
+        group, key = path.split('.')
+        parameters[path] = CONSTANTS[group][key]
+    return parameters
+
+def _eye_optics(row: pd.Series) -> Tuple[float, float, float]:
+    """Retorna (AL, K médio, raio da córnea) de uma linha."""
+    al = row['axial_length']
+    k_mean = (row['meas_k1'] + row['meas_k2']) / 2
+    corneal_index = CONSTANTS["biometry"]["corneal_index"]
+    r = (corneal_index - 1) * 1000 / k_mean
+    return al, k_mean, r
+
+def _column_sources(column: FormulaColumn) -> Tuple[Callable, ...]:
+    """
+    Funções cujo código-fonte entra na impressão digital da coluna. Inclui `_eye_optics`,
+    que calcula o K médio de todas as fórmulas e o raio da córnea usado por Haigis.
+    """
+    return (column.compute, _eye_optics, *column.methods)
+
+def _optional_input(row: pd.Series, column: str) -> Optional[float]:
+    """Valor de uma entrada opcional da Barrett; None se a coluna não existir ou for NaN."""
+    value = row.get(column)
+    return None if pd.isna(value) else float(value)
+
+def _row_patient(row: pd.Series) -> PatientData:
+    return PatientData(
+        iol_model=row['iol_model'],
+        eye_side=row['eye_side'],
+        axial_length=row['axial_length'],
+        meas_k1=row['meas_k1'],
+        meas_k2=row['meas_k2'],
+        optical_acd=row['optical_acd'],
+        lens_thickness=_optional_input(row, 'lens_thickness'),
+        wtw=_optional_input(row, 'wtw'),
+    )
+
+def _barrett_power_from_results(results_list) -> float:
+    """Extrai a potência usada na coluna Barrett (a quarta linha da tabela de resultados)."""
+    if results_list and len(results_list) > 3:
+        return results_list[3].iol_power
+    return np.nan
+
+def run_ray_tracing(df: pd.DataFrame, indices: Sequence) -> pd.DataFrame:
+    """Calcula a coluna de traçado de raios para as linhas `indices` em uma única passada vetorizada."""
+    rows = df.loc[list(indices)]
+    if rows.empty:
+        return df
+    df.loc[rows.index, RAY_TRACING_COLUMN] = RAY_TRACING_MODEL.emmetropic_power(
+        rows['axial_length'].to_numpy(dtype=float),
+        ((rows['meas_k1'] + rows['meas_k2']) / 2).to_numpy(dtype=float),
+        rows['optical_acd'].to_numpy(dtype=float),
+        rows['lens_thickness'].to_numpy(dtype=float),
+    )
+    return df
+
+def run_barrett_scrape(df: pd.DataFrame, indices: Sequence) -> pd.DataFrame:
+    """
+    Consulta a calculadora Barrett para as linhas `indices` do DataFrame.
+    Os olhos são enviados ao site em pares (lado direito e esquerdo do formulário),
+    o que reduz o número de submissões aproximadamente pela metade.
+    """
+    indices = list(indices)
+    patients = [_row_patient(df.loc[index]) for index in indices]
+    pairs = schedule_eye_pairs(patients)
+    if not pairs:
+        return df
+
+    # Uma falha ao abrir o navegador ou carregar o site não pode derrubar o pipeline:
+    # as linhas ainda não consultadas ficam com NaN e as demais colunas são salvas.
+    try:
+        with BarrettCalculatorScraper(headless=True) as scraper:
+            for pair in tqdm(pairs, desc="Consultando Barrett (pares de olhos)"):
+                pair_patients = [patients[i] if i is not None else None for i in pair]
+                try:
+                    pair_results = scraper.run_pair_calculation(*pair_patients)
+                except Exception as e:
+                    als = [p.axial_length for p in pair_patients if p is not None]
+                    tqdm.write(f"Erro no Scraper (AL={als}): {e}")
+                    continue
+
+                for patient_index, results_list in zip(pair, pair_results):
+                    if patient_index is None:
+                        continue
+                    index = indices[patient_index]
+                    power = _barrett_power_from_results(results_list)
+                    if np.isnan(power):
+                        tqdm.write(f"Aviso (Barrett): Não foi possível obter o resultado para AL {df.at[index, 'axial_length']}.")
+                    else:
+                        df.at[index, BARRETT_COLUMN] = power
+    except Exception as e:
+        print(f"Erro ao iniciar o Scraper Barrett; a coluna '{BARRETT_COLUMN}' ficará sem valores: {e}")
+
+    return df
+
+def validate_dataframe(df: pd.DataFrame) -> ValidationResult:
+    """
+    Valida a biometria de todas as linhas de uma vez, com as constantes do pipeline,
+    e informa quantos olhos ficaram fora do domínio de cada fórmula.
+    """
+    validation = validate_biometry(df, A_CONSTANT, FIXED_ELP, ASSUMED_ACD, ray_tracing_model=RAY_TRACING_MODEL)
+    for name, codes in validation.reasons.items():
+        invalid = ~validation.valid(name)
+        if invalid.any():
+            motivos = sorted({motivo for code in np.unique(codes[invalid]) for motivo in reason_names(code)})
+            print(f"  Aviso ({name}): {int(invalid.sum())} olho(s) fora do domínio: {', '.join(motivos)}")
+    return validation
+
 def run_unified_calculation(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Executa o scraper e os cálculos de fórmula para cada linha do DataFrame.
+    Valida a biometria, executa os cálculos de fórmula apenas onde cada fórmula é válida
+    e, em seguida, o scraper para as linhas com entradas válidas para a Barrett.
     """
     calculator = IOLFormulas()
     
     print("\nIniciando processo unificado de cálculo...")
+    validation = validate_dataframe(df)
+    valid = {column.name: validation.valid(column.name) for column in FORMULA_COLUMNS}
     
-    for index, row in tqdm(df.iterrows(), total=df.shape[0], desc="Processando Pacientes"):
+    for position, (index, row) in enumerate(tqdm(df.iterrows(), total=df.shape[0], desc="Processando Pacientes")):
         
         # --- ETAPA 1: CÁLCULO COM A BIBLIOTECA DE FÓRMULAS ---
-        al = row['axial_length']
-        k_mean = (row['meas_k1'] + row['meas_k2']) / 2
-        corneal_index = CONSTANTS["biometry"]["corneal_index"]
-        r = (corneal_index - 1) * 1000 / k_mean
-        
-        try:
-            df.at[index, 'colenbrander'] = calculator.colenbrander_power(al, k_mean, FIXED_ELP)['result']
-            df.at[index, 'srk'] = calculator.srk_power(al, k_mean, a_constant=A_CONSTANT)['result']
-            df.at[index, 'srk_2'] = calculator.srk_2_power(al, k_mean, a_constant=A_CONSTANT)['result']
-
-            srk_t_elp = calculator._srk_t_elp(al, k_mean, a_constant=A_CONSTANT)['result']
-            if not np.isnan(srk_t_elp):
-                df.at[index, 'srk_t'] = calculator.srk_t_power(al, k_mean, srk_t_elp)['result']
-            hoffer_elp = calculator._hoffer_elp(al, a_constant=A_CONSTANT)['result']
-            if not np.isnan(hoffer_elp):
-                df.at[index, 'hoffer'] = calculator.hoffer_power(al, k_mean, hoffer_elp)['result']
-
-            holladay_1_elp = calculator._holladay_1_elp(al, k_mean, a_constant=A_CONSTANT)['result']
-            if not np.isnan(holladay_1_elp):
-                df.at[index, 'holladay_1'] = calculator.holladay_1_power(al, elp=holladay_1_elp, keratometry=k_mean)['result']
-
-            hoffer_q_elp = calculator._hoffer_q_elp(al, k_mean, a_constant=A_CONSTANT)['result']
-            if not np.isnan(hoffer_q_elp):
-                df.at[index, 'hoffer_q'] = calculator.hoffer_q_power(al, k_mean, hoffer_q_elp)['result']
-
-            haigis_elp = calculator._haigis_elp(al, acd=ASSUMED_ACD, a_constant=A_CONSTANT)['result']
-            if not np.isnan(haigis_elp):
-                df.at[index, 'haigis'] = calculator.haigis_power(al, r, haigis_elp)['result']
-
-        except Exception as e:
-            tqdm.write(f"Erro nas Fórmulas (AL={al}): {e}")
-            continue
-
-        # --- ETAPA 2: CÁLCULO COM WEB SCRAPER (Barrett Universal II) ---
-        patient_info = PatientData(
-            iol_model=row['iol_model'],
-            eye_side=row['eye_side'],
-            axial_length=row['axial_length'],
-            meas_k1=row['meas_k1'],
-            meas_k2=row['meas_k2'],
-            optical_acd=row['optical_acd']
-        )
-        
-        try:
-            with BarrettCalculatorScraper(headless=True) as scraper:
-                results_list = scraper.run_calculation(patient_info)
+        al, k_mean, r = _eye_optics(row)
+        for column in FORMULA_COLUMNS:
+            if valid[column.name][position]:
+                df.at[index, column.name] = column.compute(calculator, al, k_mean, r)
 
-            if results_list and len(results_list) > 3:
-                quarto_resultado = results_list[3]
-                df.at[index, 'barrett_universal_ii'] = quarto_resultado.iol_power
-            else:
-                tqdm.write(f"Aviso (Barrett): Não foi possível obter o resultado para AL {row['axial_length']}.")
+    # --- ETAPA 2: TRAÇADO DE RAIOS (em lote) ---
+    run_ray_tracing(df, df.index[validation.valid(RAY_TRACING_COLUMN)])
 
-        except Exception as e:
-            tqdm.write(f"Erro no Scraper (AL={row['axial_length']}): {e}")
+    # --- ETAPA 3: CÁLCULO COM WEB SCRAPER (Barrett Universal II) ---
+    barrett_indices = df.index[validation.valid(BARRETT_COLUMN)]
+    return run_barrett_scrape(df, barrett_indices)
 
-    return df
+def run_incremental_calculation(
+    df: pd.DataFrame,
+    previous_csv: Optional[str] = OUTPUT_CSV,
+    fingerprints_path: str = FINGERPRINTS_JSON,
+) -> Tuple[pd.DataFrame, FingerprintStore]:
+    """
+    Recalcula apenas as colunas e linhas cujas impressões digitais mudaram desde a
+    última execução e reaproveita todo o resto de `previous_csv`.
+
+    Uma coluna é recalculada por inteiro quando mudam suas entradas, suas constantes
+    (por exemplo, `A_CONSTANT`) ou o código-fonte das funções que a calculam; caso
+    contrário, só as linhas com entradas novas são calculadas. Consultas Barrett que
+    falharam (NaN) são sempre refeitas.
+
+    Args:
+        df (pd.DataFrame): O DataFrame de `setup_dataframe`.
+        previous_csv (Optional[str]): Resultado da execução anterior. Se None ou inexistente,
+                                      tudo é calculado.
+        fingerprints_path (str): Arquivo com as impressões digitais da execução anterior.
 
-def main():
-    """Função principal que orquestra todo o processo."""
+    Returns:
+        Tuple[pd.DataFrame, FingerprintStore]: O DataFrame completo e as impressões digitais
+        a serem salvas junto com ele.
+    """
+    previous = None
+    if previous_csv and os.path.exists(previous_csv) and os.path.exists(fingerprints_path):
+        previous = pd.read_csv(previous_csv)
+    store = FingerprintStore.load(fingerprints_path) if previous is not None else FingerprintStore()
+
+    specs = [(c.name, c.inputs, _column_parameters(c), _column_sources(c)) for c in FORMULA_COLUMNS]
+    specs.append((RAY_TRACING_COLUMN, RAY_TRACING_INPUTS, asdict(RAY_TRACING_MODEL),
+                  (run_ray_tracing, ThickLensEyeModel, refraction_matrix, translation_matrix)))
+    barrett_inputs = BARRETT_INPUTS + tuple(c for c in BARRETT_OPTIONAL_INPUTS if c in df.columns)
+    specs.append((BARRETT_COLUMN, barrett_inputs, {'base_url': BarrettCalculatorScraper.BASE_URL},
+                  (_barrett_power_from_results, _row_patient)))
+
+    pending = {}
+    for name, inputs, parameters, sources in specs:
+        fingerprint = column_fingerprint(inputs, parameters, sources)
+        keys = row_keys(df, inputs, RESULT_DECIMALS)
+        previous_fingerprint, previous_keys = store.get(name)
+        if (previous is not None and fingerprint == previous_fingerprint
+                and name in previous.columns and len(previous_keys) == len(previous)):
+            values, found = reuse_previous_values(previous_keys, previous[name].to_numpy(), keys)
+        else:
+            values, found = np.full(len(df), np.nan), np.zeros(len(df), dtype=bool)
+        if name == BARRETT_COLUMN:
+            found &= ~np.isnan(values)  # Refaz as consultas que falharam.
+        df[name] = values
+        pending[name] = df.index[~found]
+        store.set(name, fingerprint, keys)
+        print(f"  {name}: {int(found.sum())} reaproveitadas, {len(pending[name])} a calcular")
+
+    # Só são calculadas as linhas pendentes em que a fórmula é válida.
+    validation = validate_dataframe(df)
+    for name in pending:
+        pending[name] = pending[name][validation.valid(name)[df.index.get_indexer(pending[name])]]
+
+    calculator = IOLFormulas()
+    for column in FORMULA_COLUMNS:
+        for index in pending[column.name]:
+            al, k_mean, r = _eye_optics(df.loc[index])
+            df.at[index, column.name] = column.compute(calculator, al, k_mean, r)
+
+    run_ray_tracing(df, pending[RAY_TRACING_COLUMN])
+
+    if len(pending[BARRETT_COLUMN]):
+        run_barrett_scrape(df, pending[BARRETT_COLUMN])
+    return df, store
+
+def main(incremental: bool = True):
+    """
+    Função principal que orquestra todo o processo.
+
+    Args:
+        incremental (bool): Se True, reaproveita os resultados da execução anterior e
+                            recalcula só o que mudou. Se False, recalcula tudo.
+    """
     # Para rodar o código completo, mude para test_mode=False
     df_inicial = setup_dataframe(test_mode=False)
     
-    df_final = run_unified_calculation(df_inicial)
+    print("\nIniciando cálculo incremental..." if incremental else "\nIniciando cálculo completo...")
+    df_final, fingerprints = run_incremental_calculation(
+        df_inicial, previous_csv=OUTPUT_CSV if incremental else None
+    )
     
     # Arredonda todos os resultados numéricos para 2 casas decimais
-    df_final = df_final.round(2)
+    df_final = df_final.round(RESULT_DECIMALS)
 
     try:
         df_final.to_csv(OUTPUT_CSV, index=False, encoding='utf-8')
+        fingerprints.save(FINGERPRINTS_JSON)
         print(f"\n\nProcesso concluído!")
         print(f"Os resultados foram salvos em '{OUTPUT_CSV}'.")
         print("\n--- Amostra do Resultado Final ---")
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: synthetic_population.py
+
+"""
+Gerador de populações sintéticas de biometria para testes de carga.
+
+Ao contrário de `setup_dataframe` (uma única linha em que K1, K2 e ACD são funções
+lineares do AL), cada paciente recebe AL, K médio, astigmatismo corneano, ACD, espessura
+do cristalino e WTW correlacionados, com os dois olhos. As variáveis são sorteadas de uma
+normal multivariada padrão (fator de Cholesky da matriz de correlação) e levadas às
+distribuições marginais de `PopulationModel` (normal ou log-normal, cortadas em
+`PHYSIOLOGIC_RANGES`). O olho esquerdo tem correlação `fellow_eye_correlation` com o
+direito, com a mesma distribuição conjunta.
+
+A população é produzida em blocos, sem mantê-la inteira na memória. O bloco i usa a
+semente `SeedSequence(seed, spawn_key=(i,))` (o i-ésimo filho de `SeedSequence(seed)`),
+então cada bloco é reproduzível por si só e blocos diferentes podem ser gerados em
+processos diferentes.
+"""
+
+import argparse
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from barrett_form import PatientData
+from biometry_validation import PHYSIOLOGIC_RANGES
+from iol_formulas import IOL, A_CONSTANT, FORMULA_OUTPUT_COLUMNS
+
+# --- Configurações ---
+OUTPUT_CSV = 'populacao_sintetica.csv'
+N_ROWS = 1_000_000
+CHUNK_ROWS = 262_144          # Olhos por bloco (par: os dois olhos de cada paciente)
+SEED = 20240601
+DECIMALS = 2                  # Resolução dos biômetros (0.01 mm / 0.01 D)
+
+# Variáveis sorteadas para cada olho, na ordem da matriz de correlação.
+VARIABLES = ('axial_length', 'mean_k', 'astigmatism', 'optical_acd', 'lens_thickness', 'wtw')
+ARRAY_COLUMNS = ('patient_id', 'eye_side', 'axial_length', 'meas_k1', 'meas_k2',
+                 'optical_acd', 'lens_thickness', 'wtw')
+
+
+@dataclass(frozen=True)
+class Marginal:
+    """Distribuição marginal de uma variável: normal ou log-normal com média e DP dados."""
+    mean: float
+    sd: float
+    kind: str = 'normal'
+
+    def transform(self, z: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """Converte valores normais padrão `z` para esta distribuição, em `out`."""
+        if self.kind == 'normal':
+            np.multiply(z, self.sd, out=out)
+            return np.add(out, self.mean, out=out)
+        if self.kind == 'lognormal':
+            sigma = np.sqrt(np.log1p((self.sd / self.mean) ** 2))
+            mu = np.log(self.mean) - sigma**2 / 2
+            np.multiply(z, sigma, out=out)
+            np.add(out, mu, out=out)
+            return np.exp(out, out=out)
+        raise ValueError(f"Unknown marginal kind '{self.kind}'.")
+
+
+def _default_marginals() -> Dict[str, Marginal]:
+    # Valores típicos de coortes de catarata; AL e astigmatismo têm cauda à direita.
+    return {
+        'axial_length': Marginal(23.6, 1.3, 'lognormal'),
+        'mean_k': Marginal(43.9, 1.6),
+        'astigmatism': Marginal(0.9, 0.7, 'lognormal'),   # K2 - K1 (D)
+        'optical_acd': Marginal(3.1, 0.42),
+        'lens_thickness': Marginal(4.6, 0.45),
+        'wtw': Marginal(11.8, 0.45),
+    }
+
+
+def _default_correlations() -> Dict[Tuple[str, str], float]:
+    # Pares não listados têm correlação zero.
+    return {
+        ('axial_length', 'mean_k'): -0.35,
+        ('axial_length', 'optical_acd'): 0.45,
+        ('axial_length', 'lens_thickness'): -0.15,
+        ('axial_length', 'wtw'): 0.25,
+        ('mean_k', 'optical_acd'): -0.10,
+        ('mean_k', 'wtw'): -0.40,
+        ('optical_acd', 'lens_thickness'): -0.45,
+        ('optical_acd', 'wtw'): 0.30,
+    }
+
+
+@dataclass(frozen=True)
+class PopulationModel:
+    """
+    Distribuição conjunta da biometria de um olho e correlação entre os dois olhos.
+
+    Args:
+        marginals (Dict[str, Marginal]): Distribuição de cada variável de `VARIABLES`.
+        correlations (Dict[Tuple[str, str], float]): Correlações entre pares de variáveis
+                                                      (na escala normal).
+        fellow_eye_correlation (float): Correlação entre o olho direito e o esquerdo.
+        ranges (Dict[str, Tuple[float, float]]): Limites aplicados às colunas geradas.
+    """
+    marginals: Dict[str, Marginal] = field(default_factory=_default_marginals)
+    correlations: Dict[Tuple[str, str], float] = field(default_factory=_default_correlations)
+    fellow_eye_correlation: float = 0.85
+    ranges: Dict[str, Tuple[float, float]] = field(default_factory=lambda: dict(PHYSIOLOGIC_RANGES))
+
+    def correlation_matrix(self) -> np.ndarray:
+        index = {name: i for i, name in enumerate(VARIABLES)}
+        matrix = np.eye(len(VARIABLES))
+        for (a, b), value in self.correlations.items():
+            matrix[index[a], index[b]] = matrix[index[b], index[a]] = value
+        return matrix
+
+    def cholesky(self) -> np.ndarray:
+        try:
+            return np.linalg.cholesky(self.correlation_matrix())
+        except np.linalg.LinAlgError:
+            raise ValueError("The correlation matrix is not positive definite.") from None
+
+
+DEFAULT_MODEL = PopulationModel()
+
+
+def chunk_seed(seed: int, chunk_index: int) -> np.random.SeedSequence:
+    """Semente do bloco `chunk_index`: o mesmo filho que `SeedSequence(seed).spawn` produziria."""
+    return np.random.SeedSequence(seed, spawn_key=(chunk_index,))
+
+
+def population_chunk(
+    chunk_index: int,
+    n_rows: int = CHUNK_ROWS,
+    seed: int = SEED,
+    model: PopulationModel = DEFAULT_MODEL,
+    decimals: Optional[int] = DECIMALS,
+    first_patient_id: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Gera um bloco de olhos, com os dois olhos de cada paciente em linhas consecutivas
+    (direito e depois esquerdo).
+
+    Args:
+        chunk_index (int): Índice do bloco, que define a semente.
+        n_rows (int): Número de olhos (se ímpar, o último paciente tem só o olho direito).
+        seed (int): Semente da população.
+        model (PopulationModel): Distribuições e correlações.
+        decimals (Optional[int]): Casas decimais dos valores; None mantém a precisão total.
+        first_patient_id (Optional[int]): Identificador do primeiro paciente; por padrão,
+                                          chunk_index · ⌈n_rows / 2⌉.
+
+    Returns:
+        Dict[str, np.ndarray]: As colunas de `ARRAY_COLUMNS`.
+    """
+    rng = np.random.default_rng(chunk_seed(seed, chunk_index))
+    n_patients = -(-n_rows // 2)
+    if first_patient_id is None:
+        first_patient_id = chunk_index * n_patients
+    factor = model.cholesky().T
+    rho = model.fellow_eye_correlation
+
+    # z do olho esquerdo = ρ·z do direito + √(1 - ρ²)·z independente: mesma distribuição
+    # conjunta nos dois olhos e correlação ρ entre eles, variável a variável.
+    z = np.empty((n_patients, 2, len(VARIABLES)))
+    z[:, 0] = rng.standard_normal((n_patients, len(VARIABLES))) @ factor
+    z[:, 1] = rng.standard_normal((n_patients, len(VARIABLES))) @ factor
+    z[:, 1] *= np.sqrt(1 - rho**2)
+    z[:, 1] += rho * z[:, 0]
+    z = z.reshape(2 * n_patients, len(VARIABLES))[:n_rows]
+
+    values = {}
+    for i, name in enumerate(VARIABLES):
+        values[name] = model.marginals[name].transform(z[:, i], np.empty(n_rows))
+
+    half_cylinder = values['astigmatism']
+    half_cylinder *= 0.5
+    columns = {
+        'patient_id': np.repeat(np.arange(first_patient_id, first_patient_id + n_patients), 2)[:n_rows],
+        'eye_side': np.tile(np.array(['R', 'L']), n_patients)[:n_rows],
+        'axial_length': values['axial_length'],
+        'meas_k1': values['mean_k'] - half_cylinder,   # K plano
+        'meas_k2': np.add(values['mean_k'], half_cylinder, out=values['mean_k']),
+        'optical_acd': values['optical_acd'],
+        'lens_thickness': values['lens_thickness'],
+        'wtw': values['wtw'],
+    }
+    for name in ARRAY_COLUMNS[2:]:
+        if name in model.ranges:
+            np.clip(columns[name], *model.ranges[name], out=columns[name])
+        if decimals is not None:
+            np.round(columns[name], decimals, out=columns[name])
+    return columns
+
+
+def iter_population(
+    n_rows: int = N_ROWS,
+    chunk_rows: int = CHUNK_ROWS,
+    seed: int = SEED,
+    model: PopulationModel = DEFAULT_MODEL,
+    decimals: Optional[int] = DECIMALS,
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Gera a população de `n_rows` olhos em blocos de `chunk_rows` (par) olhos."""
+    if chunk_rows < 2 or chunk_rows % 2:
+        raise ValueError("chunk_rows must be an even number of at least 2.")
+    for chunk_index, start in enumerate(range(0, n_rows, chunk_rows)):
+        yield population_chunk(chunk_index, min(chunk_rows, n_rows - start), seed, model, decimals,
+                               first_patient_id=start // 2)
+
+
+def chunk_dataframe(chunk: Dict[str, np.ndarray], iol_model: str = IOL, a_constant: float = A_CONSTANT) -> pd.DataFrame:
+    """Converte um bloco para o formato de `setup_dataframe` (com WTW e sem identificador)."""
+    n = len(chunk['axial_length'])
+    df = pd.DataFrame({
+        'iol_model': np.full(n, iol_model, dtype=object),
+        'a_constant': np.full(n, a_constant),
+        **{name: chunk[name] for name in ARRAY_COLUMNS[1:]},
+    })
+    for name in FORMULA_OUTPUT_COLUMNS:
+        df[name] = np.nan
+    return df
+
+
+def iter_population_frames(
+    n_rows: int = N_ROWS, iol_model: str = IOL, a_constant: float = A_CONSTANT, **kwargs
+) -> Iterator[pd.DataFrame]:
+    """Como `iter_population`, mas cada bloco é um DataFrame no formato de `setup_dataframe`."""
+    for chunk in iter_population(n_rows, **kwargs):
+        yield chunk_dataframe(chunk, iol_model, a_constant)
+
+
+def chunk_patients(chunk: Dict[str, np.ndarray], iol_model: str = IOL) -> List[PatientData]:
+    """Converte um bloco para uma lista de `PatientData`."""
+    names = [f"Synthetic {patient_id}" for patient_id in chunk['patient_id'].tolist()]
+    return [
+        PatientData(iol_model, side, al, k1, k2, acd, name, lt, wtw)
+        for side, al, k1, k2, acd, name, lt, wtw in zip(
+            chunk['eye_side'].tolist(), chunk['axial_length'].tolist(), chunk['meas_k1'].tolist(),
+            chunk['meas_k2'].tolist(), chunk['optical_acd'].tolist(), names,
+            chunk['lens_thickness'].tolist(), chunk['wtw'].tolist(),
+        )
+    ]
+
+
+def iter_patient_batches(n_rows: int = N_ROWS, iol_model: str = IOL, **kwargs) -> Iterator[List[PatientData]]:
+    """Como `iter_population`, mas cada bloco é uma lista de `PatientData`."""
+    for chunk in iter_population(n_rows, **kwargs):
+        yield chunk_patients(chunk, iol_model)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera uma população sintética de biometria em blocos.")
+    parser.add_argument('--rows', type=int, default=N_ROWS, help="Número de olhos.")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="Olhos por bloco (par).")
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--output', default=OUTPUT_CSV, help="CSV de saída; '-' apenas mede a geração.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = 0
+    for chunk_number, df in enumerate(iter_population_frames(args.rows, chunk_rows=args.chunk_rows, seed=args.seed)):
+        if args.output != '-':
+            df.to_csv(args.output, mode='w' if chunk_number == 0 else 'a', header=chunk_number == 0,
+                      index=False, encoding='utf-8')
+        rows += len(df)
+    elapsed = time.perf_counter() - start
+    destination = "" if args.output == '-' else f" em '{args.output}'"
+    print(f"{rows} olhos gerados{destination} em {elapsed:.2f} s ({rows / elapsed:,.0f} olhos/s).")
+
+
+if __name__ == "__main__":
+    main()
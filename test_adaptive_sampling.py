@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_adaptive_sampling.py
+
+import numpy as np
+import pytest
+
+from adaptive_sampling import (
+    adaptive_sweep,
+    biometry_dataframe,
+    interpolate_curves,
+    interval_error_estimates,
+    sweep_range,
+)
+
+
+class _FakeEvaluate:
+    """Substitui `run_unified_calculation`: preenche 'srk' com `curve(AL)` e registra os ALs."""
+
+    def __init__(self, curve):
+        self.curve = curve
+        self.calls = []
+
+    def __call__(self, df):
+        self.calls.append(df['axial_length'].tolist())
+        df = df.copy()
+        df['srk'] = self.curve(df['axial_length'].to_numpy())
+        return df
+
+
+def test_biometry_dataframe_interpolates_the_uniform_grid():
+    first, last = sweep_range()
+    df = biometry_dataframe([first, (first + last) / 2, last])
+
+    assert df['meas_k1'].iloc[1] == pytest.approx((df['meas_k1'].iloc[0] + df['meas_k1'].iloc[2]) / 2)
+    assert df['srk'].isna().all()
+
+
+def test_error_estimate_of_a_parabola():
+    x = np.array([20.0, 21.0, 23.0, 24.0])
+    errors = interval_error_estimates(x, 3 * x**2)
+
+    # f'' = 6 em toda parte: erro h²/8 · 6
+    np.testing.assert_allclose(errors, np.diff(x)**2 / 8 * 6)
+
+
+def test_linear_curves_stop_after_the_coarse_grid():
+    evaluate = _FakeEvaluate(lambda al: 118.99 - 2.5 * al)
+    result = adaptive_sweep(tolerance=0.01, budget=40, coarse_points=5, evaluate=evaluate)
+
+    assert len(evaluate.calls) == 1 and len(result.df) == 5
+    assert result.converged and result.rounds == 0 and result.error_bound == pytest.approx(0.0, abs=1e-9)
+
+
+def test_refinement_concentrates_on_the_kink():
+    first, last = sweep_range()
+    kink = first + 0.37 * (last - first)
+    evaluate = _FakeEvaluate(lambda al: 4 * np.abs(al - kink))
+    result = adaptive_sweep(tolerance=0.001, budget=25, coarse_points=5, evaluate=evaluate, min_interval=1e-6)
+
+    al = result.df['axial_length'].to_numpy()
+    assert len(result.df) == 25 and not result.converged and result.error_bound > 0.001
+    assert result.df['axial_length'].is_unique and result.df['axial_length'].is_monotonic_increasing
+    # Os pontos se concentram na quina; o intervalo grosso mais distante não é subdividido
+    narrowest = np.argmin(np.diff(al))
+    assert al[narrowest] <= kink + 0.05 and al[narrowest + 1] >= kink - 0.05
+    assert np.diff(al)[-1] == pytest.approx((last - first) / 4)
+
+    interpolated = interpolate_curves(result, [first, kink, last])
+    np.testing.assert_allclose(interpolated['srk'].iloc[[0, 2]], evaluate.curve(np.array([first, last])))
+    # Na grade grossa a interpolação erra ≈ 4 D na quina
+    assert interpolated['srk'].iloc[1] == pytest.approx(0.0, abs=0.05)
+
+
+def test_invalid_arguments_are_rejected():
+    with pytest.raises(ValueError, match='coarse_points'):
+        adaptive_sweep(coarse_points=2, evaluate=_FakeEvaluate(np.sin))
+    with pytest.raises(ValueError, match='budget'):
+        adaptive_sweep(budget=4, coarse_points=5, evaluate=_FakeEvaluate(np.sin))
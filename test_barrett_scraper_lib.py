@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_barrett_scraper_lib.py
+
+import pytest
+
+from barrett_scraper_lib import BarrettCalculatorScraper, PatientData, schedule_eye_pairs
+
+
+def _patient(eye_side='R', iol_model='Alcon SN60WF', axial_length=23.5):
+    return PatientData(iol_model, eye_side, axial_length, 44.0, 44.5, 3.2)
+
+
+class _FormScraper(BarrettCalculatorScraper):
+    """Scraper sem navegador: registra recargas e envios do formulário."""
+
+    def __init__(self, fail_on_fill=()):
+        self._form_submitted = False
+        self._fail_on_fill = set(fail_on_fill)
+        self.events = []
+
+    def _load_form(self):
+        self.events.append('load')
+        self._form_submitted = False
+
+    def _fill_pair_form(self, right, left):
+        self.events.append('fill')
+        if len([e for e in self.events if e == 'fill']) in self._fail_on_fill:
+            raise RuntimeError("element not interactable")
+
+    def _calculate(self):
+        self.events.append('submit')
+        self._form_submitted = True
+
+    def _open_results_tab(self):
+        pass
+
+    def _scrape_results(self, eye_side):
+        return []
+
+
+def test_form_is_reloaded_after_a_failed_fill():
+    scraper = _FormScraper(fail_on_fill={1})
+    with pytest.raises(RuntimeError):
+        scraper.run_pair_calculation(_patient('R'), _patient('L'))
+    scraper.run_pair_calculation(_patient('R'), _patient('L'))
+
+    assert scraper.events == ['fill', 'load', 'fill', 'submit']
+
+
+def test_fresh_form_is_not_reloaded():
+    scraper = _FormScraper()
+    scraper.run_pair_calculation(_patient('R'), None)
+    scraper.run_pair_calculation(None, _patient('L'))
+
+    assert scraper.events == ['fill', 'submit', 'load', 'fill', 'submit']
+
+
+def test_pairs_only_share_a_lens_model():
+    patients = [_patient('R'), _patient('R', iol_model='Other'), _patient('L'), _patient('R')]
+    pairs = schedule_eye_pairs(patients)
+
+    assert sorted(i for pair in pairs for i in pair if i is not None) == [0, 1, 2, 3]
+    for right, left in pairs:
+        if right is not None and left is not None:
+            assert patients[right].iol_model == patients[left].iol_model
+    assert (0, 2) in pairs
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_benchmark_scraper.py
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from apacrs_stub_server import ApacrsStubServer, StubConfig, synthetic_barrett_table
+from barrett_form import PatientData
+from benchmark_scraper import HttpFormBackend, make_benchmark_patients, run_benchmark
+from iol_formulas import A_CONSTANT, IOL
+
+RIGHT = PatientData(IOL, 'R', 23.5, 44.0, 45.0, 3.2)
+LEFT = PatientData(IOL, 'L', 24.1, 43.0, 43.5, 3.4)
+
+
+def _rows(results):
+    return [(result.iol_power, result.optic, result.refraction) for result in results]
+
+
+def test_http_backend_needs_no_selenium():
+    code = ("import sys, apacrs_stub_server, benchmark_scraper; "
+            "assert 'selenium' not in sys.modules and 'chromedriver_binary' not in sys.modules")
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_pair_is_one_submission_with_both_results():
+    with ApacrsStubServer() as server, HttpFormBackend(server.url) as backend:
+        right, left = backend.run_pair_calculation(RIGHT, LEFT)
+        assert server.submissions == 1
+
+        for patient, results in ((RIGHT, right), (LEFT, left)):
+            expected = synthetic_barrett_table(A_CONSTANT, patient.axial_length, patient.meas_k1, patient.meas_k2)
+            assert _rows(results) == [(power, optic, pytest.approx(refraction, abs=0.005))
+                                      for power, optic, refraction in expected]
+        assert _rows(right) != _rows(left)
+
+        # Um olho só ocupa o lado dele no formulário
+        assert _rows(backend.run_calculation(LEFT)) == _rows(left)
+        assert server.submissions == 2
+
+
+def test_benchmark_counts_paired_submissions():
+    patients = make_benchmark_patients(10)
+    with ApacrsStubServer() as server:
+        result = run_benchmark(lambda: HttpFormBackend(server.url), patients, concurrency=2, backend_name='http')
+        submissions = server.submissions
+
+    assert (result.n_patients, result.n_submissions, result.n_failures) == (10, 5, 0)
+    assert submissions == 5 and len(result.latencies) == 5
+
+
+def test_injected_failures_are_reported():
+    with ApacrsStubServer(StubConfig(failure_rate=1.0)) as server:
+        with HttpFormBackend(server.url) as backend, pytest.raises(RuntimeError, match='HTTP 500'):
+            backend.run_pair_calculation(RIGHT, LEFT)
+        result = run_benchmark(lambda: HttpFormBackend(server.url), make_benchmark_patients(6), paired=False)
+
+    assert (result.n_patients, result.n_submissions, result.n_failures) == (0, 6, 6)
+
+
+def test_backend_that_fails_to_start_submits_nothing():
+    def failing_backend():
+        raise RuntimeError('no browser')
+
+    result = run_benchmark(failing_backend, make_benchmark_patients(4), concurrency=2)
+
+    assert (result.n_patients, result.n_submissions, result.n_backend_errors) == (0, 0, 2)
+    assert result.latencies == []
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_biometry_validation.py
+
+import numpy as np
+import pandas as pd
+
+from biometry_validation import PHYSIOLOGIC_RANGES, Reason, validate_biometry
+from iol_formulas_vectorized import FORMULA_NAMES, compute_all_formulas
+from ray_tracing_formulas import ThickLensEyeModel
+
+A_CONSTANT = 118.99
+FIXED_ELP = 4.0
+HAIGIS_ACD = 3.5
+
+
+def _population(n=20000, seed=7):
+    rng = np.random.default_rng(seed)
+    k1 = rng.uniform(30.0, 60.0, n)
+    return pd.DataFrame({
+        'axial_length': rng.uniform(14.0, 40.0, n),
+        'meas_k1': k1,
+        'meas_k2': np.clip(k1 + rng.normal(0.0, 1.0, n), 30.0, 60.0),
+        'optical_acd': rng.uniform(1.5, 6.0, n),
+        'lens_thickness': rng.uniform(2.0, 7.0, n),
+    })
+
+
+def test_formula_masks_match_where_the_formulas_are_defined():
+    df = _population()
+    validation = validate_biometry(df, A_CONSTANT, FIXED_ELP, HAIGIS_ACD)
+    k = ((df['meas_k1'] + df['meas_k2']) / 2).to_numpy()
+    results = compute_all_formulas(df['axial_length'].to_numpy(), k, A_CONSTANT, HAIGIS_ACD, FIXED_ELP)
+
+    for name in FORMULA_NAMES:
+        np.testing.assert_array_equal(validation.valid(name), np.isfinite(results[name]), err_msg=name)
+    # A amostra cobre os dois domínios restritos.
+    assert (validation.reasons['holladay_1'] & Reason.HOLLADAY_1_SAGITTAL).any()
+    assert (validation.reasons['srk_t'] & Reason.SRK_T_CORNEAL_HEIGHT).any()
+
+
+def test_ray_tracing_mask_matches_emmetropic_power():
+    df = _population()
+    # Córnea espessa o bastante para que a LIO a sobreponha nas câmaras anteriores rasas.
+    model = ThickLensEyeModel(cornea_thickness=2.5)
+    validation = validate_biometry(df, A_CONSTANT, FIXED_ELP, HAIGIS_ACD, ray_tracing_model=model)
+    power = model.emmetropic_power(
+        df['axial_length'], (df['meas_k1'] + df['meas_k2']) / 2, df['optical_acd'], df['lens_thickness'],
+    )
+
+    np.testing.assert_array_equal(validation.valid('ray_tracing'), np.isfinite(power))
+    assert (validation.reasons['ray_tracing'] & Reason.INVALID_GEOMETRY).any()
+
+
+def test_input_reasons():
+    df = pd.DataFrame({
+        'axial_length': [23.5, np.nan, 23.5, 23.5],
+        'meas_k1': [44.0, 44.0, 70.0, 44.0],
+        'meas_k2': [44.0, 44.0, 44.0, 44.0],
+        'optical_acd': [3.2, 3.2, 3.2, np.nan],
+        'lens_thickness': [4.5, 4.5, 4.5, 4.5],
+        'wtw': [12.0, 12.0, 12.0, 20.0],
+    })
+    validation = validate_biometry(df, A_CONSTANT, FIXED_ELP, HAIGIS_ACD)
+
+    np.testing.assert_array_equal(validation.reasons['srk'],
+                                  [0, Reason.MISSING_INPUT, Reason.OUT_OF_RANGE, 0])
+    # WTW é opcional para a Barrett: só invalida quando presente e fora da faixa.
+    assert validation.reasons['barrett_universal_ii'][3] == Reason.MISSING_INPUT | Reason.OUT_OF_RANGE
+    assert PHYSIOLOGIC_RANGES['wtw'][1] < 20.0
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_distributed_sweep.py
+
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+import distributed_sweep as ds
+
+
+def _input(n_rows=7):
+    return pd.DataFrame({'axial_length': 20.0 + 0.2 * np.arange(n_rows), 'meas_k1': 44.0, 'meas_k2': 44.5})
+
+
+def _compute(df):
+    df['srk'] = 118.99 - 2.5 * df['axial_length'] - 0.9 * (df['meas_k1'] + df['meas_k2']) / 2
+    return df
+
+
+def _age(queue_dir, path, seconds):
+    then = ds.filesystem_now(queue_dir) - seconds
+    os.utime(path, (then, then))
+
+
+def _states(queue_dir):
+    return {state: sorted(os.path.basename(p) for p in glob.glob(os.path.join(queue_dir, state, '*')))
+            for state in ('pending', 'claimed', 'done', 'failed')}
+
+
+def test_only_stale_leases_are_reclaimed(tmp_path):
+    queue = str(tmp_path / 'queue')
+    assert ds.create_sweep(queue, _input(), shard_rows=3) == 3
+    stale = ds.claim_shard(queue, 'dead-worker')
+    live = ds.claim_shard(queue, 'live-worker')
+    _age(queue, stale, 600)
+
+    assert ds.reclaim_expired(queue, lease_timeout=300) == ['shard_000000']
+    states = _states(queue)
+    assert states['pending'] == ['shard_000000.json', 'shard_000002.json']
+    assert states['claimed'] == [os.path.basename(live)]
+
+    # O shard devolvido é reivindicado de novo com um lease novo.
+    reclaimed = ds.claim_shard(queue, 'next-worker')
+    assert os.path.basename(reclaimed) == 'shard_000000@next-worker.json'
+    assert ds.reclaim_expired(queue, lease_timeout=300) == []
+
+
+def test_worker_finishes_shards_of_a_dead_worker(tmp_path):
+    queue = str(tmp_path / 'queue')
+    ds.create_sweep(queue, _input(), shard_rows=3)
+    _age(queue, ds.claim_shard(queue, 'dead-worker'), 600)
+
+    assert ds.run_worker(queue, 'survivor', compute=_compute, lease_timeout=300, poll_interval=0.01) == 3
+    assert ds.sweep_status(queue) == {'pending': 0, 'claimed': 0, 'done': 3, 'failed': 0, 'total': 3}
+
+    merged = ds.merge_results(queue, str(tmp_path / 'merged.csv'))
+    expected = _compute(_input()).round(ds.RESULT_DECIMALS)
+    pd.testing.assert_frame_equal(merged, expected)
+
+
+def test_failed_shard_is_recorded(tmp_path):
+    queue = str(tmp_path / 'queue')
+    ds.create_sweep(queue, _input(3), shard_rows=3)
+
+    def fail(df):
+        raise RuntimeError("browser crashed")
+
+    assert not ds.process_shard(queue, ds.claim_shard(queue, 'w'), compute=fail)
+    assert _states(queue)['failed'] == ['shard_000000.json']
+    assert _states(queue)['claimed'] == []
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_formula_analytics.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import formula_analytics
+from formula_analytics import (
+    FormulaDivergenceAccumulator,
+    analyze_csv,
+    analyze_results,
+    detect_formula_columns,
+    register_formula_column,
+)
+
+FORMULAS = ['srk_t', 'haigis', 'barrett_universal_ii']
+
+
+def _results(n=3000, seed=2):
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(10.0, 28.0, n)
+    df = pd.DataFrame({
+        'patient_id': np.arange(n),
+        'iol_model': 'Lens A',
+        'axial_length': rng.uniform(19.0, 30.0, n),
+        'meas_k1': rng.uniform(39.0, 47.0, n),
+        'meas_k2': rng.uniform(40.0, 48.0, n),
+        'notes': 'ok',
+        'srk_t': base + rng.normal(0.0, 0.4, n),
+        'haigis': base + rng.normal(0.0, 0.4, n),
+        'barrett_universal_ii': base + rng.normal(0.0, 0.4, n),
+    })
+    df.loc[::13, 'haigis'] = np.nan
+    df.loc[::29, ['srk_t', 'haigis']] = np.nan
+    return df
+
+
+def _assert_reports_equal(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key in expected:
+        if isinstance(expected[key], dict):
+            _assert_reports_equal(actual[key], expected[key])
+        elif isinstance(expected[key], list) and expected[key] and isinstance(expected[key][0], dict):
+            for a, e in zip(actual[key], expected[key]):
+                _assert_reports_equal(a, e)
+        elif isinstance(expected[key], float):
+            assert actual[key] == pytest.approx(expected[key], abs=1e-4), key
+        elif isinstance(expected[key], list) and any(isinstance(v, float) for v in expected[key]):
+            assert actual[key] == pytest.approx(expected[key], abs=1e-4, nan_ok=True), key
+        else:
+            assert actual[key] == expected[key], key
+
+
+def test_only_known_result_columns_are_formulas():
+    columns = ['patient_id', 'axial_length', 'wtw', 'notes', 'haigis', 'srk_t', 'ray_tracing']
+    assert detect_formula_columns(columns) == ['haigis', 'srk_t', 'ray_tracing']
+
+
+def test_registered_columns_are_detected(monkeypatch):
+    monkeypatch.setattr(formula_analytics, '_extra_formula_columns', [])
+    register_formula_column('kane')
+    register_formula_column('kane')
+
+    assert detect_formula_columns(['kane', 'notes', 'srk']) == ['kane', 'srk']
+
+
+def test_chunked_accumulation_matches_a_single_pass(tmp_path):
+    df = _results()
+    single = analyze_results(df)
+    assert single['formulas'] == FORMULAS and single['n_rows'] == len(df)
+
+    accumulator = FormulaDivergenceAccumulator(FORMULAS)
+    for start in range(0, len(df), 701):
+        accumulator.update_frame(df.iloc[start:start + 701])
+    _assert_reports_equal(accumulator.report(), single)
+
+    path = tmp_path / 'resultados.csv'
+    df.to_csv(path, index=False)
+    _assert_reports_equal(analyze_csv(str(path), chunk_rows=500), single)
+
+
+def test_threshold_counts_and_outliers():
+    # Dois olhos na mesma faixa de AL e K: dispersões de 0.3 D e 1.5 D; a Haigis é a mais distante
+    df = pd.DataFrame({
+        'axial_length': [23.1, 23.2, 26.1],
+        'meas_k1': [43.2, 43.4, 41.0],
+        'meas_k2': [43.6, 43.4, 41.0],
+        'srk_t': [20.0, 20.0, 15.0],
+        'haigis': [20.3, 21.5, np.nan],
+        'barrett_universal_ii': [20.0, 20.0, np.nan],
+    })
+    report = analyze_results(df, thresholds=(0.5, 1.0))
+
+    overall = report['overall']
+    assert overall['comparable_rows'] == 2
+    assert (overall['disagree_gt_0.5'], overall['disagree_gt_1']) == (1, 1)
+    assert overall['spread_mean'] == pytest.approx(0.9)
+
+    cells = report['by_al_k_bin']
+    assert (cells['al_center'], cells['k_center']) == ([23.25], [43.5])
+    assert cells['count'] == [2] and cells['spread_max'] == [pytest.approx(1.5)]
+    assert cells['outlier'] == ['haigis']
+
+    by_al = report['by_al_bin']
+    assert by_al['al_center'] == [23.25, 26.25]
+    assert by_al['disagree_gt_0.5'] == [1, 0] and by_al['outlier'] == ['haigis', None]
+
+    pair = next(p for p in overall['pairwise'] if (p['a'], p['b']) == ('srk_t', 'haigis'))
+    assert pair['count'] == 2 and pair['mean'] == pytest.approx(-0.9) and pair['max_abs'] == pytest.approx(1.5)
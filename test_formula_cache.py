@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_formula_cache.py
+
+import math
+import warnings
+
+import pytest
+
+from formula_cache import MemoizedIOLFormulas, constants_snapshot
+from iol_formulas import CONSTANTS, IOLFormulas
+
+
+@pytest.fixture(autouse=True)
+def _quiet():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        yield
+
+
+def test_positional_keyword_and_default_calls_share_one_entry():
+    cache = MemoizedIOLFormulas()
+    results = [
+        cache.srk_power(23.5, 44.0, 118.99),
+        cache.srk_power(23.5, 44.0, a_constant=118.99),
+        cache.srk_power(axial_length=23.5, keratometry=44.0, a_constant=118.99),
+        cache.srk_power(23.5, 44.0, 118.99, None),
+    ]
+    assert all(result == results[0] for result in results)
+
+    cache.haigis_power(23.5, 7.5, 5.2)
+    cache.haigis_power(23.5, 7.5, 5.2, 0.0)
+    cache.haigis_power(23.5, radius_of_curvature=7.5, elp=5.2, vertex_distance=12.0)
+
+    stats = cache.cache_stats()
+    assert (stats.size, stats.misses, stats.hits) == (2, 2, 5)
+
+
+def test_results_match_the_unmemoized_formulas():
+    cache, direct = MemoizedIOLFormulas(), IOLFormulas()
+    for _ in range(2):
+        assert cache.holladay_1_power(23.5, 5.1, keratometry=44.0) == direct.holladay_1_power(23.5, 5.1, keratometry=44.0)
+        assert cache._srk_t_elp(26.0, 42.0, a_constant=119.0) == direct._srk_t_elp(26.0, 42.0, a_constant=119.0)
+    assert cache.cache_stats().hits == 2
+
+
+def test_nested_formulas_occupy_one_entry():
+    # hoffer_power chama colenbrander_power internamente: só a chamada externa é contada
+    cache = MemoizedIOLFormulas()
+    assert cache.hoffer_power(23.5, 44.0, 5.0) == IOLFormulas().hoffer_power(23.5, 44.0, 5.0)
+    cache.hoffer_power(23.5, 44.0, 5.0)
+
+    stats = cache.cache_stats()
+    assert (stats.size, stats.misses, stats.hits) == (1, 1, 1)
+
+
+def test_nan_arguments_are_cached():
+    cache = MemoizedIOLFormulas()
+    first = cache.srk_power(float('nan'), 44.0, 118.99)
+    second = cache.srk_power(float('nan'), 44.0, 118.99)
+    assert math.isnan(first['result']) and math.isnan(second['result'])
+    assert cache.cache_stats().hits == 1
+
+
+def test_invalid_arguments_raise_like_the_direct_call():
+    cache = MemoizedIOLFormulas()
+    with pytest.raises(TypeError):
+        cache.srk_power(23.5, 44.0, 118.99, None, 1.0)
+    with pytest.raises(TypeError):
+        cache.srk_power(23.5, 44.0, 118.99, a_constant=118.99)
+    with pytest.raises(TypeError):
+        cache.srk_power(23.5)
+
+
+def test_invalidate_after_changing_constants(monkeypatch):
+    cache = MemoizedIOLFormulas()
+    before = cache._haigis_elp(23.5, a_constant=118.99)['result']
+    monkeypatch.setitem(CONSTANTS['iol'], 'a_to_acd_a0', CONSTANTS['iol']['a_to_acd_a0'] + 1.0)
+    cache.invalidate()
+
+    after = cache._haigis_elp(23.5, a_constant=118.99)['result']
+    # A chave guarda as próprias constantes, não um hash delas
+    assert [key[1] for key in cache._cache] == [constants_snapshot()]
+    assert after == pytest.approx(before + 1.0)
+    assert after == IOLFormulas()._haigis_elp(23.5, a_constant=118.99)['result']
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_generate_chart_batch.py
+
+import numpy as np
+import pandas as pd
+
+from generate_chart_batch import INDEX_HTML, PLOTLY_JS, ChartSpec, default_chart_specs, generate_chart_batch
+
+
+def _results_csv(path, n=40):
+    rng = np.random.default_rng(4)
+    al = np.linspace(20.0, 30.0, n)
+    k = rng.uniform(40.0, 47.0, n)
+    pd.DataFrame({
+        'iol_model': np.where(np.arange(n) % 2, 'Lens A', 'Lens B'),
+        'eye_side': np.where(np.arange(n) % 3, 'R', 'L'),
+        'axial_length': al,
+        'meas_k1': k - 0.4,
+        'meas_k2': k + 0.4,
+        'srk_t': 118.99 - 2.5 * al - 0.9 * k,
+        'haigis': 119.2 - 2.5 * al - 0.9 * k,
+        'barrett_universal_ii': 119.0 - 2.5 * al - 0.9 * k,
+    }).to_csv(path, index=False)
+
+
+def test_batch_shares_plotly_js_and_survives_a_failing_chart(tmp_path, capsys):
+    input_csv = tmp_path / 'resultados.csv'
+    output_dir = tmp_path / 'graficos'
+    _results_csv(input_csv)
+    specs = [
+        ChartSpec('todas', "Todas"),
+        # Coluna inexistente: o gráfico falha no processo do pool
+        ChartSpec('quebrado', "Quebrado", filters=(('coluna_inexistente', 1),)),
+        ChartSpec('lente_a', "Lente A", filters=(('iol_model', 'Lens A'),)),
+        ChartSpec('diferenca_barrett', "Diferença", relative_to='barrett_universal_ii'),
+        ChartSpec('vazio', "Vazio", filters=(('iol_model', 'Lens Z'),)),
+    ]
+
+    rendered = generate_chart_batch(str(input_csv), str(output_dir), specs, max_workers=2)
+
+    assert [spec.slug for spec, _, _ in rendered] == ['todas', 'lente_a', 'diferenca_barrett']
+    assert [count for _, _, count in rendered] == [40, 20, 40]
+    assert "'quebrado'" in capsys.readouterr().out
+    assert sorted(p.name for p in output_dir.iterdir()) == sorted(
+        [INDEX_HTML, PLOTLY_JS, 'todas.html', 'lente_a.html', 'diferenca_barrett.html'])
+
+    plotly_js_size = (output_dir / PLOTLY_JS).stat().st_size
+    for _, filename, _ in rendered:
+        page = (output_dir / filename).read_text(encoding='utf-8')
+        assert f'src="{PLOTLY_JS}"' in page
+        assert len(page) < plotly_js_size / 10
+    index = (output_dir / INDEX_HTML).read_text(encoding='utf-8')
+    assert 'href="lente_a.html"' in index and 'quebrado' not in index
+
+
+def test_default_specs_cover_lenses_sides_and_k_bands(tmp_path):
+    input_csv = tmp_path / 'resultados.csv'
+    _results_csv(input_csv)
+    df = pd.read_csv(input_csv)
+    slugs = [spec.slug for spec in default_chart_specs(df, ['srk_t', 'haigis', 'barrett_universal_ii'])]
+
+    assert slugs[0] == 'todas' and len(set(slugs)) == len(slugs)
+    assert {'lente_lens_a', 'lente_lens_b', 'olho_l', 'olho_r', 'diferenca_barrett'} <= set(slugs)
+    assert 'k_0_42' in slugs and 'k_46_100' in slugs
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_iol_catalog.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from iol_catalog import OVERRIDE_COLUMNS, IOLCatalog, LensConstants
+from iol_formulas_vectorized import FORMULA_NAMES, compute_all_formulas, pacd_from_a_constant
+
+AL = np.array([20.5, 22.0, 23.5, 25.0, 27.5, 31.0])
+K = np.array([47.5, 45.0, 44.0, 43.0, 41.5, 39.0])
+ACD = np.array([2.6, 3.0, 3.2, 3.5, 3.8, 4.1])
+
+
+def _catalog():
+    return IOLCatalog({
+        'Lens A': LensConstants.from_a_constant('Lens A', 118.99),
+        'Lens B': LensConstants.from_a_constant('Lens B', 119.4, surgeon_factor=2.05, srk_t_acd=5.9),
+        'Lens C': LensConstants.from_a_constant('Lens C', 118.0, pacd=5.2, haigis_a0=-0.9,
+                                                haigis_a1=0.35, haigis_a2=0.15),
+    })
+
+
+def test_overrides_replace_only_the_given_constants():
+    approximated = LensConstants.from_a_constant('Lens', 119.0)
+    lens = LensConstants.from_a_constant('Lens', 119.0, pacd=6.1, haigis_a1=0.3, srk_t_acd=None,
+                                         surgeon_factor=float('nan'))
+
+    assert approximated.optimized == () and approximated.pacd == pytest.approx(float(pacd_from_a_constant(119.0)))
+    assert (lens.pacd, lens.haigis_a1) == (6.1, 0.3)
+    assert lens.optimized == ('pacd', 'haigis_a1')
+    assert (lens.surgeon_factor, lens.srk_t_acd) == (approximated.surgeon_factor, approximated.srk_t_acd)
+    # a0 aproximado é recalculado com o a1 otimizado
+    assert lens.haigis_a0 != approximated.haigis_a0
+
+    with pytest.raises(ValueError, match='Unknown lens constants'):
+        LensConstants.from_a_constant('Lens', 119.0, kane_a=1.0)
+
+
+def test_csv_overrides_with_empty_cells(tmp_path):
+    path = tmp_path / 'catalogo.csv'
+    pd.DataFrame({
+        'iol_model': ['Lens A', 'Lens B'],
+        'a_constant': [118.99, 119.4],
+        'pacd': [np.nan, 5.8],
+        'haigis_a0': [-0.5, np.nan],
+    }).to_csv(path, index=False)
+
+    catalog = IOLCatalog.from_csv(str(path))
+    assert catalog.names == ['Lens A', 'Lens B']
+    assert catalog.lens('Lens A') == LensConstants.from_a_constant('Lens A', 118.99, haigis_a0=-0.5)
+    assert catalog.lens('Lens B') == LensConstants.from_a_constant('Lens B', 119.4, pacd=5.8)
+
+
+@pytest.mark.parametrize('haigis_acd', [3.5, ACD])
+def test_broadcast_matches_per_lens_calls(haigis_acd):
+    catalog = _catalog()
+    results = catalog.calculate(AL, K, haigis_acd, fixed_elp=4.2)
+
+    for row, name in enumerate(catalog.names):
+        lens = catalog.lens(name)
+        expected = compute_all_formulas(
+            AL, K, lens.a_constant, haigis_acd=haigis_acd, fixed_elp=4.2,
+            **{field: getattr(lens, field) for field in OVERRIDE_COLUMNS},
+        )
+        for formula in FORMULA_NAMES:
+            assert results[formula].shape == (len(catalog), len(AL))
+            np.testing.assert_allclose(results[formula][row], expected[formula], rtol=1e-12, err_msg=formula)
+
+
+def test_compare_lenses_has_one_row_per_lens_and_eye():
+    catalog = _catalog()
+    df = pd.DataFrame({'eye_side': 'R', 'axial_length': AL, 'meas_k1': K - 0.5, 'meas_k2': K + 0.5,
+                       'optical_acd': ACD})
+    out = catalog.compare_lenses(df, haigis_acd=ACD)
+
+    assert len(out) == len(catalog) * len(df)
+    lens_b = out[out['iol_model'] == 'Lens B']
+    assert (lens_b['a_constant'] == 119.4).all()
+    np.testing.assert_allclose(lens_b['srk_t'], catalog.calculate(AL, K, ACD)['srk_t'][1])
+
+
+def test_unknown_lens_and_empty_catalog_are_rejected():
+    with pytest.raises(ValueError, match='not in the catalog'):
+        _catalog().lens('Lens Z')
+    with pytest.raises(ValueError, match='empty'):
+        IOLCatalog({})
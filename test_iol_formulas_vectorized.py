@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_iol_formulas_vectorized.py
+
+import math
+import warnings
+
+import numpy as np
+import pytest
+
+from iol_formulas import CONSTANTS, IOLFormulas
+from iol_formulas_vectorized import FORMULA_NAMES, VectorizedIOLFormulas, compute_all_formulas
+
+A_CONSTANT = 118.99
+HAIGIS_ACD = 3.5
+FIXED_ELP = 4.0
+CORNEAL_INDEX = CONSTANTS["biometry"]["corneal_index"]
+
+EYES = [
+    (23.5, 44.0), (20.0, 48.0), (28.2, 40.0), (33.0, 38.5), (18.0, 52.0), (24.3, 43.1),
+    # K nulo e negativo: onde a versão escalar falha, a vetorizada retorna NaN
+    (23.5, 0.0), (23.5, -44.0),
+]
+
+
+def _scalar(calculator, name, al, k):
+    """Uma fórmula escalar encadeada como em `compute_all_formulas`; NaN onde a versão escalar falha."""
+    def result(value):
+        return value['result']
+
+    try:
+        if name == 'colenbrander':
+            return result(calculator.colenbrander_power(al, k, FIXED_ELP))
+        if name == 'srk':
+            return result(calculator.srk_power(al, k, A_CONSTANT))
+        if name == 'srk_2':
+            return result(calculator.srk_2_power(al, k, A_CONSTANT))
+        if name == 'hoffer':
+            return result(calculator.hoffer_power(al, k, result(calculator._hoffer_elp(al, a_constant=A_CONSTANT))))
+        if name == 'holladay_1':
+            elp = result(calculator._holladay_1_elp(al, k, a_constant=A_CONSTANT))
+            return result(calculator.holladay_1_power(al, elp, keratometry=k))
+        if name == 'hoffer_q':
+            return result(calculator.hoffer_q_power(al, k, result(calculator._hoffer_q_elp(al, k, a_constant=A_CONSTANT))))
+        if name == 'srk_t':
+            return result(calculator.srk_t_power(al, k, result(calculator._srk_t_elp(al, k, a_constant=A_CONSTANT))))
+        if name == 'haigis':
+            elp = result(calculator._haigis_elp(al, acd=HAIGIS_ACD, a_constant=A_CONSTANT))
+            return result(calculator.haigis_power(al, (CORNEAL_INDEX - 1) * 1000 / k, elp))
+    except (ZeroDivisionError, ValueError):
+        return math.nan
+    raise KeyError(name)
+
+
+@pytest.mark.parametrize('name', FORMULA_NAMES)
+def test_matches_scalar_formulas(name):
+    calculator = IOLFormulas()
+    al, k = (np.array(values) for values in zip(*EYES))
+    vectorized = compute_all_formulas(al, k, A_CONSTANT, HAIGIS_ACD, FIXED_ELP)[name]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        expected = [_scalar(calculator, name, a, b) for a, b in EYES]
+    for (a, b), value, scalar in zip(EYES, vectorized, expected):
+        # Haigis sem raio corneano válido (K <= 0) é NaN, como nas demais fórmulas vetorizadas
+        if math.isnan(scalar) or (name == 'haigis' and b <= 0):
+            assert math.isnan(value), (name, a, b)
+        else:
+            assert value == pytest.approx(scalar, rel=1e-12, abs=1e-9), (name, a, b)
+
+
+def test_haigis_without_valid_corneal_radius_is_nan():
+    power = VectorizedIOLFormulas().haigis_power(23.5, np.array([np.inf, -7.67, 0.0, 7.67]), 5.0)
+
+    assert np.isnan(power[:3]).all() and np.isfinite(power[3])
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_iol_lookup_table.py
+
+import os
+
+import pytest
+
+from iol_catalog import IOLCatalog, LensConstants
+from iol_formulas_vectorized import FORMULA_NAMES, compute_all_formulas
+from iol_lookup_table import ACD_FORMULAS, GridAxis, IOLLookupTable, build_lookup_table
+
+AL_AXIS = GridAxis.from_range(21.0, 26.0, 0.5)
+K_AXIS = GridAxis.from_range(40.0, 48.0, 1.0)
+ACD_AXIS = GridAxis.from_range(2.5, 4.5, 0.5)
+LENSES = {'Lens A': 118.99, 'Lens B': 119.4}
+
+
+@pytest.fixture(scope='module')
+def table_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('lut') / 'table.bin')
+    build_lookup_table(path, LENSES, AL_AXIS, K_AXIS, ACD_AXIS, fixed_elp=4.0)
+    return path
+
+
+def _expected(lens, al, k, acd):
+    constants = IOLCatalog.from_a_constants(LENSES).lens(lens)
+    results = compute_all_formulas(
+        al, k, constants.a_constant, haigis_acd=acd, fixed_elp=4.0,
+        pacd=constants.pacd, surgeon_factor=constants.surgeon_factor, srk_t_acd=constants.srk_t_acd,
+        haigis_a0=constants.haigis_a0, haigis_a1=constants.haigis_a1, haigis_a2=constants.haigis_a2,
+    )
+    return {name: float(value) for name, value in results.items()}
+
+
+@pytest.mark.parametrize('lens', sorted(LENSES))
+@pytest.mark.parametrize('al, k, acd', [(21.0, 40.0, 2.5), (23.5, 44.0, 3.5), (26.0, 48.0, 4.5), (24.0, 41.0, 3.0)])
+def test_grid_points_match_vectorized_formulas(table_path, lens, al, k, acd):
+    values = IOLLookupTable(table_path).query(lens, al, k, acd)
+
+    assert list(values) == list(FORMULA_NAMES)
+    expected = _expected(lens, al, k, acd)
+    for name in FORMULA_NAMES:
+        assert values[name] == pytest.approx(expected[name], rel=1e-6, abs=1e-4), name
+
+
+def test_only_acd_formulas_change_with_acd(table_path):
+    table = IOLLookupTable(table_path)
+    shallow = table.query('Lens A', 23.3, 43.4, 2.6, interpolate=True)
+    deep = table.query('Lens A', 23.3, 43.4, 4.4, interpolate=True)
+
+    for name in FORMULA_NAMES:
+        assert (shallow[name] != deep[name]) == (name in ACD_FORMULAS), name
+
+
+def test_interpolation_is_close_between_grid_points(table_path):
+    values = IOLLookupTable(table_path).query('Lens B', 23.25, 44.5, 3.25, interpolate=True)
+    expected = _expected('Lens B', 23.25, 44.5, 3.25)
+    for name in FORMULA_NAMES:
+        assert values[name] == pytest.approx(expected[name], abs=0.05), name
+
+
+def test_acd_independent_formulas_are_stored_once_per_al_k(table_path):
+    n_plane = len(LENSES) * AL_AXIS.count * K_AXIS.count * (len(FORMULA_NAMES) - len(ACD_FORMULAS))
+    n_acd = len(LENSES) * AL_AXIS.count * K_AXIS.count * ACD_AXIS.count * len(ACD_FORMULAS)
+    # Cabeçalho e alinhamento de cada tabela ocupam no máximo 3 páginas.
+    assert os.path.getsize(table_path) <= 4 * (n_plane + n_acd) + 3 * 4096
+
+
+def test_rejects_unknown_lens_and_out_of_range(table_path):
+    table = IOLLookupTable(table_path)
+    with pytest.raises(ValueError):
+        table.query('Unknown', 23.5, 44.0, 3.5)
+    with pytest.raises(ValueError):
+        table.query('Lens A', 30.0, 44.0, 3.5)
+
+
+def test_header_keeps_the_derived_constants(tmp_path):
+    catalog = IOLCatalog({
+        'Lens A': LensConstants.from_a_constant('Lens A', 118.99),
+        'Lens C': LensConstants.from_a_constant('Lens C', 119.2, pacd=5.9, haigis_a0=-0.8, haigis_a2=0.2),
+    })
+    path = str(tmp_path / 'table.bin')
+    build_lookup_table(path, catalog, AL_AXIS, K_AXIS, ACD_AXIS)
+
+    table = IOLLookupTable(path)
+    assert table.lenses == {'Lens A': 118.99, 'Lens C': 119.2}
+    assert table.lens_constants == {name: catalog.lens(name) for name in catalog.names}
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_outcome_evaluation.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from outcome_evaluation import (
+    DEFAULT_POWER_RATIO,
+    METRICS,
+    bootstrap_columns,
+    bootstrap_metrics,
+    evaluate_outcomes,
+    outcome_metrics,
+    prediction_errors,
+)
+
+FORMULAS = ['srk_t', 'haigis']
+
+
+def _outcomes(n=120, seed=9):
+    rng = np.random.default_rng(seed)
+    al = rng.uniform(20.0, 28.0, n)
+    implanted = rng.uniform(10.0, 25.0, n)
+    df = pd.DataFrame({
+        'axial_length': al,
+        'meas_k1': rng.uniform(41.0, 45.0, n),
+        'meas_k2': rng.uniform(42.0, 46.0, n),
+        'srk_t': implanted + rng.normal(0.0, 0.6, n),
+        'haigis': implanted + rng.normal(0.3, 0.8, n),
+        'iol_power': implanted,
+        'postop_refraction': rng.normal(0.0, 0.3, n),
+    })
+    df.loc[::17, 'haigis'] = np.nan
+    return df
+
+
+def test_prediction_errors_without_lens_thickness_use_default_ratio():
+    df = _outcomes(n=5)
+    errors = prediction_errors(df, FORMULAS)
+
+    expected = df['postop_refraction'].to_numpy()[:, None] \
+        - (df[FORMULAS].to_numpy() - df['iol_power'].to_numpy()[:, None]) / DEFAULT_POWER_RATIO
+    np.testing.assert_allclose(errors, expected)
+
+
+def test_metrics_match_direct_computation():
+    errors = np.array([[0.1, np.nan], [-0.3, 0.2], [0.6, -1.2], [-0.2, np.nan]])
+    metrics = dict(zip(METRICS, outcome_metrics(errors)))
+
+    np.testing.assert_allclose(metrics['me'], [0.05, -0.5])
+    np.testing.assert_allclose(metrics['mae'], [0.3, 0.7])
+    np.testing.assert_allclose(metrics['medae'], [0.25, 0.7])
+    np.testing.assert_allclose(metrics['within_0.25'], [50.0, 50.0])
+    np.testing.assert_allclose(metrics['within_1'], [100.0, 50.0])
+
+
+def test_bootstrap_with_every_eye_once_reproduces_the_estimate():
+    errors = prediction_errors(_outcomes(), FORMULAS)
+    weights = np.ones((1, len(errors)), dtype=np.int64)
+    resample = bootstrap_metrics(weights, bootstrap_columns(errors), np.sort(np.abs(errors), axis=0),
+                                 np.random.default_rng(0))[0]
+    estimate = outcome_metrics(errors)
+
+    # A mediana é sorteada da sua distribuição; as demais métricas são exatas
+    for m, metric in enumerate(METRICS):
+        if metric != 'medae':
+            np.testing.assert_allclose(resample[m], estimate[m], err_msg=metric)
+
+
+def test_confidence_intervals_do_not_depend_on_worker_count():
+    df = _outcomes()
+    # 1200 reamostragens: três blocos com sementes próprias
+    one = evaluate_outcomes(df, FORMULAS, n_resamples=1200, seed=4, max_workers=1)
+    two = evaluate_outcomes(df, FORMULAS, n_resamples=1200, seed=4, max_workers=2)
+    other_seed = evaluate_outcomes(df, FORMULAS, n_resamples=1200, seed=5, max_workers=1)
+
+    assert one.strata == two.strata and one.strata[0] == 'all'
+    for stratum in one.strata:
+        np.testing.assert_array_equal(one.ci_low[stratum], two.ci_low[stratum])
+        np.testing.assert_array_equal(one.ci_high[stratum], two.ci_high[stratum])
+    assert not np.array_equal(one.ci_low['all'], other_seed.ci_low['all'])
+
+    table = one.table()
+    assert list(table.index) == FORMULAS
+    assert table['n_eyes'].tolist() == [120, 120 - len(range(0, 120, 17))]
+    assert (table['mae_low'] <= table['mae']).all() and (table['mae'] <= table['mae_high']).all()
+
+
+def test_missing_outcome_columns_are_rejected():
+    with pytest.raises(ValueError, match='postop_refraction'):
+        evaluate_outcomes(_outcomes().drop(columns='postop_refraction'), FORMULAS, n_resamples=0)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_parallel_kernels.py
+
+import numpy as np
+import pytest
+
+from iol_formulas_vectorized import FORMULA_NAMES, compute_all_formulas
+from parallel_kernels import ParallelFormulaExecutor, compute_all_formulas_parallel
+
+N_EYES = 10_007
+
+
+def _eyes(n=N_EYES, seed=7):
+    rng = np.random.default_rng(seed)
+    al = rng.uniform(14.0, 36.0, n)
+    k = rng.uniform(30.0, 60.0, n)
+    # K nulo, negativo e NaN, AL nulo e NaN: cada fórmula deve marcar os mesmos olhos como NaN
+    k[::97] = 0.0
+    k[3::103] *= -1
+    k[5::101] = np.nan
+    al[7::211] = np.nan
+    al[11::307] = 0.0
+    return al, k, rng.uniform(2.0, 5.0, n)
+
+
+def _assert_identical(actual, expected):
+    assert list(actual) == list(FORMULA_NAMES)
+    for name in FORMULA_NAMES:
+        assert np.shape(actual[name]) == np.shape(expected[name]), name
+        # Igualdade bit a bit, com NaN nas mesmas posições
+        np.testing.assert_array_equal(actual[name], expected[name], err_msg=name)
+
+
+@pytest.mark.parametrize('block_size, max_workers', [(7, 3), (1000, 2), (65_536, 1)])
+@pytest.mark.parametrize('corneal_index', [1.3375, 1.3315])
+def test_matches_vectorized_formulas(block_size, max_workers, corneal_index):
+    al, k, acd = _eyes()
+    expected = compute_all_formulas(al, k, 118.99, acd, 4.0, corneal_index)
+    actual = compute_all_formulas_parallel(al, k, 118.99, acd, 4.0, corneal_index,
+                                           max_workers=max_workers, block_size=block_size)
+    _assert_identical(actual, expected)
+
+
+def test_matches_vectorized_formulas_with_per_eye_constants():
+    al, k, acd = _eyes()
+    rng = np.random.default_rng(11)
+    a_constant = rng.uniform(116.0, 121.0, N_EYES)
+    constants = {
+        'pacd': rng.uniform(4.5, 6.5, N_EYES),
+        'surgeon_factor': rng.uniform(1.2, 2.2, N_EYES),
+        'srk_t_acd': rng.uniform(4.8, 6.2, N_EYES),
+        'haigis_a1': rng.uniform(0.3, 0.5, N_EYES),
+        'haigis_a2': rng.uniform(0.05, 0.2, N_EYES),
+    }
+    # Constantes derivadas ausentes (aproximadas a partir da constante A de cada olho)
+    _assert_identical(
+        compute_all_formulas_parallel(al, k, a_constant, acd, 4.0, 1.3315, block_size=1000, **constants),
+        compute_all_formulas(al, k, a_constant, acd, 4.0, 1.3315, **constants),
+    )
+    constants['haigis_a0'] = rng.uniform(-1.0, 1.0, N_EYES)
+    _assert_identical(
+        compute_all_formulas_parallel(al, k, a_constant, acd, 4.0, block_size=1000, **constants),
+        compute_all_formulas(al, k, a_constant, acd, 4.0, **constants),
+    )
+
+
+def test_scalar_inputs_return_scalars():
+    expected = compute_all_formulas(23.5, 43.5, 118.99, 3.5, 4.0)
+    actual = compute_all_formulas_parallel(23.5, 43.5, 118.99, 3.5, 4.0)
+
+    _assert_identical(actual, expected)
+    assert all(np.shape(actual[name]) == () for name in FORMULA_NAMES)
+
+
+def test_writes_into_caller_arrays():
+    al, k, acd = _eyes(n=100)
+    out = {name: np.empty(100) for name in FORMULA_NAMES}
+    with ParallelFormulaExecutor(max_workers=2, block_size=16) as executor:
+        results = executor.compute_all(al, k, 118.99, acd, 4.0, out=out)
+        assert all(results[name] is out[name] for name in FORMULA_NAMES)
+        _assert_identical(out, compute_all_formulas(al, k, 118.99, acd, 4.0))
+
+        with pytest.raises(ValueError, match='shape'):
+            executor.compute_all(al, k, 118.99, acd, 4.0, out={name: np.empty(99) for name in FORMULA_NAMES})
+        with pytest.raises(ValueError, match='1-D'):
+            executor.compute_all(al.reshape(10, 10), k.reshape(10, 10), 118.99, acd.reshape(10, 10), 4.0)
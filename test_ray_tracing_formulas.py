@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_ray_tracing_formulas.py
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from ray_tracing_formulas import ThickLensEyeModel
+
+AL = np.array([20.5, 22.0, 23.5, 25.0, 27.5, 31.0])
+K = np.array([47.5, 45.5, 44.0, 43.0, 41.5, 39.0])
+ACD = np.array([2.6, 2.9, 3.2, 3.4, 3.7, 4.0])
+LT = np.array([4.9, 4.7, 4.5, 4.3, 4.0, 3.8])
+
+
+def _thin_lens_power(model, target, vertex_distance=12.0):
+    """Fórmula de vergência de lente fina, com a córnea fina de mesma potência e a LIO em ACD + C·LT."""
+    radius = (model.keratometric_index - 1) / K
+    cornea = (model.cornea_index - 1) / radius + (model.aqueous_index - model.cornea_index) / (radius * model.posterior_radius_ratio)
+    vergence = cornea + target / (1 - vertex_distance / 1000 * target)
+    elp = model.iol_position(ACD, LT) / 1000
+    return model.vitreous_index / (AL / 1000 - elp) - model.aqueous_index / (model.aqueous_index / vergence - elp)
+
+
+@pytest.mark.parametrize('target', [0.0, -0.5, 1.25])
+def test_predicted_refraction_of_the_emmetropic_power_is_the_target(target):
+    model = ThickLensEyeModel()
+    power = model.emmetropic_power(AL, K, ACD, LT, target)
+
+    assert np.isfinite(power).all()
+    np.testing.assert_allclose(model.predicted_refraction(AL, K, ACD, LT, power), target, atol=1e-9)
+
+
+def test_myopic_target_needs_more_power():
+    powers = ThickLensEyeModel().emmetropic_power(23.5, 44.0, 3.2, 4.5, [-1.0, 0.0, 1.0])
+    assert powers[0] > powers[1] > powers[2]
+
+
+@pytest.mark.parametrize('target', [0.0, -0.5])
+def test_approaches_the_thin_lens_vergence_formula(target):
+    thin = replace(ThickLensEyeModel(), cornea_thickness=0.0)
+    errors = [np.abs(replace(thin, iol_thickness=t).emmetropic_power(AL, K, ACD, LT, target)
+                     - _thin_lens_power(thin, target)).max()
+              for t in (0.9, 0.1, 0.01)]
+
+    # O erro cai com a espessura da LIO e some quando ela é nula
+    assert errors[0] > errors[1] > errors[2] and errors[2] < 0.01
+    np.testing.assert_allclose(replace(thin, iol_thickness=0.0).emmetropic_power(AL, K, ACD, LT, target),
+                               _thin_lens_power(thin, target), atol=1e-9)
+
+
+def test_impossible_geometry_is_nan():
+    model = ThickLensEyeModel()
+    # ACD rasa demais (a LIO invadiria a córnea) e AL curto demais (a LIO passaria da retina)
+    al = np.array([23.5, 23.5, 5.0])
+    acd = np.array([3.2, 0.5, 3.2])
+    lt = np.array([4.5, 0.5, 4.5])
+
+    valid = model.valid_geometry(al, acd, lt)
+    assert valid.tolist() == [True, False, False]
+    power = model.emmetropic_power(al, 44.0, acd, lt)
+    assert np.isfinite(power[0]) and np.isnan(power[~valid]).all()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_run_all_calculations.py
+
+import numpy as np
+import pytest
+
+import run_all_calculations as rac
+from barrett_scraper_lib import CalculationResult
+
+
+class _BrowserFailure:
+    """Scraper cujo navegador não abre (como um chromedriver ausente)."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        raise RuntimeError("Unable to obtain driver for chrome")
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class _FailsOnFirstPair:
+    """Scraper cuja primeira submissão falha e as seguintes retornam 20.0 D."""
+
+    def __init__(self, *args, **kwargs):
+        self.calls = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def run_pair_calculation(self, right, left):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("timeout")
+        row = [CalculationResult(iol_power=20.0, optic='Biconvex', refraction=0.0)] * 4
+        return (row if right is not None else [], row if left is not None else [])
+
+
+def test_browser_failure_leaves_barrett_nan_and_keeps_other_columns(monkeypatch):
+    monkeypatch.setattr(rac, 'BarrettCalculatorScraper', _BrowserFailure)
+    df = rac.run_unified_calculation(rac.setup_dataframe(test_mode=True))
+
+    assert df[rac.BARRETT_COLUMN].isna().all()
+    for column in rac.FORMULA_COLUMNS:
+        assert df[column.name].notna().all(), column.name
+    assert df[rac.RAY_TRACING_COLUMN].notna().all()
+
+
+def test_failed_pair_is_skipped(monkeypatch):
+    monkeypatch.setattr(rac, 'BarrettCalculatorScraper', _FailsOnFirstPair)
+    df = rac.setup_dataframe(test_mode=False).iloc[:4].copy()
+    df['eye_side'] = ['R', 'L', 'R', 'L']
+
+    rac.run_barrett_scrape(df, df.index)
+
+    np.testing.assert_array_equal(df[rac.BARRETT_COLUMN].isna().to_numpy(), [True, True, False, False])
+    assert (df[rac.BARRETT_COLUMN].dropna() == 20.0).all()
+
+
+def test_fingerprint_covers_the_keratometry_conversion():
+    for column in rac.FORMULA_COLUMNS:
+        assert rac._eye_optics in rac._column_sources(column), column.name
+
+
+def test_row_patient_sends_optional_biometry():
+    df = rac.setup_dataframe(test_mode=True)
+    df['wtw'] = [11.8, np.nan]
+
+    first, second = (rac._row_patient(row) for _, row in df.iterrows())
+    assert first.lens_thickness == pytest.approx(df['lens_thickness'].iloc[0])
+    assert first.wtw == 11.8
+    assert second.wtw is None
+    assert rac._row_patient(df.drop(columns=['lens_thickness', 'wtw']).iloc[0]).lens_thickness is None
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# NOME DO ARQUIVO: test_synthetic_population.py
+
+import numpy as np
+import pytest
+
+from iol_formulas import FORMULA_OUTPUT_COLUMNS
+from synthetic_population import (
+    ARRAY_COLUMNS,
+    DEFAULT_MODEL,
+    chunk_dataframe,
+    chunk_patients,
+    chunk_seed,
+    iter_population,
+    population_chunk,
+)
+
+
+def _assert_same_chunk(actual, expected):
+    assert list(actual) == list(ARRAY_COLUMNS)
+    for name in ARRAY_COLUMNS:
+        np.testing.assert_array_equal(actual[name], expected[name], err_msg=name)
+
+
+def test_chunk_seed_is_the_spawned_child():
+    children = np.random.SeedSequence(123).spawn(4)
+    for index, child in enumerate(children):
+        assert chunk_seed(123, index).generate_state(4).tolist() == child.generate_state(4).tolist()
+
+
+def test_chunk_is_reproducible_on_its_own():
+    chunks = list(iter_population(n_rows=1000, chunk_rows=256, seed=42))
+
+    # Cada bloco depende apenas da semente e do seu índice, não dos blocos gerados antes
+    for index in reversed(range(len(chunks))):
+        alone = population_chunk(index, len(chunks[index]['axial_length']), seed=42,
+                                 first_patient_id=index * 128)
+        _assert_same_chunk(alone, chunks[index])
+    _assert_same_chunk(list(iter_population(n_rows=1000, chunk_rows=256, seed=42))[2], chunks[2])
+
+
+def test_chunks_and_seeds_differ():
+    first, second = population_chunk(0, 100, seed=42), population_chunk(1, 100, seed=42)
+    other_seed = population_chunk(0, 100, seed=43)
+
+    assert not np.array_equal(first['axial_length'], second['axial_length'])
+    assert not np.array_equal(first['axial_length'], other_seed['axial_length'])
+
+
+def test_chunks_cover_the_population_with_paired_eyes():
+    chunks = list(iter_population(n_rows=1001, chunk_rows=100, seed=1))
+    patient_id = np.concatenate([chunk['patient_id'] for chunk in chunks])
+    eye_side = np.concatenate([chunk['eye_side'] for chunk in chunks])
+
+    assert len(chunks) == 11 and len(patient_id) == 1001
+    np.testing.assert_array_equal(patient_id, np.arange(1001) // 2)
+    assert eye_side[::2].tolist() == ['R'] * 501 and eye_side[1::2].tolist() == ['L'] * 500
+
+
+def test_values_respect_ranges_and_decimals():
+    chunk = population_chunk(0, 20_000, seed=5)
+    for name in ARRAY_COLUMNS[2:]:
+        low, high = DEFAULT_MODEL.ranges.get(name, (-np.inf, np.inf))
+        assert chunk[name].min() >= low and chunk[name].max() <= high, name
+        np.testing.assert_array_equal(chunk[name], np.round(chunk[name], 2), err_msg=name)
+    assert (chunk['meas_k1'] <= chunk['meas_k2']).all()
+
+    # Olhos do mesmo paciente correlacionados como no modelo
+    al = chunk['axial_length']
+    assert np.corrcoef(al[::2], al[1::2])[0, 1] == pytest.approx(DEFAULT_MODEL.fellow_eye_correlation, abs=0.05)
+
+
+def test_odd_chunk_rows_are_rejected():
+    with pytest.raises(ValueError, match='even'):
+        next(iter_population(n_rows=10, chunk_rows=3))
+
+
+def test_chunk_dataframe_has_the_pipeline_columns():
+    chunk = population_chunk(0, 10, seed=3)
+    df = chunk_dataframe(chunk, 'Lens A', 119.0)
+
+    assert list(df.columns[:2]) == ['iol_model', 'a_constant']
+    assert list(df.columns[-len(FORMULA_OUTPUT_COLUMNS):]) == FORMULA_OUTPUT_COLUMNS
+    assert df[FORMULA_OUTPUT_COLUMNS].isna().all().all()
+    np.testing.assert_array_equal(df['wtw'], chunk['wtw'])
+    assert (df['a_constant'] == 119.0).all() and (df['iol_model'] == 'Lens A').all()
+
+
+def test_chunk_patients_keeps_every_measurement():
+    chunk = population_chunk(0, 5, seed=3)
+    patients = chunk_patients(chunk, 'Lens A')
+
+    assert len(patients) == 5
+    first = patients[0]
+    assert (first.iol_model, first.eye_side, first.patient_name) == ('Lens A', 'R', 'Synthetic 0')
+    assert first.axial_length == chunk['axial_length'][0]
+    assert first.lens_thickness == chunk['lens_thickness'][0] and first.wtw == chunk['wtw'][0]